@@ -2,3 +2,4 @@ from .models1d import *
 from .models2d import *
 from .models_network import *
 from .models_multi_ca import *
+from .sweep import sweep, parameter_grid
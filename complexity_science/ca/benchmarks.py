@@ -0,0 +1,269 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+#modules that are only needed for plotting, animation and DataFrames
+HEAVY_MODULES = ('matplotlib', 'pandas')
+
+_STARTUP_SCRIPT = """
+import importlib, json, sys, time
+start = time.perf_counter()
+importlib.import_module(%r)
+seconds = time.perf_counter() - start
+loaded = sorted(name for name in %r if name in sys.modules)
+print(json.dumps({'seconds' : seconds, 'loaded' : loaded}))
+"""
+
+
+def startup_time(module='complexity_science.ca', repeat=5):
+    """
+    Measures the cold import time of a module, each run in a fresh interpreter
+    -------------
+    Parameters:
+        module = name of the module to import
+        repeat = number of fresh interpreters
+    -------------
+    Returns:
+        result = dictionary with the median and every run in seconds and the
+                 heavy modules (HEAVY_MODULES) loaded by the import
+    """
+    runs = []
+    loaded = set()
+    for i in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _STARTUP_SCRIPT % (module, HEAVY_MODULES)],
+                                check=True, capture_output=True, text=True).stdout
+        run = json.loads(output.strip().splitlines()[-1])
+        runs.append(run['seconds'])
+        loaded.update(run['loaded'])
+
+    return {'module' : module, 'seconds' : sorted(runs)[len(runs)//2], 'runs' : runs, 'loaded' : sorted(loaded)}
+
+
+def _ring(nodes):
+    from .models_network import Adjacency
+    source = np.arange(nodes)
+    edges = np.stack([np.concatenate([source, source]),
+                      np.concatenate([(source+1) % nodes, (source+2) % nodes])], axis=1)
+    return Adjacency.from_edges(edges, num_nodes=nodes)
+
+
+def _wolfram(size):
+    from .models1d import wolfram
+    model = wolfram(size, 30)
+    model.initialize_binary(0.5)
+    return model, size
+
+
+def _lattice(factory):
+    def build(size):
+        from . import models2d
+        return getattr(models2d, factory)([size, size]), size*size
+    return build
+
+
+def _gillespie(size):
+    from .models_network import gillespie
+    model = gillespie(_ring(size))
+    model.initialize_random_int(0, 10)
+    return model, size
+
+
+#name : (builder(size) -> (model, cells updated per step), default sizes)
+CASES = {'wolfram' : (_wolfram, [1000, 10000, 100000]),
+         'game' : (_lattice('game'), [64, 256, 1024]),
+         'brians_brain' : (_lattice('brians_brain'), [64, 256, 1024]),
+         'applause' : (_lattice('applause'), [64, 256, 1024]),
+         'mpa' : (_lattice('mpa'), [64, 256, 1024]),
+         'forest_fire' : (_lattice('forest_fire'), [64, 256, 1024]),
+         'gillespie' : (_gillespie, [1000, 10000, 100000])}
+
+
+def machine_info():
+    """
+    Description of the machine and library versions stored with the results
+    """
+    return {'platform' : platform.platform(), 'processor' : platform.processor(),
+            'cpu_count' : os.cpu_count(), 'python' : platform.python_version(), 'numpy' : np.__version__}
+
+
+def bench_case(name, size, iterations=100, warmup=2, memory_steps=5, seed=0):
+    """
+    Benchmarks one model of CASES
+    -------------
+    Parameters:
+        name = key of CASES
+        size = size passed to the builder (cells in 1D, side of the lattice in 2D, nodes of a network)
+        iterations = number of timed evolve() calls
+        warmup = number of untimed evolve() calls before timing
+        memory_steps = number of evolve() calls traced for the peak memory
+        seed = numpy seed of the initial state and of the rules
+    -------------
+    Returns:
+        result = dictionary with the throughput in cell updates per second, the
+                 per step latency percentiles in seconds and the peak memory in bytes
+                 allocated by evolve() above the state
+    """
+    build, sizes = CASES[name]
+    np.random.seed(seed)
+    model, cells = build(size)
+    for i in range(warmup):
+        model.evolve()
+
+    latency = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        model.evolve()
+        latency[i] = time.perf_counter() - start
+
+    #tracing slows numpy down, so memory is measured on separate steps
+    tracemalloc.start()
+    try:
+        for i in range(memory_steps):
+            model.evolve()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    seconds = float(latency.sum())
+    p50, p90, p99 = np.percentile(latency, [50, 90, 99])
+    return {'model' : name, 'size' : size, 'cells' : cells, 'iterations' : iterations,
+            'seconds' : seconds, 'updates_per_second' : cells*iterations/seconds if seconds > 0 else float('inf'),
+            'latency' : {'p50' : float(p50), 'p90' : float(p90), 'p99' : float(p99), 'max' : float(latency.max())},
+            'peak_bytes' : int(peak)}
+
+
+def run_suite(models=None, sizes=None, iterations=(10, 100), warmup=2, seed=0, verbose=False):
+    """
+    Benchmarks every combination of model, size and iteration count
+    -------------
+    Parameters:
+        models = list of CASES keys, default is every model
+        sizes = list of sizes used for every model, default is the sizes of CASES
+        iterations = list of iteration counts
+        warmup, seed = see bench_case
+        verbose = print every result as it is measured
+    -------------
+    Returns:
+        suite = dictionary with the machine description and the list of results
+    """
+    results = []
+    for name in models or list(CASES):
+        for size in sizes or CASES[name][1]:
+            for count in iterations:
+                result = bench_case(name, size, count, warmup, seed=seed)
+                results.append(result)
+                if verbose:
+                    print(format_result(result))
+    return {'machine' : machine_info(), 'results' : results}
+
+
+def format_result(result):
+    return "%-13s size %-7d iterations %-5d %12.3e updates/s  p50 %8.3f ms  p99 %8.3f ms  peak %8.2f MB" % (
+        result['model'], result['size'], result['iterations'], result['updates_per_second'],
+        result['latency']['p50']*1000, result['latency']['p99']*1000, result['peak_bytes']/2**20)
+
+
+def save_results(suite, path):
+    with open(path, 'w') as f:
+        json.dump(suite, f, indent=1)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, tolerance=0.1):
+    """
+    Compares two suites of results, matched by model, size and iteration count
+    -------------
+    Parameters:
+        baseline, current = suites returned by run_suite (or load_results)
+        tolerance = relative loss of throughput or growth of peak memory flagged as a regression
+    -------------
+    Returns:
+        rows = list of dictionaries with the key, metric, baseline and current values,
+               relative change and whether it is a regression
+    """
+    def key(result):
+        return (result['model'], result['size'], result['iterations'])
+
+    old = {key(result) : result for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        if key(result) not in old:
+            continue
+        before = old[key(result)]
+        for metric, higher_is_better in [('updates_per_second', True), ('peak_bytes', False)]:
+            change = (result[metric] - before[metric])/before[metric] if before[metric] else 0.0
+            regression = -change > tolerance if higher_is_better else change > tolerance
+            rows.append({'key' : key(result), 'metric' : metric, 'baseline' : before[metric],
+                         'current' : result[metric], 'change' : change, 'regression' : regression})
+    return rows
+
+
+def _startup(args):
+    result = startup_time(args.module, args.repeat)
+    print("import %s: %.1f ms (median of %d)" % (result['module'], result['seconds']*1000, args.repeat))
+    if result['loaded']:
+        print("loaded at import: %s" % ', '.join(result['loaded']))
+    over = result['seconds'] > args.budget
+    if over:
+        print("over the budget of %.1f ms" % (args.budget*1000))
+    return 1 if over or result['loaded'] else 0
+
+
+def _run(args):
+    suite = run_suite(args.models, args.sizes, args.iterations, args.warmup, args.seed, verbose=True)
+    if args.output:
+        save_results(suite, args.output)
+    return 0
+
+
+def _compare(args):
+    rows = compare(load_results(args.baseline), load_results(args.current), args.tolerance)
+    for row in rows:
+        model, size, iterations = row['key']
+        print("%-13s size %-7d iterations %-5d %-18s %+7.1f%%%s" % (model, size, iterations, row['metric'],
+                                                               row['change']*100, '  REGRESSION' if row['regression'] else ''))
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m complexity_science.ca.benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    startup = commands.add_parser('startup', help='cold import time of the package')
+    startup.add_argument('--module', default='complexity_science.ca')
+    startup.add_argument('--repeat', type=int, default=5)
+    startup.add_argument('--budget', type=float, default=0.25, help='import time budget in seconds')
+    startup.set_defaults(run=_startup)
+
+    run = commands.add_parser('run', help='throughput, latency and peak memory of the models')
+    run.add_argument('--models', nargs='+', choices=list(CASES))
+    run.add_argument('--sizes', nargs='+', type=int, help='sizes used for every model')
+    run.add_argument('--iterations', nargs='+', type=int, default=[10, 100])
+    run.add_argument('--warmup', type=int, default=2)
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--output', help='JSON file of the results')
+    run.set_defaults(run=_run)
+
+    comparison = commands.add_parser('compare', help='flags regressions against a baseline')
+    comparison.add_argument('baseline', help='JSON file of the baseline results')
+    comparison.add_argument('current', help='JSON file of the current results')
+    comparison.add_argument('--tolerance', type=float, default=0.1)
+    comparison.set_defaults(run=_compare)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
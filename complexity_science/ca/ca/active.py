@@ -0,0 +1,119 @@
+import numpy as np
+
+
+class ActiveSet:
+    def __init__(self, cells, neighborhood_class, toroidal=True, tile=32, threshold=0.25):
+        """
+        Change-tracking evolution of a 2D lattice.
+
+        The lattice is split into tile x tile blocks. A cell can only change if a cell
+        of its neighborhood changed in the previous step, so only the tiles that changed
+        and the tiles next to them are recomputed; every other tile is left untouched.
+        Active tiles are gathered with a one cell halo into one (n, tile+2, tile+2)
+        stack and the rules are applied to the whole stack at once. When more than
+        threshold of the tiles are active a dense step is done instead.
+
+        Only valid for rules whose next state is a deterministic function of the
+        current neighborhood (rule.local and rule.deterministic).
+
+        The state lives in a padded, tile aligned array; cells is a view of it that
+        is updated in place.
+        -------------
+        Parameters:
+            cells = initial 2D state
+            neighborhood_class = MooreNeighborhood or VonNeumannNeighborhood
+            toroidal = periodic boundaries if True, fixed zero boundaries otherwise
+            tile = side of a tile in cells
+            threshold = fraction of active tiles above which a dense step is done
+        """
+        self.neighborhood_class = neighborhood_class
+        self.toroidal = toroidal
+        self.tile = tile
+        self.threshold = threshold
+
+        self.height, self.width = cells.shape
+        self.tiles = (-(-self.height//tile), -(-self.width//tile))
+        self.ext = np.zeros([self.tiles[0]*tile+2, self.tiles[1]*tile+2], dtype=cells.dtype)
+        self.cells = self.ext[1:self.height+1, 1:self.width+1]
+        self.cells[...] = cells
+        self._refresh_halo()
+
+        #nothing is known about the previous step, so every tile is active
+        self.active = np.ones(self.tiles, dtype=bool)
+        self.dense_steps = 0
+        self.sparse_steps = 0
+
+    @property
+    def activity(self):
+        """
+        Fraction of the tiles that will be recomputed in the next step
+        """
+        return self.active.mean()
+
+    def _refresh_halo(self):
+        if not self.toroidal:
+            return
+        h, w = self.height, self.width
+        self.ext[0, 1:w+1] = self.ext[h, 1:w+1]
+        self.ext[h+1, 1:w+1] = self.ext[1, 1:w+1]
+        self.ext[:h+2, 0] = self.ext[:h+2, w]
+        self.ext[:h+2, w+1] = self.ext[:h+2, 1]
+
+    def _dilate(self, changed):
+        """
+        Marks the changed tiles and their eight neighboring tiles
+        """
+        padded = np.pad(changed, 1, mode='wrap' if self.toroidal else 'constant')
+        active = np.zeros_like(changed)
+        rows, cols = changed.shape
+        for dy in range(3):
+            for dx in range(3):
+                active |= padded[dy:dy+rows, dx:dx+cols]
+        return active
+
+    def step(self, rm):
+        """
+        Evolves the lattice one step with the rules of a RuleManager
+        -------------
+        Returns:
+            cells = the updated state (a view, updated in place on the next step)
+        """
+        ty, tx = np.nonzero(self.active)
+        if len(ty) > self.threshold*self.active.size:
+            changed = self._dense_step(rm)
+        elif len(ty):
+            changed = self._tile_step(rm, ty, tx)
+        else:
+            changed = self.active
+
+        self.active = self._dilate(changed)
+        return self.cells
+
+    def _dense_step(self, rm):
+        self.dense_steps += 1
+        new_state = rm.apply(self.cells, self.neighborhood_class(self.cells, toroidal=self.toroidal))
+
+        diff = np.zeros([self.tiles[0]*self.tile, self.tiles[1]*self.tile], dtype=bool)
+        np.not_equal(new_state, self.cells, out=diff[:self.height, :self.width])
+        self.cells[...] = new_state
+        self._refresh_halo()
+        return diff.reshape(self.tiles[0], self.tile, self.tiles[1], self.tile).any(axis=(1, 3))
+
+    def _tile_step(self, rm, ty, tx):
+        self.sparse_steps += 1
+        t = self.tile
+        span = np.arange(t+2)
+        rows = (ty*t)[:, None] + span
+        cols = (tx*t)[:, None] + span
+        block = self.ext[rows[:, :, None], cols[:, None, :]]
+
+        #the halo of a block is only read, its interior is the new state of the tile
+        new_state = rm.apply(block, self.neighborhood_class(block, toroidal=False))[:, 1:-1, 1:-1]
+        valid = (rows[:, 1:-1, None] <= self.height) & (cols[:, None, 1:-1] <= self.width)
+        new_state = np.where(valid, new_state, 0)
+
+        changed = np.zeros(self.tiles, dtype=bool)
+        changed[ty, tx] = (new_state != block[:, 1:-1, 1:-1]).any(axis=(1, 2))
+        self.ext[rows[:, 1:-1, None], cols[:, None, 1:-1]] = new_state
+        self._refresh_halo()
+        return changed
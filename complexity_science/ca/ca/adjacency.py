@@ -0,0 +1,147 @@
+import numpy as np
+
+from .buffers import BufferPool
+
+
+class Adjacency:
+    def __init__(self, indptr, indices, weights=None, num_nodes=None):
+        """
+        Sparse (CSR) adjacency of a network: the neighbors of node i are
+            indices[indptr[i]:indptr[i+1]]
+        with optional edge weights in the same order.
+        ---------------
+        Parameters:
+            indptr = row pointer array of length num_nodes+1
+            indices = column index of every edge
+            weights = weight of every edge, None for an unweighted network
+            num_nodes = number of nodes, default is len(indptr)-1
+        """
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.weights = None if weights is None else np.asarray(weights, dtype=float)
+        self.num_nodes = len(self.indptr)-1 if num_nodes is None else num_nodes
+
+        #source node of every edge
+        self.rows = np.repeat(np.arange(self.num_nodes), np.diff(self.indptr))
+        self._degree = None
+        self._plans = {}
+        self.buffers = BufferPool()
+
+    @classmethod
+    def from_edges(cls, edges, num_nodes=None, weights=None, directed=False):
+        """
+        Builds the adjacency from an edge list
+        ---------------
+        Parameters:
+            edges = array of shape (E, 2) of (source, target) pairs
+            num_nodes = number of nodes, default is the largest index + 1
+            weights = weight of every edge
+            directed = if False, every edge is added in both directions
+        """
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        source, target = edges[:, 0], edges[:, 1]
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float)
+        if not directed:
+            source, target = np.concatenate([source, target]), np.concatenate([target, source])
+            if weights is not None:
+                weights = np.concatenate([weights, weights])
+        if num_nodes is None:
+            num_nodes = int(edges.max())+1 if len(edges) else 0
+
+        order = np.lexsort((target, source))
+        indptr = np.zeros(num_nodes+1, dtype=np.int64)
+        np.cumsum(np.bincount(source, minlength=num_nodes), out=indptr[1:])
+        return cls(indptr, target[order], None if weights is None else weights[order], num_nodes)
+
+    @classmethod
+    def from_dense(cls, matrix):
+        """
+        Builds the adjacency from a dense adjacency matrix
+        """
+        matrix = np.asarray(matrix)
+        rows, cols = np.nonzero(matrix)
+        weights = matrix[rows, cols]
+        if np.all(weights == 1):
+            weights = None
+        indptr = np.zeros(len(matrix)+1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(matrix)), out=indptr[1:])
+        return cls(indptr, cols, weights, len(matrix))
+
+    @classmethod
+    def convert(cls, adj):
+        """
+        Converts any supported network description to an Adjacency:
+            Adjacency, scipy.sparse matrix, (indptr, indices[, weights]) tuple or dense matrix
+        """
+        if isinstance(adj, cls):
+            return adj
+        if hasattr(adj, 'tocsr'):
+            csr = adj.tocsr()
+            weights = None if np.all(csr.data == 1) else csr.data
+            return cls(csr.indptr, csr.indices, weights, csr.shape[0])
+        if isinstance(adj, tuple):
+            return cls(*adj)
+        return cls.from_dense(adj)
+
+    def __len__(self):
+        return self.num_nodes
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def degree(self):
+        """
+        Returns:
+            degree = (weighted) number of neighbors of every node
+        """
+        if self._degree is None:
+            if self.weights is None:
+                self._degree = np.diff(self.indptr).astype(float)
+            else:
+                self._degree = np.bincount(self.rows, weights=self.weights, minlength=self.num_nodes)
+        return self._degree
+
+    def neighbor_sum(self, x, transpose=False):
+        """
+        Sparse matrix-vector product over the last axis of x
+            y[..., i] = sum over edges (i, j) of weight * x[..., j]
+        With transpose=True every node j instead sends weight * x[..., j] to its neighbors i.
+        ---------------
+        Parameters:
+            x = node values of shape (..., num_nodes)
+        ---------------
+        Returns:
+            y = aggregated values with the same shape as x
+        """
+        x = np.asarray(x)
+        flat = x.reshape(-1, self.num_nodes).astype(float, copy=False)
+
+        #the rows of x are laid end to end and every edge adds to its target in row k,
+        #target + k*num_nodes, so one bincount aggregates every row at once
+        key = (transpose, len(flat))
+        plan = self._plans.get(key)
+        if plan is None:
+            source, target, weights = (self.rows, self.indices, self.weights) if transpose else (self.indices, self.rows, self.weights)
+            plan = self._plans[key] = (source, (target + self.num_nodes*np.arange(len(flat))[:, None]).ravel(), weights)
+        source, target, weights = plan
+
+        values = self.buffers.get('values', (len(flat), len(source)), np.float64)
+        np.take(flat, source, axis=1, out=values)
+        if weights is not None:
+            values *= weights
+        return np.bincount(target, weights=values.ravel(), minlength=flat.size).astype(float, copy=False).reshape(x.shape)
+
+    def neighbor_mean(self, x):
+        """
+        Degree-normalized neighbor sum; nodes without neighbors get 0
+        """
+        degree = self.degree()
+        total = self.neighbor_sum(x)
+        return np.divide(total, degree, out=np.zeros_like(total), where=degree > 0)
+
+    def to_dense(self):
+        matrix = np.zeros([self.num_nodes, self.num_nodes])
+        matrix[self.rows, self.indices] = 1 if self.weights is None else self.weights
+        return matrix
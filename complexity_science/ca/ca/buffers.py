@@ -0,0 +1,42 @@
+import numpy as np
+
+
+class BufferPool:
+    def __init__(self):
+        """
+        Named scratch arrays that are reused between calls.
+        A buffer is only reallocated when the requested shape or dtype changes.
+        """
+        self.buffers = {}
+
+    def get(self, name, shape, dtype):
+        """
+        Parameters:
+            name = name of the scratch array
+            shape = shape of the scratch array
+            dtype = dtype of the scratch array
+        -------------
+        Returns:
+            buffer = uninitialized array with the given shape and dtype
+        """
+        dtype = np.dtype(dtype)
+        key = (name, dtype.str)
+        buffer = self.buffers.get(key)
+        if buffer is None or buffer.shape != tuple(shape):
+            buffer = np.empty(shape, dtype=dtype)
+            self.buffers[key] = buffer
+        return buffer
+
+    def clear(self):
+        self.buffers = {}
+
+
+def default_generator(rule):
+    """
+    Returns the numpy Generator used by a rule's apply_into.
+    If the rule has no rng yet, one is seeded from the legacy np.random state
+    so np.random.seed keeps runs reproducible.
+    """
+    if getattr(rule, 'rng', None) is None:
+        rule.rng = np.random.default_rng(np.random.randint(2**31))
+    return rule.rng
@@ -1,15 +1,20 @@
 import numpy as np
-import matplotlib.pyplot as plt
 
 from .rule_manager import RuleManager
+from .data_collector import DataCollector
+from .profiler import Profiled
+from .dtypes import as_state
+from .cycle import run_until_cycle
+from .neighborhood import Neighborhood1D
 
-class CA1D():
-    def __init__(self, N):
+class CA1D(Profiled):
+    def __init__(self, N, dtype=None):
         """
         Creates an uninitialized 1D cellular automata object with length N
         -------------
         Parameters:
             N = number of cells
+            dtype = dtype of the states, honored by every initialize_ function (None keeps numpy's defaults)
             n1 : left neighbor
             n2 : right neighbor
         ------------- 
@@ -17,8 +22,11 @@ class CA1D():
             None
         """
         self.num_cells = N
-        self.cells = np.zeros([N])
+        self.dtype = dtype
+        self.cells = as_state(np.zeros([N]), dtype)
         self.rm = RuleManager() 
+        self.buffered = False
+        self._back = None
         self.update_neighbors()
 
     def update_neighbors(self):
@@ -27,6 +35,31 @@ class CA1D():
         """
         raise NotImplementedError("This is the base 1D CA class; please use a CA with predetermined neighborhood; SimpleCA, CA_nt, CA_t.")
 
+    def _neighbor_buffers(self):
+        """
+        Returns the left and right neighbor arrays to be filled.
+        They are reused in buffered mode and newly allocated otherwise.
+        """
+        neighbors = getattr(self, 'neighbors', {})
+        left = neighbors.get('left')
+        if self.buffered and left is not None and left.shape == self.cells.shape and left.dtype == self.cells.dtype:
+            return left, neighbors['right']
+        return np.empty_like(self.cells), np.empty_like(self.cells)
+
+    def use_buffers(self, enable=True):
+        """
+        Evolves the CA in a pair of model-owned ping-pong buffers when every rule implements
+            rule.apply_into(out, current, neighbors)
+        so that a long run does no steady-state allocation.
+
+        The array returned by evolve() is reused two steps later; copy it to keep it.
+        -------------
+        Parameters:
+            enable = True to use the buffers, False to allocate a new state every step
+        """
+        self.buffered = enable
+        self._back = None
+
     def set_rule(self, rule_object):
         """
         Sets the CA rule to a wolfram rule number
@@ -52,11 +85,20 @@ class CA1D():
         Returns:
             new_state = new state after applying the rule  
         """
-        new_state = self.rm.apply(self.cells, self.neighbors)
+        return self._profiled('evolve', self._evolve)
+
+    def _evolve(self):
+        if self.buffered and self.rm.supports_apply_into():
+            if self._back is None or self._back.shape != self.cells.shape or self._back.dtype != self.cells.dtype:
+                self._back = np.empty_like(self.cells)
+            new_state = self.rm.apply_into(self._back, self.cells, self.neighbors)
+            self._back = self.cells
+        else:
+            new_state = self.rm.apply(self.cells, self.neighbors)
         self.cells = new_state
 
         #Dont forget to update neighbors after evolution
-        self.update_neighbors()
+        self._profiled('update_neighbors', self.update_neighbors)
 
         return new_state
 
@@ -74,7 +116,7 @@ class CA1D():
             None : Updates the cell with initialized values
         """
         assert(type(index_list)==type([])), "index_list must be a list"
-        self.cells = np.zeros([self.num_cells], dtype=int)
+        self.cells = np.zeros([self.num_cells], dtype=self.dtype or int)
         for i in index_list:
             self.cells[i] = 1
 
@@ -92,7 +134,7 @@ class CA1D():
         Returns:
             None : Updates the cell with initialized values
         """
-        self.cells = (np.random.random(self.num_cells)>ratio).astype(int) 
+        self.cells = as_state((np.random.random(self.num_cells)>ratio).astype(int), self.dtype)
         self.update_neighbors()
 
     def reset(self):
@@ -102,7 +144,7 @@ class CA1D():
         Returns:
             None : Updates the cells to zero values
         """
-        self.cells = np.zeros(self.num_cells)
+        self.cells = as_state(np.zeros(self.num_cells), self.dtype)
         self.update_neighbors()
 
     def initialize_random(self):
@@ -114,31 +156,100 @@ class CA1D():
         Returns:
             None : Updates the cell with initialized values
         """
-        self.cells = np.random.random(self.num_cells) 
+        self.cells = as_state(np.random.random(self.num_cells), self.dtype)
+        self.update_neighbors()
+
+    def initialize_random_int(self, min_value, max_value):
+        """
+        Initializes the ca randomly with integers from min_value to max_value (exclusive)
+
+        Automatically updates neighbors after initialization
+        -------------
+        Parameters:
+            min_value: lowest possible integer state
+            max_value: highest possible integer state
+        -------------
+        Returns:
+            None : Updates the cell with initialized values
+        """
+        self.cells = as_state(np.random.randint(min_value, max_value, size=self.num_cells), self.dtype)
         self.update_neighbors()
 
-    def run(self, iterations, show_figure=True):
+    def run(self, iterations, show_figure=True, out=None, path=None, dtype=None):
         """
         Run cellular automata according to the wolfram rule_number assigned.
+        The space-time diagram is written row by row into one preallocated array,
+        so a disk-backed run never holds more than the current state in memory.
         -------------
         Parameters:
             iterations = number of times for the rule to be applied
-            show_figure = Default is True, outputs the figure at run time
+            show_figure = Default is True, outputs the figure at run time (matplotlib is only imported if True)
+            out = array of shape (iterations+1, N) that receives the evolution
+            path = if given (and out is not), the evolution is written to a np.memmap at this file
+            dtype = dtype of the allocated array or memmap, default is the cell dtype (wolfram
+                    models use uint8). States are cast to it, so it must hold every state of the rule
         -------------
         Returns:
-            result = resulting N x iteration array of the CA evolution
+            result = (iterations+1) x N array of the CA evolution (out or the memmap if given)
         """
-        result = [self.cells]
+        shape = (iterations+1, len(self.cells))
+        if out is not None:
+            assert(out.shape == shape), "out must have shape %s" % (shape,)
+            result = out
+        elif path is not None:
+            result = np.memmap(path, dtype=dtype or self.cells.dtype, mode='w+', shape=shape)
+        else:
+            result = np.empty(shape, dtype=dtype or self.cells.dtype)
+
+        result[0] = self.cells
         for i in range(iterations):
-            result.append(self.evolve())
+            result[i+1] = self.evolve()
+
+        if isinstance(result, np.memmap):
+            result.flush()
 
         if show_figure:
+            import matplotlib.pyplot as plt
             plt.imshow(result, cmap='Greens')
             plt.show()
-        
-        plt.clf()
+            plt.clf()
+
         return result
         
+    def run_collect(self, iteration, steady_state=False, collector = {'mean':np.average}, memory_budget=None, spill_dir=None,
+                    detect_cycles=False, extrapolate=False, cycle_window=1024):
+        """
+        Run evolution according to the number of iteration
+        -------------
+        Parameters:
+            iteration = number of iteration
+            collector = data reduction (sum, mean, max, min, std, etc)
+            memory_budget = bytes of collected data kept in memory before spilling to disk (see DataCollector)
+            spill_dir = directory of the spilled data
+            detect_cycles = stop as soon as a state repeats (deterministic rules only, see run_until_cycle);
+                            the transient length and period are stored in self.cycle
+            extrapolate = with detect_cycles, fill the remaining rows from the detected cycle
+            cycle_window = number of past state hashes compared against
+        """
+        dc = self._collector(DataCollector(collector, 1 if steady_state else iteration, memory_budget, spill_dir))
+        self.cycle = None
+
+        if detect_cycles:
+            self.cycle = run_until_cycle(self, dc, iteration, steady_state, extrapolate, cycle_window)
+            if not steady_state:
+                dc.data_to_pd()
+        elif steady_state:
+            for i in range(iteration):
+                result = self.evolve()
+            dc.collect(result)
+        else:
+            for i in range(iteration):
+                result = self.evolve()
+                dc.collect(result)
+            dc.data_to_pd()
+
+        return dc.data
+
     def add_rule(self, rule_object):
         """
         Add the rule object to the rule manager.
@@ -153,8 +264,8 @@ class CA1D():
         self.rm.reset_rule()
 
 class SimpleCA(CA1D):
-    def __init__(self, N):
-        CA1D.__init__(self, N)
+    def __init__(self, N, dtype=None):
+        CA1D.__init__(self, N, dtype)
         self.neighborhood = "No neighbors are automatically considered"
 
     def update_neighbors(self):
@@ -164,8 +275,8 @@ class SimpleCA(CA1D):
         pass
 
 class CA_t(CA1D):
-    def __init__(self, N):
-        CA1D.__init__(self, N)
+    def __init__(self, N, dtype=None):
+        CA1D.__init__(self, N, dtype)
         self.neighborhood = "Two neighbors (left and right) are automatically considered"
 
     def update_neighbors(self):
@@ -177,13 +288,19 @@ class CA_t(CA1D):
         Returns:
             None
         """
+        left, right = self._neighbor_buffers()
+        left[1:] = self.cells[:-1]
+        left[0] = self.cells[-1]
+        right[:-1] = self.cells[1:]
+        right[-1] = self.cells[0]
+
         self.neighbors = {}
-        self.neighbors['left'] = np.roll(self.cells, 1)
-        self.neighbors['right'] = np.roll(self.cells, -1)
+        self.neighbors['left'] = left
+        self.neighbors['right'] = right
 
 class CA_nt(CA1D):
-    def __init__(self, N):
-        CA1D.__init__(self, N)
+    def __init__(self, N, dtype=None):
+        CA1D.__init__(self, N, dtype)
         self.neighborhood = "Two neighbors (left and right) are automatically considered with non toroidal boundaries"
 
     def update_neighbors(self):
@@ -195,10 +312,37 @@ class CA_nt(CA1D):
         Returns:
             None
         """
-        self.neighbors = {}
-        left = np.roll(self.cells, 1)
+        left, right = self._neighbor_buffers()
+        left[1:] = self.cells[:-1]
         left[0] = 0
-        right = np.roll(self.cells, -1)
+        right[:-1] = self.cells[1:]
         right[-1] = 0
+
+        self.neighbors = {}
         self.neighbors['left'] = left 
         self.neighbors['right'] = right 
+
+class CA_r(CA1D):
+    def __init__(self, N, radius=1, toroidal=True, dtype=None):
+        """
+        1D CA whose neighborhood is the 2r+1 cells around every cell (see Neighborhood1D)
+        -------------
+        Parameters:
+            N = number of cells
+            radius = radius r of the neighborhood
+            toroidal = periodic boundaries if True, fixed zero boundaries otherwise
+            dtype = dtype of the states
+        """
+        self.radius = radius
+        self.toroidal = toroidal
+        CA1D.__init__(self, N, dtype)
+        self.neighborhood = "Neighbors within radius %d are automatically considered%s" % (radius, "" if toroidal else " with non toroidal boundaries")
+
+    def update_neighbors(self):
+        """
+        Points the neighborhood to the current cells; windows are read lazily
+        """
+        if isinstance(getattr(self, 'neighbors', None), Neighborhood1D):
+            self.neighbors.update(self.cells)
+        else:
+            self.neighbors = Neighborhood1D(self.cells, self.radius, self.toroidal)
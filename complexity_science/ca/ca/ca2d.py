@@ -1,17 +1,23 @@
+import warnings
+
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
 from .rule_manager import RuleManager
 from .data_collector import DataCollector
+from .profiler import Profiled
+from .neighborhood import Neighborhood, MooreNeighborhood, VonNeumannNeighborhood, RadiusNeighborhood, KernelNeighborhood
+from .active import ActiveSet
+from .dtypes import as_state
+from .cycle import run_until_cycle
 
 
-class CA2D:
-    def __init__(self, dim):
+class CA2D(Profiled):
+    def __init__(self, dim, dtype=None):
         """
-        Creates an 2D cellular automata object of a given dimension with random value from 0-1. See related initialize_ functions to initialize properly.
+        Creates an 2D cellular automata object of a given dimension with random value from 0-1 (zeros for integer dtypes). See related initialize_ functions to initialize properly.
         ---------------
         Parameters:
             dim = cellular automata matrix shape
+            dtype = dtype of the states, honored by every initialize_ function (None keeps numpy's defaults)
 
         Attributes
         n1 = left-top neighbor of new_state
@@ -27,13 +33,85 @@ class CA2D:
             None
         """
         self.size = dim
-        self.cells = np.random.random(dim)
+        self.dtype = dtype
+        if dtype is None or np.dtype(dtype).kind == 'f':
+            self.cells = as_state(np.random.random(dim), dtype)
+        else:
+            self.cells = np.zeros(dim, dtype=dtype)
         self.rm = RuleManager()
+        self.buffered = False
+        self._back = None
+        self.active_set = None
+        self._active = None
+        self.threaded = None
         self.update_neighbors()
 
     def update_neighbors(self):
         raise NotImplementedError("This is the base class; Please choose a CA with defined neighborhood:\n VON_CA_t, VON_CA, MOORE_CA_t, MOORE_CA")
 
+    def _update_neighborhood(self, neighborhood_class, toroidal):
+        if self.buffered and type(getattr(self, 'neighbors', None)) is neighborhood_class:
+            self.neighbors.update(self.cells)
+        else:
+            self.neighbors = neighborhood_class(self.cells, toroidal=toroidal)
+
+    def use_buffers(self, enable=True):
+        """
+        Evolves the CA in a pair of model-owned ping-pong buffers when every rule implements
+            rule.apply_into(out, current, neighbors)
+        so that a long run does no steady-state allocation.
+
+        The array returned by evolve() is reused two steps later; copy it to keep it.
+        -------------
+        Parameters:
+            enable = True to use the buffers, False to allocate a new state every step
+        """
+        self.buffered = enable
+        self._back = None
+
+    def _back_buffer(self):
+        if self._back is None or self._back.shape != self.cells.shape or self._back.dtype != self.cells.dtype:
+            self._back = np.empty_like(self.cells)
+        return self._back
+
+    def use_threads(self, enable=True, threads=None, tile_rows=None):
+        """
+        Evolves the CA in row tiles on a thread pool (see ThreadedTiles).
+        Only used while every rule declares rule.local = True and rule.deterministic = True
+        (next state of a cell is a function of its current neighborhood only), so threaded
+        results are identical to serial ones. Stochastic rules (Applause, ForestFire) and rules
+        that read the whole lattice (MPA) are excluded and applied to the whole lattice on the
+        calling thread: tile draws would depend on the order the threads run in.
+        With use_buffers, the tiles are written into the back buffer instead of a new array.
+        The pool is shut down by use_threads(False) or when the model is garbage collected.
+        -------------
+        Parameters:
+            enable = True to use threads, False to evolve on the calling thread
+            threads = number of threads, default is every core
+            tile_rows = rows per tile, default is chosen from the cache size
+        """
+        if self.threaded is not None:
+            self.threaded.close()
+        from .tiles import ThreadedTiles
+        self.threaded = ThreadedTiles(threads, tile_rows) if enable else None
+
+    def use_active_set(self, enable=True, tile=32, threshold=0.25):
+        """
+        Recomputes only the tiles that changed in the previous step and their neighbors,
+        falling back to a dense step when more than threshold of the tiles are active (see ActiveSet).
+        Results are identical to dense stepping.
+
+        Every rule must declare rule.local = True and rule.deterministic = True (next state
+        of a cell is a function of its current neighborhood only). The array returned by evolve() is updated in place.
+        -------------
+        Parameters:
+            enable = True to track changes, False to step densely
+            tile = side of a tile in cells
+            threshold = fraction of active tiles above which a dense step is done
+        """
+        self.active_set = {'tile' : tile, 'threshold' : threshold} if enable else None
+        self._active = None
+
     def evolve(self):
         """
         Evolves the CA according to the rule applied.
@@ -54,13 +132,65 @@ class CA2D:
         Returns:
             new_state = new state after applying the rule  
         """
-        new_state = self.rm.apply(self.cells, self.neighbors)
+        return self._profiled('evolve', self._evolve)
+
+    def _evolve(self):
+        if self.active_set is not None:
+            return self._evolve_active()
+
+        if self.threaded is not None and isinstance(self.neighbors, Neighborhood) and all(getattr(rule, 'local', False) and getattr(rule, 'deterministic', False) for rule in self.rm.rules):
+            new_state = self.threaded.apply(self.rm, self.cells, self.neighbors, self._back_buffer() if self.buffered else None)
+            if self.buffered:
+                self._back = self.cells
+        elif self.buffered and self.rm.supports_apply_into():
+            new_state = self.rm.apply_into(self._back_buffer(), self.cells, self.neighbors)
+            self._back = self.cells
+        else:
+            new_state = self.rm.apply(self.cells, self.neighbors)
         self.cells = new_state
 
         #Dont forget to update neighbors after evolution
-        self.update_neighbors()
+        self._profiled('update_neighbors', self.update_neighbors)
         return new_state
 
+    def run_decomposed(self, iterations, processes=None, seed=None):
+        """
+        Evolves the CA a number of iterations split over worker processes (see DecomposedCA2D).
+        Rules that do not declare rule.local = True may read the whole lattice, which a
+        strip does not see, so they are evolved on the calling process with a warning.
+        -------------
+        Parameters:
+            iterations = number of iteration
+            processes = number of worker processes, default is every core
+            seed = seed of the worker random streams (stochastic rules only)
+        -------------
+        Returns:
+            cells = the final state
+        """
+        if not all(getattr(rule, 'local', False) for rule in self.rm.rules):
+            warnings.warn("Rules without rule.local = True cannot be decomposed into strips; evolving on one process")
+            for i in range(iterations):
+                self.evolve()
+            return self.cells
+
+        from .decomposed import DecomposedCA2D
+        with DecomposedCA2D(self, processes, seed) as runner:
+            self.cells = runner.run(iterations).copy()
+        self.update_neighbors()
+        return self.cells
+
+    def _evolve_active(self):
+        assert(all(getattr(rule, 'local', False) and getattr(rule, 'deterministic', False) for rule in self.rm.rules)), "Active set evolution needs local and deterministic rules"
+        assert(isinstance(self.neighbors, Neighborhood) and self.cells.ndim == 2), "Active set evolution needs a single Moore or Von Neumann CA"
+
+        #cells assigned from outside restart the change tracking
+        if self._active is None or self._active.cells is not self.cells:
+            self._active = ActiveSet(self.cells, type(self.neighbors), self.neighbors.toroidal, **self.active_set)
+
+        self.cells = self._active.step(self.rm)
+        self.neighbors.update(self.cells)
+        return self.cells
+
     def initialize_random_bin(self, ratio):
         """
         Initializes the ca randomly with a approximated ratio of 1s and 0s 
@@ -70,7 +200,7 @@ class CA2D:
         Returns:
             None : Updates the cell with initialized values
         """
-        self.cells = (ratio > np.random.random(self.size)).astype(int) 
+        self.cells = as_state((ratio > np.random.random(self.size)).astype(int), self.dtype)
         self.update_neighbors()
 
     def initialize_random(self):
@@ -82,7 +212,7 @@ class CA2D:
         Returns:
             None : Updates the cell with initialized values
         """
-        self.cells = np.random.random(self.size)
+        self.cells = as_state(np.random.random(self.size), self.dtype)
         self.update_neighbors()
 
     def initialize_zero(self):
@@ -93,7 +223,7 @@ class CA2D:
         Returns:
             None : Updates the cell with initialized values
         """
-        self.cells = np.zeros(self.size)
+        self.cells = np.zeros(self.size, dtype=self.dtype)
         self.update_neighbors()
 
     def initialize_index(self, tuple_index, value):
@@ -108,8 +238,8 @@ class CA2D:
         Returns:
             None : Updates the cell with initialized values
         """
-        self.cells = np.zeros(self.size)
-        self.cells[index] = value
+        self.cells = np.zeros(self.size, dtype=self.dtype)
+        self.cells[tuple_index] = as_state(value, self.dtype)
         self.update_neighbors()
  
     def initialize_random_int(self, min_value, max_value):
@@ -127,7 +257,7 @@ class CA2D:
         Returns:
             None : Updates the cell with initialized values
         """
-        self.cells = np.random.randint(min_value, max_value, size=self.size)  
+        self.cells = as_state(np.random.randint(min_value, max_value, size=self.size), self.dtype)
         self.update_neighbors()
         
     def set_rule(self, rule_object):
@@ -170,17 +300,29 @@ class CA2D:
         """
         self.rm.modify_rule(**kwargs)
     
-    def run_collect(self, iteration, steady_state=False, collector = {'mean':np.average}):
+    def run_collect(self, iteration, steady_state=False, collector = {'mean':np.average}, memory_budget=None, spill_dir=None,
+                    detect_cycles=False, extrapolate=False, cycle_window=1024):
         """
         Run evolution according to the number of iteration
         -------------
         Parameters:
             iteration = number of iteration
             collector = data reduction (sum, mean, max, min, std, etc)
+            memory_budget = bytes of collected data kept in memory before spilling to disk (see DataCollector)
+            spill_dir = directory of the spilled data
+            detect_cycles = stop as soon as a state repeats (deterministic rules only, see run_until_cycle);
+                            the transient length and period are stored in self.cycle
+            extrapolate = with detect_cycles, fill the remaining rows from the detected cycle
+            cycle_window = number of past state hashes compared against
         """
-        dc = DataCollector(collector)
-
-        if steady_state:
+        dc = self._collector(DataCollector(collector, 1 if steady_state else iteration, memory_budget, spill_dir))
+        self.cycle = None
+
+        if detect_cycles:
+            self.cycle = run_until_cycle(self, dc, iteration, steady_state, extrapolate, cycle_window)
+            if not steady_state:
+                dc.data_to_pd()
+        elif steady_state:
             for i in range(iteration):
                 result = self.evolve()
             dc.collect(result)
@@ -192,147 +334,162 @@ class CA2D:
 
         return dc.data
 
-    def animate(self, num_frames='all', cmap='plasma', savefig=False, writer=animation.writers['ffmpeg']):
+    def animate(self, num_frames='all', cmap='plasma', savefig=False, writer=None):
         """
         Run animation
         ------------
         Parameters
             Animation parameters
+            writer = matplotlib movie writer used with savefig, default is ffmpeg
         """
+        import matplotlib.pyplot as plt
+        import matplotlib.animation as animation
         fig = plt.figure()
         self.im = plt.imshow(self.cells, cmap=cmap, animated=True)
 
+        from .frames import FrameProducer
+
+        #the simulation runs ahead on a producer thread, the figure only draws
+        self._producer = FrameProducer(self, None if num_frames=='all' else num_frames)
         if num_frames=='all':
             ani = animation.FuncAnimation(fig, self._update_fig, interval=100, blit=True)
             plt.show()
         else:
             ani = animation.FuncAnimation(fig, self._update_fig, interval=100, blit=True, frames=num_frames, repeat=False)
             plt.show()
+        self._producer.stop()
+        self._producer = None
 
         if savefig:
-            ani.save('Animation.mp4', writer=writer)
+            ani.save('Animation.mp4', writer=writer or animation.writers['ffmpeg'])
 	
     def jyp_anim(self, cmap='plasma'):
+        import matplotlib.pyplot as plt
+        import matplotlib.animation as animation
         fig = plt.figure()
         self.im = plt.imshow(self.cells, cmap=cmap, animated=True)
         anim = animation.FuncAnimation(fig, self._update_fig, interval=100, blit=True)
         return anim
 
     def _update_fig(self, *args):
-        self.im.set_array(self.evolve())
+        producer = getattr(self, '_producer', None)
+        frame = producer.get() if producer is not None else None
+        self.im.set_array(frame if frame is not None else self.evolve())
         return self.im,
 
+    def export_frames(self, target, frames, skip=1, downsample=1, cmap='plasma', vmin=None, vmax=None, fps=10):
+        """
+        Renders the evolution to a file on a headless pipeline (see frames.export_frames)
+        -------------
+        Parameters:
+            target = '.raw' file, '%d' pattern of '.png' files, video file for ffmpeg or a sink object
+            frames = number of frames
+            skip = number of evolve() calls per frame
+            downsample = keep every downsample-th row and column
+            cmap, vmin, vmax = colors (default range is the one of the first frame)
+            fps = frames per second of a video
+        -------------
+        Returns:
+            count = number of frames written
+        """
+        from .frames import export_frames
+        return export_frames(self, target, frames, skip, downsample, cmap, vmin, vmax, fps)
+
+
+class RadiusCA(CA2D):
+    def __init__(self, dim, radius=1, shape='moore', toroidal=True, dtype=None):
+        """
+        2D CA with a radius-r Moore or Von Neumann neighborhood read from
+        summed-area tables (see RadiusNeighborhood)
+        -------------
+        Parameters:
+            dim = cellular automata matrix shape
+            radius = radius r of the neighborhood
+            shape = 'moore' or 'von_neumann'
+            toroidal = periodic boundaries if True, fixed zero boundaries otherwise
+            dtype = dtype of the states
+        """
+        self.radius = radius
+        self.shape = shape
+        self.toroidal = toroidal
+        CA2D.__init__(self, dim, dtype)
+        self.neighborhood = "%s %s of radius %d" % ("Toroidal" if toroidal else "Non-toroidal",
+                                                    "Moore" if shape == 'moore' else "Von Neumann", radius)
+
+    def update_neighbors(self):
+        if isinstance(getattr(self, 'neighbors', None), RadiusNeighborhood):
+            self.neighbors.update(self.cells)
+        else:
+            self.neighbors = RadiusNeighborhood(self.cells, self.radius, self.shape, self.toroidal)
+
+
+class KernelCA(CA2D):
+    def __init__(self, dim, kernel, method='auto', dtype=None):
+        """
+        Toroidal 2D CA whose neighbors are weighted by a kernel (see KernelNeighborhood),
+        e.g. smooth Lenia kernels or wide dispersal kernels
+        -------------
+        Parameters:
+            dim = cellular automata matrix shape
+            kernel = 2D array of neighbor weights centered on the cell
+            method = 'direct', 'fft' or 'auto' (by the number of nonzero weights)
+            dtype = dtype of the states
+        """
+        self.kernel = np.asarray(kernel)
+        self.method = method
+        CA2D.__init__(self, dim, dtype)
+        self.neighborhood = "Toroidal kernel %dx%d" % self.kernel.shape
+
+    def update_neighbors(self):
+        if isinstance(getattr(self, 'neighbors', None), KernelNeighborhood):
+            self.neighbors.update(self.cells)
+        else:
+            self.neighbors = KernelNeighborhood(self.cells, self.kernel, self.method)
+
 
 class MooreCA_t(CA2D):
-    def __init__(self, dim):
-        CA2D.__init__(self, dim)
+    def __init__(self, dim, dtype=None):
+        CA2D.__init__(self, dim, dtype)
         self.neighborhood = "Toroidal Moore"
         print("You created a toroidal CA with Moore neighborhood")
 
     def update_neighbors(self):
-        n2 = np.roll(self.cells, 1, axis=0)
-        n1 = np.roll(n2, 1, axis=1)
-        n3 = np.roll(n2, -1, axis=1)
-        n4 = np.roll(self.cells, 1, axis=1)
-        n5 = np.roll(self.cells, -1, axis=1)
-        n7 = np.roll(self.cells, -1, axis=0)
-        n6 = np.roll(n7, 1, axis=1)
-        n8 = np.roll(n7, -1, axis=1)
-
-        self.neighbors = {}
-        self.neighbors['top-left'] = n1
-        self.neighbors['top'] = n2
-        self.neighbors['top-right'] = n3
-        self.neighbors['left'] = n4
-        self.neighbors['right'] = n5
-        self.neighbors['bottom-left'] = n6
-        self.neighbors['bottom'] = n7
-        self.neighbors['bottom-right'] = n8
+        self._update_neighborhood(MooreNeighborhood, toroidal=True)
 
 
 class VonCA_t(CA2D):
-    def __init__(self, dim):
-        CA2D.__init__(self, dim)
+    def __init__(self, dim, dtype=None):
+        CA2D.__init__(self, dim, dtype)
         self.neighborhood = "Toroidal Von Neumann"
         print("You created a toroidal CA with Von Neumann neighborhood")
 
     def update_neighbors(self):
-        self.neighbors = {}
-        self.neighbors['top'] = np.roll(self.cells, 1, axis=0)
-        self.neighbors['left'] = np.roll(self.cells, 1, axis=1)
-        self.neighbors['right'] = np.roll(self.cells, -1, axis=1)
-        self.neighbors['bottom'] = np.roll(self.cells, -1, axis=0)
+        self._update_neighborhood(VonNeumannNeighborhood, toroidal=True)
 
 
 class MooreCA(CA2D):
-    def __init__(self, dim):
-        CA2D.__init__(self, dim)
+    def __init__(self, dim, dtype=None):
+        CA2D.__init__(self, dim, dtype)
         self.neighborhood = "Non-toroidal Moore"
         print("You created a NON-Toroidal CA with Moore neighborhood")
 
     def update_neighbors(self):
-        n2 = np.roll(self.cells, 1, axis=0)
-        n2[0,:] = 0
-        n1 = np.roll(n2, 1, axis=1)
-        n1[0,:] = 0
-        n1[:,0] = 0
-        n3 = np.roll(n2, -1, axis=1)
-        n3[0,:] = 0
-        n3[:,-1] = 0
-
-        n4 = np.roll(self.cells, 1, axis=1)
-        n4[:,0] = 0
-        n5 = np.roll(self.cells, -1, axis=1)
-        n5[:,-1] = 0
-
-        n7 = np.roll(self.cells, -1, axis=0)
-        n7[-1,:] = 0
-        n7[:,0] = 0
-
-        n6 = np.roll(n7, 1, axis=1)
-        n6[-1,:] = 0
-
-        n8 = np.roll(n7, -1, axis=1)
-        n8[-1,:] = 0
-        n8[:,-1] = 0
-
-        self.neighbors = {}
-        self.neighbors['top-left'] = n1
-        self.neighbors['top'] = n2
-        self.neighbors['top-right'] = n3
-        self.neighbors['left'] = n4
-        self.neighbors['right'] = n5
-        self.neighbors['bottom-left'] = n6
-        self.neighbors['bottom'] = n7
-        self.neighbors['bottom-right'] = n8
+        self._update_neighborhood(MooreNeighborhood, toroidal=False)
 
 
 class VonCA(CA2D):
-    def __init__(self, dim):
-        CA2D.__init__(self, dim)
+    def __init__(self, dim, dtype=None):
+        CA2D.__init__(self, dim, dtype)
         self.neighborhood = "Non-toroidal Von Neumann"
         print("You created a NON-Toroidal CA with Von Neumann neighborhood")
 
     def update_neighbors(self):
-        n1 = np.roll(self.cells, 1, axis=0)
-        n1[0,:] = 0
-        n2 = np.roll(self.cells, 1, axis=1)
-        n2[:,0] = 0
-        n3 = np.roll(self.cells, -1, axis=1)
-        n3[:,-1] = 0
-        n4 = np.roll(self.cells, -1, axis=0)
-        n4[-1,:] = 0
-
-        self.neighbors = {}
-        self.neighbors['top'] = n1
-        self.neighbors['left'] = n2
-        self.neighbors['right'] = n3
-        self.neighbors['bottom'] = n4
+        self._update_neighborhood(VonNeumannNeighborhood, toroidal=False)
 
 
 class SimpleCA(CA2D):
-    def __init__(self, dim):
-        CA2D.__init__(self, dim)
+    def __init__(self, dim, dtype=None):
+        CA2D.__init__(self, dim, dtype)
         self.neighborhood = "Toroidal 2D-CA"
         self.neighbors = {}
 
@@ -1,16 +1,16 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from .rules import RuleManager
+from .rule_manager import RuleManager
+from .dtypes import as_state
 
 
 class CA_3D:
-    def __init__(self, dim):
+    def __init__(self, dim, dtype=None):
         """
-        Creates an 3D cellular automata object of a given dimension with random value from 0-1. See related initialize_ functions to initialize properly.
+        Creates an 3D cellular automata object of a given dimension with random value from 0-1 (zeros for integer dtypes). See related initialize_ functions to initialize properly.
         ---------------
         Parameters:
             dim = cellular automata matrix shape
+            dtype = dtype of the states, honored by every initialize_ function (None keeps numpy's defaults)
 
         Attributes
         n1 = left-top neighbor of new_state
@@ -26,7 +26,11 @@ class CA_3D:
             None
         """
         self.size = dim
-        self.cells = np.random.random(dim)
+        self.dtype = dtype
+        if dtype is None or np.dtype(dtype).kind == 'f':
+            self.cells = as_state(np.random.random(dim), dtype)
+        else:
+            self.cells = np.zeros(dim, dtype=dtype)
         self.rm = RuleManager()
         self.update_neighbors()
         print("You initialized a 3D-CA with Moore neighborhood")
@@ -114,7 +118,7 @@ class CA_3D:
         Returns:
             None : Updates the cell with initialized values
         """
-        self.cells = (np.random.random(self.size) > ratio).astype(int) 
+        self.cells = as_state((np.random.random(self.size) > ratio).astype(int), self.dtype)
         self.update_neighbors()
 
     def initialize_random(self):
@@ -126,7 +130,7 @@ class CA_3D:
         Returns:
             None : Updates the cell with initialized values
         """
-        self.cells = np.random.random(self.size)
+        self.cells = as_state(np.random.random(self.size), self.dtype)
         self.update_neighbors()
  
     def initialize_random_int(self, min_value, max_value):
@@ -144,7 +148,7 @@ class CA_3D:
         Returns:
             None : Updates the cell with initialized values
         """
-        self.cells = np.random.randint(min_value, max_value, size=self.size)  
+        self.cells = as_state(np.random.randint(min_value, max_value, size=self.size), self.dtype)
         self.update_neighbors()
         
     def add_rule(self, rule_object):
@@ -161,6 +165,8 @@ class CA_3D:
         self.rm.reset_rule()
 
     def try_3d_animate(self):
+        import matplotlib.pyplot as plt
+        import matplotlib.animation as animation
         self.rm.set_game_of_life()
 
         fig = plt.figure()
@@ -175,6 +181,8 @@ class CA_3D:
             ani.save('GameOfLife.mp4')
 
     def animate_game_of_life(self, cmap='plasma', savefig=False):
+        import matplotlib.pyplot as plt
+        import matplotlib.animation as animation
         self.rm.set_game_of_life()
 
         fig = plt.figure()
@@ -189,6 +197,8 @@ class CA_3D:
             ani.save('GameOfLife.mp4')
 
     def animate_brians_brain(self, cmap='plasma', savefig=False):
+        import matplotlib.pyplot as plt
+        import matplotlib.animation as animation
         self.rm.set_brians_brain()
         fig = plt.figure()
         self.im = plt.imshow(self.cell(), cmap=cmap, animated=True)
@@ -1,25 +1,32 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from .rule_manager import RuleManager
 from .data_collector import DataCollector
+from .profiler import Profiled
+from .adjacency import Adjacency
+from .dtypes import as_state
 #import matplotlib.animation as animation
 
 
-class CA_Network:
-    def __init__(self, adj_matrix, heterogeneity=1):
+class CA_Network(Profiled):
+    def __init__(self, adj_matrix, heterogeneity=1, dtype=None):
         """
         Creates an cellular automata object with a network neighborhood that is not lattice-trivial, given an initial adjacency network. See related initialize_ functions to initialize properly.
         ---------------
         Parameters:
-            adj_matrix = adjacency matrix of the network
+            adj_matrix = adjacency of the network: an Adjacency (e.g. Adjacency.from_edges),
+                         a (indptr, indices[, weights]) CSR tuple, a scipy.sparse matrix or a dense matrix.
+                         It is stored as an Adjacency, which rules receive in apply().
+            heterogeneity = number of states (compartments) per node
+            dtype = dtype of the states, honored by every initialize_ function (None keeps numpy's defaults)
         ---------------
         Returns:
             None
         """
-        self.adj = adj_matrix 
+        self.adj = Adjacency.convert(adj_matrix)
         self.size = len(self.adj)
         self.heterogeneity = heterogeneity
-        self.cells = np.zeros([self.heterogeneity, self.size])
+        self.dtype = dtype
+        self.cells = np.zeros([self.heterogeneity, self.size], dtype=dtype)
         self.rm = RuleManager()
 
     def evolve(self):
@@ -33,6 +40,9 @@ class CA_Network:
         Returns:
             new_state = new state after applying the rule  
         """
+        return self._profiled('evolve', self._evolve)
+
+    def _evolve(self):
         new_state = self.rm.apply(self.cells, self.adj)
         self.cells = new_state
         return self.cells
@@ -44,6 +54,7 @@ class CA_Network:
             assert(len(p) == self.heterogeneity), "Probability distribution does not match heterogeneity"
 
         p.insert(0,0)
+        self.cells = np.zeros([self.heterogeneity, self.size], dtype=self.dtype)
         for i in range(self.size):
             population = np.random.random(N)
             part = np.cumsum(p)
@@ -60,7 +71,7 @@ class CA_Network:
         Returns:
             None : Updates the cell with initialized values
         """
-        self.cells = np.random.random(self.size)
+        self.cells = as_state(np.random.random(self.size), self.dtype)
 
     def initialize_zero(self):
         """
@@ -70,7 +81,7 @@ class CA_Network:
         Returns:
             None : Updates the cell with initialized values
         """
-        self.cells = np.zeros([self.heterogeneity, self.size])
+        self.cells = np.zeros([self.heterogeneity, self.size], dtype=self.dtype)
 
     def initialize_index(self, tuple_index, value):
         """
@@ -84,8 +95,8 @@ class CA_Network:
         Returns:
             None : Updates the cell with initialized values
         """
-        self.cells = np.zeros([self.heterogeneity, self.size])
-        self.cells[index] = value
+        self.cells = np.zeros([self.heterogeneity, self.size], dtype=self.dtype)
+        self.cells[tuple_index] = as_state(value, self.dtype)
  
     def initialize_random_int(self, min_value, max_value):
         """
@@ -102,7 +113,7 @@ class CA_Network:
         Returns:
             None : Updates the cell with initialized values
         """
-        self.cells = np.random.randint(min_value, max_value, size=[self.heterogeneity,self.size])  
+        self.cells = as_state(np.random.randint(min_value, max_value, size=[self.heterogeneity,self.size]), self.dtype)
 
     def set_rule(self, rule_object):
         """
@@ -144,15 +155,17 @@ class CA_Network:
         """
         self.rm.modify_rule(**kwargs)
     
-    def run_collect(self, iteration, steady_state=False, collector = {'all':0}):
+    def run_collect(self, iteration, steady_state=False, collector = {'all':0}, memory_budget=None, spill_dir=None):
         """
         Run evolution according to the number of iteration
         -------------
         Parameters:
             iteration = number of iteration
             collector = data reduction (sum, mean, max, min, std, etc)
+            memory_budget = bytes of collected data kept in memory before spilling to disk (see DataCollector)
+            spill_dir = directory of the spilled data
        """
-        dc = DataCollector(collector)
+        dc = self._collector(DataCollector(collector, memory_budget=memory_budget, spill_dir=spill_dir))
         if steady_state:
             raise NotImplementedError
         else:
@@ -0,0 +1,102 @@
+import hashlib
+from collections import deque
+
+import numpy as np
+
+
+class CycleDetector:
+    def __init__(self, window=1024):
+        """
+        Detects the first repeated state of a deterministic evolution.
+        States are stored as 128 bit hashes; only the last `window` hashes are kept,
+        so cycles longer than window are not detected.
+        -------------
+        Parameters:
+            window = number of state hashes kept
+        """
+        self.window = window
+        self.seen = {}
+        self.order = deque()
+        self.step = -1
+        self.transient = None
+        self.period = None
+
+    def observe(self, state):
+        """
+        Records the next state (the first call is step 0)
+        -------------
+        Returns:
+            True if the state was seen before; transient and period are then set
+        """
+        self.step += 1
+        key = hashlib.blake2b(np.ascontiguousarray(state).tobytes(), digest_size=16).digest()
+        first = self.seen.get(key)
+        if first is not None:
+            self.transient = first
+            self.period = self.step - first
+            return True
+
+        self.seen[key] = self.step
+        self.order.append(key)
+        if len(self.order) > self.window:
+            del self.seen[self.order.popleft()]
+        return False
+
+
+def run_until_cycle(model, dc, iteration, steady_state=False, extrapolate=False, window=1024):
+    """
+    Evolves a model with deterministic rules until it reaches `iteration` steps or
+    revisits a state, collecting into dc like run_collect.
+
+    Once a cycle is found the run stops. With steady_state, the state at `iteration`
+    is reached with fewer than `period` extra steps. Otherwise, with extrapolate, the
+    remaining rows are filled from the collected rows of the cycle, so the data has
+    the same length as a full run; without it the data ends at the detection step.
+    -------------
+    Parameters:
+        model = CA with evolve(), cells and rm
+        dc = DataCollector
+        iteration = number of iteration
+        steady_state = collect only the final state if True
+        extrapolate = fill the rows after the detection step from the cycle
+        window = number of state hashes kept (see CycleDetector)
+    -------------
+    Returns:
+        cycle = None if no cycle was found, otherwise a dictionary with
+                transient (steps before the cycle), period and step (step of detection)
+    """
+    assert(all(getattr(rule, 'deterministic', False) for rule in model.rm.rules)), "Cycle detection needs deterministic rules"
+    detector = CycleDetector(window)
+    detector.observe(model.cells)
+
+    result = model.cells
+    step = 0
+    while step < iteration:
+        result = model.evolve()
+        step += 1
+        if not steady_state:
+            dc.collect(result)
+        if detector.observe(result):
+            break
+
+    if detector.period is None:
+        if steady_state:
+            dc.collect(result)
+        return None
+
+    transient, period = detector.transient, detector.period
+    if steady_state:
+        for i in range((iteration-step) % period):
+            result = model.evolve()
+        dc.collect(result)
+    elif extrapolate and step < iteration:
+        #state k of the cycle is the row k-1 (the initial state is not collected, state 0 == state period)
+        columns = [dc.column(key) for key in dc.columns]
+        rows = []
+        for j in range(period):
+            k = transient+j or period
+            rows.append([np.array(column[k-1]) for column in columns])
+        for k in range(step+1, iteration+1):
+            dc.collect_values(rows[(k-transient) % period])
+
+    return {'transient' : transient, 'period' : period, 'step' : step}
@@ -1,12 +1,34 @@
+import os
+import shutil
+import tempfile
+import weakref
+
 import numpy as np
-import pandas as pd
 
 class DataCollector:
-    def __init__(self, collector):
-        self.data = []
+    def __init__(self, collector, capacity=64, memory_budget=None, spill_dir=None):
+        """
+        Collects one row of reduced data per step into typed column buffers.
+
+        Each collector output gets a preallocated numpy buffer (one row per step)
+        that grows geometrically. Its dtype is that of the first row, widened when a later
+        row needs it (e.g. int then float), so values are never cast down. When a memory budget is given and the buffers would
+        exceed it, the filled rows are appended to one raw binary file per column
+        in spill_dir and the buffers are reused; the files are kept so that the
+        returned memmaps stay valid. A temporary directory created by the collector is
+        removed by close() or when the collector is garbage collected (memmaps already
+        returned stay readable on POSIX systems); a given spill_dir is never removed.
+        The pandas view is only built by data_to_pd().
+        -------------
+        Parameters:
+            collector = dictionary of column name : reduction function ('all' keeps the whole state)
+            capacity = number of rows to preallocate, e.g. the number of iterations
+            memory_budget = maximum number of bytes held in memory, None for no limit
+            spill_dir = directory of the spilled columns, default is a new temporary directory
+        """
         self.flist = []
         self.columns = []
-        
+
         for key, f in collector.items():
             if key=='all':
                 self.flist.append(entire_data)
@@ -14,15 +36,134 @@ class DataCollector:
                 self.flist.append(f)
             self.columns.append(key)
 
+        self.capacity = max(1, capacity)
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.buffers = None
+        self.count = 0
+        self.spilled = 0
+        self._frame = None
+        self._cleanup = None
+        self.profiler = None
+
     def collect(self, array):
-        collected = [] 
-        for f in self.flist:
-            collected.append(f(array))
-        self.data.append(collected)
+        if self.profiler is not None:
+            return self.profiler.call('collect', self._collect, array)
+        self._collect(array)
+
+    def _collect(self, array):
+        self.collect_values([f(array) for f in self.flist])
+
+    def collect_values(self, values):
+        """
+        Appends one row of already reduced values
+        """
+        if self.buffers is None:
+            self._allocate(values)
+        elif self.count == len(self.buffers[0]):
+            self._make_room()
+
+        for i, value in enumerate(values):
+            value = np.asarray(value)
+            if value.dtype != self.buffers[i].dtype and self.buffers[i].dtype != object:
+                self._promote(i, np.result_type(self.buffers[i].dtype, value.dtype))
+            self.buffers[i][self.count] = value
+        self.count += 1
+        self._frame = None
+
+    def _allocate(self, values):
+        values = [np.asarray(value) for value in values]
+        self.row_bytes = sum(value.nbytes for value in values)
+
+        capacity = self.capacity
+        if self.memory_budget is not None:
+            capacity = max(1, min(capacity, self.memory_budget//max(self.row_bytes, 1)))
+        self.buffers = [np.empty((capacity,)+value.shape, dtype=value.dtype) for value in values]
+
+    def _promote(self, i, dtype):
+        #widens a column (buffer and spilled file) so that no collected value is cast down
+        buffer = self.buffers[i]
+        if dtype == buffer.dtype:
+            return
+        self.buffers[i] = buffer.astype(dtype)
+        if self.spilled:
+            path = self._path(i)
+            np.fromfile(path, dtype=buffer.dtype).astype(dtype).tofile(path)
+
+    def _make_room(self):
+        capacity = len(self.buffers[0])
+        if self.memory_budget is not None and 2*capacity*self.row_bytes > self.memory_budget:
+            self.spill()
+        else:
+            for i, buffer in enumerate(self.buffers):
+                grown = np.empty((2*capacity,)+buffer.shape[1:], dtype=buffer.dtype)
+                grown[:capacity] = buffer
+                self.buffers[i] = grown
+
+    def _path(self, i):
+        return os.path.join(self.spill_dir, '%d_%s.bin' % (i, self.columns[i]))
+
+    def spill(self):
+        """
+        Appends the rows held in memory to the column files and empties the buffers
+        """
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix='datacollector_')
+            self._cleanup = weakref.finalize(self, shutil.rmtree, self.spill_dir, True)
+
+        for i, buffer in enumerate(self.buffers):
+            assert(buffer.dtype != object), "Only numeric collector outputs can be spilled to disk"
+            with open(self._path(i), 'ab') as f:
+                buffer[:self.count].tofile(f)
+        self.spilled += self.count
+        self.count = 0
+
+    def close(self):
+        """
+        Removes the temporary spill directory created by the collector, if any
+        """
+        if self._cleanup is not None:
+            self._cleanup()
+
+    def __len__(self):
+        return self.spilled + self.count
+
+    def column(self, key):
+        """
+        Returns every collected row of a column as a numpy array.
+        Spilled columns are returned as a read-only memmap of the column file.
+        """
+        i = self.columns.index(key)
+        if self.buffers is None:
+            return np.empty(0)
+        if not self.spilled:
+            return self.buffers[i][:self.count]
+
+        if self.count:
+            self.spill()
+        buffer = self.buffers[i]
+        return np.memmap(self._path(i), dtype=buffer.dtype, mode='r', shape=(self.spilled,)+buffer.shape[1:])
+
+    @property
+    def data(self):
+        """
+        The pandas DataFrame if data_to_pd() was called, otherwise the list of collected rows
+        """
+        if self._frame is not None:
+            return self._frame
+        columns = [self.column(key) for key in self.columns]
+        return [[column[i] for column in columns] for i in range(len(self))]
 
     def data_to_pd(self):
-        self.data = pd.DataFrame(self.data, columns = self.columns)
-        return self.data
+        import pandas as pd
+
+        if self._frame is None:
+            frame = {}
+            for key in self.columns:
+                column = self.column(key)
+                frame[key] = column if column.ndim == 1 else list(column)
+            self._frame = pd.DataFrame(frame, columns=self.columns)
+        return self._frame
 
 def entire_data(array):
     return array
@@ -0,0 +1,163 @@
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+from threading import BrokenBarrierError
+
+import numpy as np
+
+
+def _split(rows, parts):
+    """
+    Splits range(rows) into `parts` contiguous strips of nearly equal size
+    """
+    bounds = np.linspace(0, rows, parts+1).astype(int)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _worker(shm_name, shape, dtype, strip, rm, neighborhood_class, toroidal, iterations, barrier, seed, timeout):
+    """
+    Evolves rows strip[0]:strip[1] of the lattice for a number of iterations.
+
+    The two shared buffers hold the padded lattice (one cell border). Every step the
+    worker reads its strip plus one halo row above and below from the current buffer,
+    writes its rows and their column halos into the next buffer and, if it owns the
+    first or last row, the wrapped row halo. A barrier then ends the step. A broken
+    barrier (a worker failed or a step timed out) ends the worker with exit code 1.
+    """
+    np.random.seed(seed)
+    #generators copied from the parent would repeat one stream in every strip
+    for rule in rm.rules:
+        if hasattr(rule, 'rng'):
+            rule.rng = None
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        buffers = np.ndarray((2,)+shape, dtype=dtype, buffer=shm.buf)
+        r0, r1 = strip
+        height, width = shape[0]-2, shape[1]-2
+        for i in range(iterations):
+            current, new = buffers[i % 2], buffers[(i+1) % 2]
+            neighbors = neighborhood_class.from_padded(current[r0:r1+2], toroidal)
+            new[r0+1:r1+1, 1:width+1] = rm.apply(neighbors.cells, neighbors)
+
+            if toroidal:
+                new[r0+1:r1+1, 0] = new[r0+1:r1+1, width]
+                new[r0+1:r1+1, width+1] = new[r0+1:r1+1, 1]
+                if r0 == 0:
+                    new[height+1] = new[1]
+                if r1 == height:
+                    new[0] = new[height]
+            barrier.wait(timeout)
+    except BrokenBarrierError:
+        raise SystemExit(1)
+    except BaseException:
+        barrier.abort()
+        raise
+    finally:
+        buffers = None
+        shm.close()
+
+
+class DecomposedCA2D:
+    def __init__(self, model, processes=None, seed=None, timeout=600):
+        """
+        Runs a Moore or Von Neumann 2D CA on several processes.
+
+        The lattice is split into horizontal strips, one per worker process, held in two
+        padded shared memory buffers. Workers exchange one cell halos through the shared
+        buffers and synchronize with a barrier every step, for toroidal and fixed zero
+        boundaries. Rules are used unchanged through rule.apply(current, neighbors), so
+        every rule must declare rule.local = True (next state of a cell only depends on
+        its neighborhood); rules that read the whole lattice, like MPA (harvest field)
+        or Applause (fraction of clapping cells), are rejected here (CA2D.run_decomposed
+        evolves them on one process instead).
+
+        Deterministic rules give exactly the single process result. Stochastic rules draw
+        from one numpy stream per worker (seeded from seed), so their results differ.
+
+        The parent polls the workers while they run: when one dies (including a hard
+        kill), the barrier is aborted so the others stop instead of waiting forever,
+        and run() raises. A step that takes longer than timeout also breaks the barrier.
+        -------------
+        Parameters:
+            model = MooreCA_t, VonCA_t, MooreCA or VonCA with its rules set
+            processes = number of worker processes, default is every core
+            seed = seed of the worker random streams
+            timeout = seconds a worker waits for the others at the end of a step
+        """
+        assert(model.cells.ndim == 2 and hasattr(model.neighbors, 'from_padded')), "Only single Moore or Von Neumann CAs can be decomposed"
+        assert(all(getattr(rule, 'local', False) for rule in model.rm.rules)), "Decomposed evolution needs local rules (rule.local = True)"
+        self.rm = model.rm
+        self.timeout = timeout
+        self.neighborhood_class = type(model.neighbors)
+        self.toroidal = model.neighbors.toroidal
+
+        height, width = model.cells.shape
+        self.processes = max(1, min(processes or os.cpu_count(), height))
+        self.strips = _split(height, self.processes)
+        self.seed_sequence = np.random.SeedSequence(seed)
+
+        self.shape = (height+2, width+2)
+        self.dtype = model.cells.dtype
+        nbytes = 2*self.shape[0]*self.shape[1]*self.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        self.buffers = np.ndarray((2,)+self.shape, dtype=self.dtype, buffer=self.shm.buf)
+        self.buffers[:] = 0
+
+        padded = self.neighborhood_class(model.cells, self.toroidal).padded
+        self.buffers[0] = padded
+
+    @property
+    def cells(self):
+        """
+        The current lattice (a view of the shared buffer)
+        """
+        return self.buffers[0, 1:-1, 1:-1]
+
+    def run(self, iterations):
+        """
+        Evolves the lattice a number of iterations on the worker processes
+        -------------
+        Returns:
+            cells = the current lattice
+        """
+        if iterations <= 0:
+            return self.cells
+
+        barrier = multiprocessing.Barrier(self.processes)
+        seeds = self.seed_sequence.spawn(self.processes)
+        workers = []
+        for strip, seed in zip(self.strips, seeds):
+            #workers always start from buffer 0, the result is moved back there
+            worker = multiprocessing.Process(target=_worker,
+                                             args=(self.shm.name, self.shape, self.dtype, strip, self.rm,
+                                                   self.neighborhood_class, self.toroidal, iterations,
+                                                   barrier, int(seed.generate_state(1)[0]), self.timeout))
+            worker.start()
+            workers.append(worker)
+
+        running = list(workers)
+        while running:
+            running[0].join(0.05)
+            if any(worker.exitcode not in (None, 0) for worker in workers):
+                #a dead worker never reaches the barrier; release the others
+                barrier.abort()
+            running = [worker for worker in running if worker.exitcode is None]
+
+        failed = [worker.exitcode for worker in workers if worker.exitcode != 0]
+        if failed:
+            raise RuntimeError("%d of %d decomposed workers failed (exit codes %s)" % (len(failed), self.processes, failed))
+
+        if iterations % 2:
+            self.buffers[0] = self.buffers[1]
+        return self.cells
+
+    def close(self):
+        self.buffers = None
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,29 @@
+import numpy as np
+
+
+def as_state(array, dtype):
+    """
+    Casts a freshly initialized state to the dtype of a model.
+    Integer and boolean dtypes only accept integral values in their range,
+    so an initializer never truncates silently.
+    -------------
+    Parameters:
+        array = initialized state
+        dtype = dtype of the model, None keeps the dtype of array
+    -------------
+    Returns:
+        state = array with the model dtype (not copied if it already has it)
+    """
+    array = np.asarray(array)
+    if dtype is None:
+        return array
+
+    dtype = np.dtype(dtype)
+    if dtype.kind in 'biu' and array.size and array.dtype.kind == 'f':
+        assert(np.all(np.mod(array, 1) == 0)), "%s states cannot hold non-integer values" % dtype
+    if dtype.kind in 'iu' and array.size:
+        info = np.iinfo(dtype)
+        assert(info.min <= array.min() and array.max() <= info.max), "states do not fit in %s" % dtype
+    elif dtype.kind == 'b' and array.size:
+        assert(np.all((array == 0) | (array == 1))), "bool states must be 0 or 1"
+    return array.astype(dtype, copy=False)
@@ -0,0 +1,128 @@
+import numpy as np
+
+from .ca2d import CA2D
+from .data_collector import DataCollector
+from .dtypes import as_state
+from .neighborhood import MooreNeighborhood
+
+#Reductions that can be computed for every replica at once with axis=(1, 2)
+BATCHED_REDUCTIONS = [np.average, np.mean, np.sum, np.max, np.min, np.std, np.var]
+
+
+class EnsembleGenerator:
+    def __init__(self, generators):
+        """
+        Random number source of an ensemble; replica k always draws from generators[k]
+        -------------
+        Parameters:
+            generators = list of numpy Generators, one per replica
+        """
+        self.generators = generators
+
+    def random(self, size=None, dtype=np.float64, out=None):
+        if out is None:
+            out = np.empty(size, dtype=dtype)
+        for generator, replica in zip(self.generators, out):
+            generator.random(dtype=out.dtype, out=replica)
+        return out
+
+
+class Ensemble2D(CA2D):
+    def __init__(self, dim, replicas, neighborhood_class=MooreNeighborhood, toroidal=True, seed=None, dtype=None):
+        """
+        Creates K independent replicas of a 2D cellular automata evolved as one (K, H, W) array.
+        Neighbors are taken along the lattice axes only and every replica has its own random stream.
+        Evolution is buffered (see CA2D.use_buffers).
+        ---------------
+        Parameters:
+            dim = shape of one lattice [H, W]
+            replicas = number of replicas K
+            neighborhood_class = MooreNeighborhood or VonNeumannNeighborhood
+            toroidal = periodic boundaries if True, fixed zero boundaries otherwise
+            seed = seed of the ensemble; replica streams are spawned from it
+            dtype = dtype of the states (see CA2D)
+        ---------------
+        Returns:
+            None
+        """
+        self.dim = dim
+        self.replicas = replicas
+        self.neighborhood_class = neighborhood_class
+        self.toroidal = toroidal
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.generators = [np.random.default_rng(s) for s in self.seed_sequence.spawn(replicas)]
+        self.rng = EnsembleGenerator(self.generators)
+
+        CA2D.__init__(self, [replicas]+list(dim), dtype)
+        self.use_buffers()
+        self.neighborhood = "Ensemble of %d %s %s" % (replicas, "toroidal" if toroidal else "non-toroidal", neighborhood_class.__name__)
+
+    def update_neighbors(self):
+        self._update_neighborhood(self.neighborhood_class, toroidal=self.toroidal)
+
+    def set_rule(self, rule_object):
+        CA2D.set_rule(self, rule_object)
+        rule_object.rng = self.rng
+
+    def add_rule(self, rule_object):
+        CA2D.add_rule(self, rule_object)
+        rule_object.rng = self.rng
+
+    def initialize_random_bin(self, ratio):
+        """
+        Initializes every replica from its own stream with a approximated ratio of 1s and 0s
+        """
+        self.cells = as_state((ratio > self.rng.random(self.size)).astype(int), self.dtype)
+        self.update_neighbors()
+
+    def initialize_random(self):
+        """
+        Initializes every replica from its own stream with random values from 0 to 1
+        """
+        self.cells = as_state(self.rng.random(self.size), self.dtype)
+        self.update_neighbors()
+
+    def initialize_random_int(self, min_value, max_value):
+        """
+        Initializes every replica from its own stream with integers from min_value to max_value
+        """
+        self.cells = as_state(np.stack([g.integers(min_value, max_value, size=self.dim) for g in self.generators]), self.dtype)
+        self.update_neighbors()
+
+    def _collect(self, collectors, result):
+        columns = []
+        for f in collectors[0].flist:
+            if f in BATCHED_REDUCTIONS:
+                columns.append(f(result, axis=(1, 2)))
+            else:
+                columns.append([f(state) for state in result])
+
+        for i, dc in enumerate(collectors):
+            dc.collect_values([column[i] for column in columns])
+
+    def run_collect(self, iteration, steady_state=False, collector = {'mean':np.average}):
+        """
+        Run evolution according to the number of iteration
+        -------------
+        Parameters:
+            iteration = number of iteration
+            collector = data reduction (sum, mean, max, min, std, etc), applied to each replica
+        -------------
+        Returns:
+            data = list with the collected data of every replica
+        """
+        capacity = 1 if steady_state else iteration
+        collectors = [DataCollector(collector, capacity) for i in range(self.replicas)]
+
+        if steady_state:
+            for i in range(iteration):
+                result = self.evolve()
+            self._collect(collectors, result)
+        else:
+            for i in range(iteration):
+                result = self.evolve()
+                self._collect(collectors, result)
+            for dc in collectors:
+                dc.data_to_pd()
+
+        return [dc.data for dc in collectors]
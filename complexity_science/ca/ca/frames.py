@@ -0,0 +1,271 @@
+import os
+import queue
+import struct
+import subprocess
+import threading
+import zlib
+
+import numpy as np
+
+
+class FrameProducer:
+    def __init__(self, model, frames=None, skip=1, downsample=1, queue_size=8):
+        """
+        Evolves a model on a background thread and puts every `skip`-th state into a
+        bounded queue, so the simulation runs ahead of whoever draws or encodes the frames.
+        -------------
+        Parameters:
+            model = any CA with evolve()
+            frames = number of frames to produce, None for no limit (see stop())
+            skip = number of evolve() calls per frame
+            downsample = keep every downsample-th row and column of each frame
+            queue_size = maximum number of frames waiting to be consumed
+        """
+        self.model = model
+        self.frames = frames
+        self.skip = max(1, skip)
+        self.downsample = max(1, downsample)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self._stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _put(self, item):
+        while not self._stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self):
+        try:
+            count = 0
+            while self.frames is None or count < self.frames:
+                for i in range(self.skip):
+                    state = self.model.evolve()
+                d = self.downsample
+                if not self._put(np.array(state[..., ::d, ::d])):
+                    return
+                count += 1
+        except Exception as error:
+            self.error = error
+        finally:
+            self._put(None)
+
+    def get(self):
+        """
+        Returns:
+            frame = the next frame, None when the producer is done
+        """
+        frame = self.queue.get()
+        if frame is None and self.error is not None:
+            raise self.error
+        return frame
+
+    def __iter__(self):
+        frame = self.get()
+        while frame is not None:
+            yield frame
+            frame = self.get()
+
+    def stop(self):
+        """
+        Stops the producer thread; frames still queued are dropped
+        """
+        self._stopped.set()
+        self.thread.join()
+
+
+class ColorMap:
+    def __init__(self, cmap='plasma', vmin=None, vmax=None, levels=256):
+        """
+        Renders states to RGB with a lookup table, in NumPy only.
+        -------------
+        Parameters:
+            cmap = matplotlib colormap name ('gray' needs no matplotlib) or an array of (levels, 3) uint8 colors
+            vmin, vmax = values mapped to the first and last color; default is the range of the first frame
+            levels = number of colors of a named colormap
+        """
+        self.vmin = vmin
+        self.vmax = vmax
+        if isinstance(cmap, str):
+            self.lut = self._named_lut(cmap, levels)
+        else:
+            self.lut = np.asarray(cmap, dtype=np.uint8).reshape(-1, 3)
+
+    @staticmethod
+    def _named_lut(name, levels):
+        if name == 'gray':
+            ramp = np.linspace(0, 255, levels).round().astype(np.uint8)
+            return np.stack([ramp, ramp, ramp], axis=1)
+
+        import matplotlib
+        if hasattr(matplotlib, 'colormaps'):
+            colormap = matplotlib.colormaps[name]
+        else:
+            #matplotlib < 3.5 has no colormap registry
+            from matplotlib import cm
+            colormap = cm.get_cmap(name, levels)
+        colors = colormap(np.linspace(0, 1, levels))[:, :3]
+        return (colors*255).round().astype(np.uint8)
+
+    def __call__(self, frame):
+        """
+        Returns:
+            rgb = uint8 array of shape frame.shape + (3,)
+        """
+        if self.vmin is None:
+            self.vmin = frame.min()
+        if self.vmax is None:
+            self.vmax = frame.max() if frame.max() > self.vmin else self.vmin+1
+
+        #one byte states index a table of the colors of all 256 values directly
+        if frame.dtype.kind in 'bu' and frame.dtype.itemsize == 1:
+            return self._index(np.arange(256))[frame.view(np.uint8)]
+        return self._index(frame)
+
+    def _index(self, values):
+        top = len(self.lut)-1
+        scale = top/(self.vmax-self.vmin)
+        index = np.clip((values.astype(np.float32)-self.vmin)*scale, 0, top).astype(np.intp)
+        return self.lut[index]
+
+
+class RawSink:
+    def __init__(self, path):
+        """
+        Appends frames as raw rgb24 bytes to one file (e.g. ffmpeg -f rawvideo -pix_fmt rgb24)
+        """
+        self.path = path
+        self.file = open(path, 'wb')
+        self.shape = None
+
+    def write(self, rgb):
+        self.shape = rgb.shape
+        self.file.write(np.ascontiguousarray(rgb).tobytes())
+
+    def close(self):
+        self.file.close()
+
+
+def png_bytes(rgb, level=1):
+    """
+    Encodes an (H, W, 3) uint8 image as a PNG file
+    """
+    height, width = rgb.shape[:2]
+    raw = np.zeros([height, width*3+1], dtype=np.uint8)
+    raw[:, 1:] = rgb.reshape(height, width*3)
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag+data) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(raw.tobytes(), level)) + chunk(b'IEND', b''))
+
+
+class PNGSink:
+    def __init__(self, pattern, level=1):
+        """
+        Writes every frame to its own PNG file
+        -------------
+        Parameters:
+            pattern = file name with one integer field, e.g. 'frames/frame_%06d.png'
+            level = zlib compression level
+        """
+        self.pattern = pattern
+        self.level = level
+        self.count = 0
+        directory = os.path.dirname(pattern)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, rgb):
+        with open(self.pattern % self.count, 'wb') as f:
+            f.write(png_bytes(rgb, self.level))
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+class PipeSink:
+    def __init__(self, output, fps=10, command=None):
+        """
+        Streams raw rgb24 frames to the stdin of an encoder process, started on the first frame.
+        -------------
+        Parameters:
+            output = output file of the encoder
+            fps = frames per second
+            command = encoder command as a list; '{width}', '{height}', '{fps}' and '{output}'
+                      are replaced. Default is an ffmpeg rawvideo to H.264 command.
+        """
+        self.output = output
+        self.fps = fps
+        self.command = command or ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                                   '-s', '{width}x{height}', '-r', '{fps}', '-i', '-',
+                                   '-pix_fmt', 'yuv420p', '{output}']
+        self.process = None
+
+    def write(self, rgb):
+        if self.process is None:
+            height, width = rgb.shape[:2]
+            args = [str(arg).format(width=width, height=height, fps=self.fps, output=self.output) for arg in self.command]
+            self.process = subprocess.Popen(args, stdin=subprocess.PIPE)
+        self.process.stdin.write(np.ascontiguousarray(rgb).tobytes())
+
+    def close(self):
+        if self.process is not None:
+            self.process.stdin.close()
+            returncode = self.process.wait()
+            assert(returncode == 0), "encoder exited with code %d" % returncode
+
+
+def open_sink(target, fps=10):
+    """
+    Sink for a file name: '.raw' gives a RawSink, a '%d' pattern ending in '.png' a PNGSink
+    and anything else (e.g. '.mp4') a PipeSink to ffmpeg. Sink objects are returned as is.
+    """
+    if not isinstance(target, str):
+        return target
+    if target.endswith('.raw'):
+        return RawSink(target)
+    if target.endswith('.png'):
+        return PNGSink(target)
+    return PipeSink(target, fps)
+
+
+def export_frames(model, target, frames, skip=1, downsample=1, cmap='plasma', vmin=None, vmax=None, fps=10, queue_size=8):
+    """
+    Renders the evolution of a model to a file without matplotlib's animation machinery.
+    The model is evolved ahead on a producer thread (FrameProducer) while this thread
+    colors the frames with a lookup table (ColorMap) and writes them to the sink.
+    -------------
+    Parameters:
+        model = any CA with evolve()
+        target = sink object or file name (see open_sink)
+        frames = number of frames
+        skip = number of evolve() calls per frame
+        downsample = keep every downsample-th row and column
+        cmap, vmin, vmax = colors (see ColorMap)
+        fps = frames per second of a video
+        queue_size = maximum number of frames simulated ahead
+    -------------
+    Returns:
+        count = number of frames written
+    """
+    sink = open_sink(target, fps)
+    colormap = ColorMap(cmap, vmin, vmax)
+    producer = FrameProducer(model, frames, skip, downsample, queue_size)
+    count = 0
+    try:
+        for frame in producer:
+            sink.write(colormap(frame))
+            count += 1
+    finally:
+        producer.stop()
+        sink.close()
+    return count
@@ -0,0 +1,169 @@
+import numpy as np
+
+from .buffers import BufferPool
+
+
+def left_right_context(neighbors, out=None):
+    """
+    Context of a 1D cell: 2*(left != 0) + (right != 0)
+    """
+    if out is None:
+        out = np.empty(np.shape(neighbors['left']), dtype=np.uint8)
+    np.not_equal(neighbors['left'], 0, out=out, casting='unsafe')
+    out <<= 1
+    out += neighbors['right'] != 0
+    return out
+
+
+def count_one_context(neighbors, out=None):
+    """
+    Context of a 2D cell: number of neighbors in state 1 (see Neighborhood.count, RadiusNeighborhood.count)
+    """
+    return neighbors.count(1, out=out)
+
+
+#name : function(neighbors, out) returning the context index of every cell
+CONTEXTS = {'left_right' : left_right_context,
+            'count_1' : count_one_context}
+
+
+def is_table_rule(rule):
+    """
+    True if a rule declares its transition table:
+        rule.table_context = key of CONTEXTS
+        rule.state_table() = integer array T with T[state, context] = next state
+    """
+    return getattr(rule, 'table_context', None) in CONTEXTS and hasattr(rule, 'state_table')
+
+
+def _rows(table, states):
+    #states beyond the last row use the last row, as TableRule clips them
+    return table[np.minimum(np.arange(states), len(table)-1)]
+
+
+def compose(first, second):
+    """
+    Transition table of `second` applied to the result of `first`, both indexed by
+    the same context (RuleManager gives every rule of a chain the same neighbors)
+        F[s, c] = second[first[s, c], c]
+    """
+    assert(first.shape[1] == second.shape[1]), "Tables of one context must have the same number of columns"
+    states = max(len(first), len(second))
+    first, second = _rows(first, states), _rows(second, states)
+    return second[np.minimum(first, states-1), np.arange(first.shape[1])]
+
+
+class TableRule:
+    #next state of a cell only depends on its neighborhood, without random draws
+    local = True
+    deterministic = True
+
+    def __init__(self, table, context, name='TableRule'):
+        """
+        Rule given by a transition table: next state = table[state, context], where
+        context is computed once from the neighbors (see CONTEXTS). States are clipped
+        to the rows of the table, so they must be integers from 0 to len(table)-1.
+        -------------
+        Parameters:
+            table = integer array of shape (states, contexts)
+            context = key of CONTEXTS
+            name = name shown by the profiler
+        """
+        self.table = np.asarray(table)
+        self.table_context = context
+        self.context = CONTEXTS[context]
+        self.name = name
+        self.buffers = BufferPool()
+        self._typed_tables = {}
+
+        states, contexts = self.table.shape
+        if states == 2 and contexts <= 16 and self.table.max() <= 1:
+            #binary tables of two states are read as bits of a 16 bit mask per state,
+            #    next state = (mask[state] >> context) & 1
+            #which is pure arithmetic (no gather) on narrow integers
+            masks = (self.table.astype(np.int64) << np.arange(contexts)).sum(axis=1)
+            self._masks = (np.uint16(masks[0]), np.uint16((masks[1]-masks[0]) % 2**16))
+            self.index_dtype = np.uint16
+        else:
+            #a narrow index moves less memory than intp; np.take widens it internally
+            self._masks = None
+            self.index_dtype = np.uint8 if self.table.size <= 2**8 else np.uint16 if self.table.size <= 2**16 else np.intp
+        self._top = self.index_dtype(states-1)
+        self.context_dtype = np.uint8 if contexts <= 2**8 else np.uint16 if contexts <= 2**16 else np.intp
+
+    @classmethod
+    def fuse(cls, rules):
+        """
+        Fuses a chain of table rules with the same context into one TableRule
+        """
+        context = rules[0].table_context
+        assert(all(rule.table_context == context for rule in rules)), "Only rules with the same context can be fused"
+        table = np.asarray(rules[0].state_table())
+        for rule in rules[1:]:
+            table = compose(table, np.asarray(rule.state_table()))
+        return cls(table, context, '+'.join(getattr(rule, 'name', type(rule).__name__) for rule in rules))
+
+    def state_table(self):
+        return self.table
+
+    def _typed(self, dtype):
+        table = self._typed_tables.get(dtype)
+        if table is None:
+            table = self._typed_tables[dtype] = self.table.astype(dtype).ravel()
+        return table
+
+    def _lookup(self, out, current, index, context):
+        np.copyto(index, current, casting='unsafe')
+        if current.dtype.kind != 'b':
+            np.clip(index, self.index_dtype(0), self._top, out=index)
+
+        if self._masks is not None:
+            base, step = self._masks
+            index *= step
+            index += base
+            np.right_shift(index, context, out=index, casting='unsafe')
+            index &= self.index_dtype(1)
+            np.copyto(out, index, casting='unsafe')
+            return out
+
+        index *= self.index_dtype(self.table.shape[1])
+        np.add(index, context, out=index, casting='unsafe')
+        return np.take(self._typed(out.dtype), index, out=out, mode='clip')
+
+    def apply(self, current, neighbors):
+        #fresh arrays, so tiles of one lattice can be evolved concurrently
+        index = np.empty(current.shape, dtype=self.index_dtype)
+        return self._lookup(np.empty_like(current), current, index, self.context(neighbors))
+
+    def apply_into(self, out, current, neighbors):
+        index = self.buffers.get('index', current.shape, self.index_dtype)
+        context = self.context(neighbors, out=self.buffers.get('context', current.shape, self.context_dtype))
+        return self._lookup(out, current, index, context)
+
+
+def compile_rules(rules):
+    """
+    Replaces every run of two or more consecutive table rules with the same
+    context by one fused TableRule; other rules are kept as they are
+    -------------
+    Returns:
+        stages = list of rules applied one after another
+    """
+    stages = []
+    run = []
+
+    def flush():
+        stages.extend([TableRule.fuse(run)] if len(run) > 1 else run)
+        del run[:]
+
+    for rule in rules:
+        if is_table_rule(rule) and run and run[0].table_context == rule.table_context:
+            run.append(rule)
+            continue
+        flush()
+        if is_table_rule(rule):
+            run.append(rule)
+        else:
+            stages.append(rule)
+    flush()
+    return stages
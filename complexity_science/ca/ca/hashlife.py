@@ -0,0 +1,264 @@
+from collections import OrderedDict
+
+import numpy as np
+
+
+class Node:
+    __slots__ = ('nw', 'ne', 'sw', 'se', 'level', 'population', '_hash')
+
+    def __init__(self, nw, ne, sw, se, level, population, hash_value):
+        """
+        Quadtree node of side 2**level. Level 0 nodes are single cells.
+        Nodes are hash-consed by HashLife and compared by identity.
+        """
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.level = level
+        self.population = population
+        self._hash = hash_value
+
+    def __hash__(self):
+        return self._hash
+
+
+class HashLife:
+    def __init__(self, cells=None, birth=(3,), survive=(2, 3), cache_size=2**20):
+        """
+        Game of Life (or any two-state Moore B/S rule) on an unbounded plane using HashLife:
+        the universe is a hash-consed quadtree and the future of every node is memoized,
+        so repetitive patterns can be advanced by power-of-two generation jumps.
+
+        Cell (row, column) of an imported array is placed at plane coordinate
+        (top+row, left+column). The node table and the result cache are both LRU
+        bounded by cache_size entries; evicted entries are simply recomputed.
+        -------------
+        Parameters:
+            cells = initial dense binary array, see load()
+            birth = neighbor counts that turn a dead cell alive
+            survive = neighbor counts that keep a live cell alive
+            cache_size = maximum number of entries of the node table and of the result cache
+        -------------
+        Returns:
+            None
+        """
+        self.birth = set(birth)
+        self.survive = set(survive)
+        self.cache_size = cache_size
+        self.nodes = OrderedDict()
+        self.results = OrderedDict()
+
+        self.off = Node(None, None, None, None, 0, 0, 0)
+        self.on = Node(None, None, None, None, 0, 1, 1)
+        self._empty = [self.off]
+
+        self.generation = 0
+        self.window = (0, 0, 0, 0)
+        self.root = self.empty(3)
+        if cells is not None:
+            self.load(cells)
+
+    def join(self, nw, ne, sw, se):
+        """
+        Returns the canonical node with the four given children
+        """
+        key = (nw, ne, sw, se)
+        node = self.nodes.get(key)
+        if node is not None:
+            self.nodes.move_to_end(key)
+            return node
+
+        node = Node(nw, ne, sw, se, nw.level+1,
+                    nw.population+ne.population+sw.population+se.population, hash(key))
+        self.nodes[key] = node
+        if len(self.nodes) > self.cache_size:
+            self.nodes.popitem(last=False)
+        return node
+
+    def empty(self, level):
+        """
+        Returns the empty node of side 2**level
+        """
+        while len(self._empty) <= level:
+            e = self._empty[-1]
+            self._empty.append(self.join(e, e, e, e))
+        return self._empty[level]
+
+    def clear_cache(self):
+        """
+        Empties the node table and the result cache (the current universe is kept)
+        """
+        self.nodes.clear()
+        self.results.clear()
+
+    def expand(self, node):
+        """
+        Returns the node of twice the side with node in its centre
+        """
+        e = self.empty(node.level-1)
+        return self.join(self.join(e, e, e, node.nw), self.join(e, e, node.ne, e),
+                         self.join(e, node.sw, e, e), self.join(node.se, e, e, e))
+
+    def centre(self, node):
+        return self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def _life4(self, node):
+        """
+        Centre 2x2 of a 4x4 node after one generation
+        """
+        rows = [[node.nw.nw, node.nw.ne, node.ne.nw, node.ne.ne],
+                [node.nw.sw, node.nw.se, node.ne.sw, node.ne.se],
+                [node.sw.nw, node.sw.ne, node.se.nw, node.se.ne],
+                [node.sw.sw, node.sw.se, node.se.sw, node.se.se]]
+        bits = [[cell.population for cell in row] for row in rows]
+
+        result = []
+        for i in (1, 2):
+            for j in (1, 2):
+                total = sum(bits[i+di][j+dj] for di in (-1, 0, 1) for dj in (-1, 0, 1)) - bits[i][j]
+                alive = total in (self.survive if bits[i][j] else self.birth)
+                result.append(self.on if alive else self.off)
+        return self.join(*result)
+
+    def _step(self, node, j):
+        """
+        Centre of node (half its side) advanced by 2**j generations, j <= node.level-2
+        """
+        if node.population == 0:
+            return self.empty(node.level-1)
+
+        key = (node, j)
+        result = self.results.get(key)
+        if result is not None:
+            self.results.move_to_end(key)
+            return result
+
+        if node.level == 2:
+            result = self._life4(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            n00 = nw
+            n01 = self.join(nw.ne, ne.nw, nw.se, ne.sw)
+            n02 = ne
+            n10 = self.join(nw.sw, nw.se, sw.nw, sw.ne)
+            n11 = self.join(nw.se, ne.sw, sw.ne, se.nw)
+            n12 = self.join(ne.sw, ne.se, se.nw, se.ne)
+            n20 = sw
+            n21 = self.join(sw.ne, se.nw, sw.se, se.sw)
+            n22 = se
+
+            #a full jump advances both stages by 2**(level-3), a shorter one only the second
+            if j == node.level-2:
+                first = lambda n: self._step(n, j-1)
+            else:
+                first = self.centre
+            c00, c01, c02 = first(n00), first(n01), first(n02)
+            c10, c11, c12 = first(n10), first(n11), first(n12)
+            c20, c21, c22 = first(n20), first(n21), first(n22)
+
+            step = j-1 if j == node.level-2 else j
+            result = self.join(self._step(self.join(c00, c01, c10, c11), step),
+                               self._step(self.join(c01, c02, c11, c12), step),
+                               self._step(self.join(c10, c11, c20, c21), step),
+                               self._step(self.join(c11, c12, c21, c22), step))
+
+        self.results[key] = result
+        if len(self.results) > self.cache_size:
+            self.results.popitem(last=False)
+        return result
+
+    def jump(self, j):
+        """
+        Advances the universe by 2**j generations
+        """
+        root = self.root
+        while root.level < j+3 or self.centre(self.centre(root)).population != root.population:
+            root = self.expand(root)
+        self.root = self._step(root, j)
+        self.generation += 2**j
+
+    def step(self, generations=1):
+        """
+        Advances the universe by any number of generations, one power-of-two jump per binary digit
+        """
+        j = 0
+        while generations:
+            if generations & 1:
+                self.jump(j)
+            generations >>= 1
+            j += 1
+
+    def evolve(self):
+        """
+        Advances one generation
+        -------------
+        Returns:
+            cells = dense view of the window of the last loaded array
+        """
+        self.step(1)
+        return self.cells
+
+    @property
+    def population(self):
+        return self.root.population
+
+    def load(self, cells, top=0, left=0):
+        """
+        Replaces the universe with a dense binary array placed at (top, left).
+        The array area becomes the window returned by cells.
+        """
+        cells = np.asarray(cells) != 0
+        height, width = cells.shape
+        self.window = (top, left, height, width)
+
+        reach = max(abs(top), abs(left), abs(top+height), abs(left+width), 4)
+        level = int(np.ceil(np.log2(reach)))+1
+        half = 2**(level-1)
+        grid = np.zeros([2*half, 2*half], dtype=bool)
+        grid[half+top:half+top+height, half+left:half+left+width] = cells
+
+        self.root = self._build(grid, level)
+        self.generation = 0
+
+    def _build(self, grid, level):
+        if not grid.any():
+            return self.empty(level)
+        if level == 0:
+            return self.on
+        h = len(grid)//2
+        return self.join(self._build(grid[:h, :h], level-1), self._build(grid[:h, h:], level-1),
+                         self._build(grid[h:, :h], level-1), self._build(grid[h:, h:], level-1))
+
+    def to_array(self, top, left, height, width):
+        """
+        Dense copy of the plane region [top, top+height) x [left, left+width)
+        """
+        out = np.zeros([height, width], dtype=np.uint8)
+        half = 2**(self.root.level-1)
+        self._fill(out, self.root, -half-top, -half-left)
+        return out
+
+    def _fill(self, out, node, y, x):
+        size = 2**node.level
+        if node.population == 0 or y >= out.shape[0] or x >= out.shape[1] or y+size <= 0 or x+size <= 0:
+            return
+        if node.level == 0:
+            out[y, x] = 1
+            return
+        h = size//2
+        self._fill(out, node.nw, y, x)
+        self._fill(out, node.ne, y, x+h)
+        self._fill(out, node.sw, y+h, x)
+        self._fill(out, node.se, y+h, x+h)
+
+    @property
+    def cells(self):
+        """
+        Dense copy of the window of the last loaded array
+        """
+        return self.to_array(*self.window)
+
+    @cells.setter
+    def cells(self, cells):
+        self.load(cells, *self.window[:2])
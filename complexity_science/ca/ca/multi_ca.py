@@ -1,5 +1,5 @@
+import numpy as np
 from .rule_manager import RuleManager
-import matplotlib.animation as animation
 
 class MultiCA:
     def __init__(self, dim):
@@ -123,13 +123,16 @@ class MultiCA:
         self.cells = np.random.randint(min_value, max_value, size=self.size)  
         self.update_neighbors()
         
-    def animate(self, num_frames='all', cmap='plasma', savefig=False, writer=animation.writers['ffmpeg']):
+    def animate(self, num_frames='all', cmap='plasma', savefig=False, writer=None):
         """
         Run animation
         ------------
         Parameters
             Animation parameters
+            writer = matplotlib movie writer used with savefig, default is ffmpeg
         """
+        import matplotlib.pyplot as plt
+        import matplotlib.animation as animation
         fig = plt.figure()
         self.im = plt.imshow(self.cells, cmap=cmap, animated=True)
 
@@ -141,9 +144,11 @@ class MultiCA:
             plt.show()
 
         if savefig:
-            ani.save('Animation.mp4', writer=writer)
+            ani.save('Animation.mp4', writer=writer or animation.writers['ffmpeg'])
 	
     def jyp_anim(self, cmap='plasma'):
+        import matplotlib.pyplot as plt
+        import matplotlib.animation as animation
         fig = plt.figure()
         self.im = plt.imshow(self.cells, cmap=cmap, animated=True)
         anim = animation.FuncAnimation(fig, self._update_fig, interval=100, blit=True)
@@ -152,3 +157,10 @@ class MultiCA:
     def _update_fig(self, *args):
         self.im.set_array(self.evolve())
         return self.im,
+
+    def export_frames(self, target, frames, skip=1, downsample=1, cmap='plasma', vmin=None, vmax=None, fps=10):
+        """
+        Renders the evolution to a file on a headless pipeline (see CA2D.export_frames)
+        """
+        from .frames import export_frames
+        return export_frames(self, target, frames, skip, downsample, cmap, vmin, vmax, fps)
@@ -0,0 +1,489 @@
+import numpy as np
+
+from .buffers import BufferPool
+
+#numpy.fft writes into given arrays from numpy 2.0
+_FFT_OUT = int(np.__version__.split('.')[0]) >= 2
+
+
+class Neighborhood:
+    """
+    Lazy 2D neighborhood of a cell array.
+
+    The cells are padded by one cell once (wrapped for toroidal boundaries,
+    zeros otherwise) and every quantity is read from that padded array:
+        neighbors.sum()       = sum of the neighbor values of every cell
+        neighbors.count(s)    = number of neighbors in state s of every cell
+        neighbors['top'], ... = directional neighbor values (views, no copy)
+
+    Iterating over a Neighborhood yields its direction keys, so rules written
+    against the old neighbors dictionary keep working.
+
+    The lattice is the last two axes of the cells; leading axes (e.g. the
+    replicas of an ensemble) are never mixed.
+    """
+    offsets = {}
+    spatial_axes = (-2, -1)
+
+    def __init__(self, cells, toroidal=True):
+        self.toroidal = toroidal
+        self.buffers = BufferPool()
+        self._padded = None
+        self.update(cells)
+
+    @classmethod
+    def from_padded(cls, padded, toroidal=True):
+        """
+        Neighborhood of padded[..., 1:-1, 1:-1] whose one cell border is already filled,
+        e.g. with halos written by other processes. The border is used as is.
+        """
+        neighbors = cls(padded[..., 1:-1, 1:-1], toroidal)
+        neighbors._padded = padded
+        neighbors._stale = False
+        return neighbors
+
+    def update(self, cells):
+        """
+        Points the neighborhood to new cells.
+        The padded array is refreshed in place on next use when shape and dtype match.
+        """
+        self.cells = cells
+        self._stale = True
+
+    @property
+    def padded(self):
+        """
+        The cells padded by one cell on every side; built on first use
+        """
+        if not self._stale:
+            return self._padded
+
+        cells = self.cells
+        padded = self._padded
+        if padded is None or padded.dtype != cells.dtype or padded.shape != cells.shape[:-2]+(cells.shape[-2]+2, cells.shape[-1]+2):
+            mode = 'wrap' if self.toroidal else 'constant'
+            pad_width = [(0, 0)]*(cells.ndim-2) + [(1, 1), (1, 1)]
+            self._padded = np.pad(cells, pad_width, mode=mode)
+        else:
+            padded[..., 1:-1, 1:-1] = cells
+            if self.toroidal:
+                padded[..., 0, 1:-1] = cells[..., -1, :]
+                padded[..., -1, 1:-1] = cells[..., 0, :]
+                padded[..., 0] = padded[..., -2]
+                padded[..., -1] = padded[..., 1]
+
+        self._stale = False
+        return self._padded
+
+    def __getitem__(self, key):
+        dy, dx = self.offsets[key]
+        height, width = self.cells.shape[-2:]
+        return self.padded[..., 1+dy:1+dy+height, 1+dx:1+dx+width]
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, key):
+        return key in self.offsets
+
+    def keys(self):
+        return self.offsets.keys()
+
+    def items(self):
+        return [(key, self[key]) for key in self.offsets]
+
+    def values(self):
+        return [self[key] for key in self.offsets]
+
+    def sum(self, out=None):
+        """
+        Parameters:
+            out = optional array to write the result into
+        -------------
+        Returns:
+            total = sum of the neighbor values of every cell, same dtype as the cells
+        """
+        padded = self.padded
+        if padded.dtype == bool:
+            padded = padded.view(np.uint8)
+        return self._stencil_sum(padded, out)
+
+    def count(self, state, out=None):
+        """
+        Parameters:
+            state = state to be counted
+            out = optional array to write the result into
+        -------------
+        Returns:
+            total = number of neighbors of every cell that are in the given state (uint8)
+        """
+        padded = self.padded
+        equal = self.buffers.get('equal', padded.shape, bool)
+        np.equal(padded, state, out=equal)
+        return self._stencil_sum(equal.view(np.uint8), out)
+
+    def _stencil_sum(self, padded, out):
+        raise NotImplementedError("This is the base neighborhood; please use MooreNeighborhood or VonNeumannNeighborhood")
+
+
+class MooreNeighborhood(Neighborhood):
+    offsets = {'top-left': (-1, -1),
+               'top': (-1, 0),
+               'top-right': (-1, 1),
+               'left': (0, -1),
+               'right': (0, 1),
+               'bottom-left': (1, -1),
+               'bottom': (1, 0),
+               'bottom-right': (1, 1)}
+
+    def _stencil_sum(self, padded, out):
+        #Separable sum: top+bottom rows, then the three columns, then left and right
+        vertical = self.buffers.get('vertical', padded.shape[:-2]+(padded.shape[-2]-2, padded.shape[-1]), padded.dtype)
+        np.add(padded[..., :-2, :], padded[..., 2:, :], out=vertical)
+
+        total = np.add(vertical[..., :-2], vertical[..., 1:-1], out=out)
+        total += vertical[..., 2:]
+        total += padded[..., 1:-1, :-2]
+        total += padded[..., 1:-1, 2:]
+        return total
+
+
+class VonNeumannNeighborhood(Neighborhood):
+    offsets = {'top': (-1, 0),
+               'left': (0, -1),
+               'right': (0, 1),
+               'bottom': (1, 0)}
+
+    def _stencil_sum(self, padded, out):
+        total = np.add(padded[..., :-2, 1:-1], padded[..., 1:-1, :-2], out=out)
+        total += padded[..., 1:-1, 2:]
+        total += padded[..., 2:, 1:-1]
+        return total
+
+
+class Neighborhood1D:
+    """
+    Lazy radius-r neighborhood of a 1D cell array (the last axis).
+
+    The cells are padded by r cells once (wrapped for toroidal boundaries,
+    zeros otherwise) and every quantity is read from that padded array:
+        neighbors.codes(k)  = base-k code of the 2r+1 cells of every window,
+                              the leftmost cell being the most significant digit
+        neighbors.sums()    = sum of the 2r+1 cells of every window
+        neighbors['left'], neighbors['right'] = nearest neighbors (views, no copy)
+
+    Codes are built by doubling: the codes of windows of width 2w are
+        codes_w[i]*k**w + codes_w[i+w]
+    so a window of width 2r+1 takes O(log r) passes over the lattice instead of 2r.
+    Sums come from a prefix sum, one pass whatever the radius; windows of up to
+    direct_width cells are summed directly, which is faster for small radii.
+    """
+    direct_width = 13
+
+    def __init__(self, cells, radius=1, toroidal=True):
+        self.radius = radius
+        self.toroidal = toroidal
+        self.update(cells)
+
+    def update(self, cells):
+        self.cells = cells
+        self._padded = None
+
+    @property
+    def padded(self):
+        """
+        The cells padded by radius cells on both ends; built on first use
+        """
+        if self._padded is None:
+            pad_width = [(0, 0)]*(self.cells.ndim-1) + [(self.radius, self.radius)]
+            self._padded = np.pad(self.cells, pad_width, mode='wrap' if self.toroidal else 'constant')
+        return self._padded
+
+    def __getitem__(self, key):
+        n, r = self.cells.shape[-1], self.radius
+        shift = {'left' : -1, 'right' : 1}[key]
+        return self.padded[..., r+shift:r+shift+n]
+
+    def __iter__(self):
+        return iter(('left', 'right'))
+
+    def keys(self):
+        return ['left', 'right']
+
+    def codes(self, states):
+        """
+        Parameters:
+            states = number of states k; cells must be integers from 0 to k-1
+        -------------
+        Returns:
+            codes = int64 base-k code of the window [i-r, i+r] of every cell
+        """
+        width = 2*self.radius+1
+        assert(states**width < 2**63), "Window codes do not fit in 64 bits"
+        block = self.padded.astype(np.int64)
+        block_width = 1
+        result, result_width = None, 0
+        while True:
+            if width & 1:
+                if result is None:
+                    result, result_width = block, block_width
+                else:
+                    size = result.shape[-1] - block_width
+                    result = result[..., :size]*states**block_width + block[..., result_width:result_width+size]
+                    result_width += block_width
+            width >>= 1
+            if not width:
+                return result
+            block = block[..., :-block_width]*states**block_width + block[..., block_width:]
+            block_width *= 2
+
+    def sums(self):
+        """
+        Returns:
+            sums = integer sum of the window [i-r, i+r] of every cell
+        """
+        padded = self.padded
+        n, width = self.cells.shape[-1], 2*self.radius+1
+        largest = padded.max() if padded.size else 0
+        dtype = np.int32 if int(largest)*padded.shape[-1] < 2**31 else np.int64
+
+        if width <= self.direct_width:
+            total = padded[..., :n].astype(dtype)
+            for j in range(1, width):
+                total += padded[..., j:j+n]
+            return total
+
+        prefix = np.zeros(padded.shape[:-1]+(padded.shape[-1]+1,), dtype=dtype)
+        np.cumsum(padded, axis=-1, out=prefix[..., 1:])
+        return prefix[..., width:width+n] - prefix[..., :n]
+
+
+class RadiusNeighborhood:
+    """
+    Lazy radius-r Moore or Von Neumann neighborhood of a 2D cell array, the center excluded:
+        moore       = cells with max(|dy|, |dx|) <= r, (2r+1)**2 - 1 neighbors
+        von_neumann = cells with |dy| + |dx| <= r, 2r(r+1) neighbors
+
+    Sums and counts are read from summed-area tables (integral images) of the
+    lattice padded by r cells (wrapped for toroidal boundaries, zeros otherwise),
+    so they cost the same for every radius:
+        neighbors.sum()     = sum of the neighbor values of every cell
+        neighbors.count(s)  = number of neighbors in state s of every cell
+    Von Neumann diamonds are squares of the lattice rotated by 45 degrees, so they
+    are read from the summed-area table of the rotated padded lattice.
+
+    The lattice is the last two axes of the cells; leading axes are never mixed.
+    """
+    def __init__(self, cells, radius=1, shape='moore', toroidal=True):
+        assert(shape in ('moore', 'von_neumann')), "shape is 'moore' or 'von_neumann'"
+        self.radius = radius
+        self.shape = shape
+        self.toroidal = toroidal
+        self._rotation = None
+        self.update(cells)
+
+    def update(self, cells):
+        self.cells = cells
+        self._padded = None
+
+    def __len__(self):
+        r = self.radius
+        return (2*r+1)**2-1 if self.shape == 'moore' else 2*r*(r+1)
+
+    @property
+    def padded(self):
+        """
+        The cells padded by radius cells on every side; built on first use
+        """
+        if self._padded is None:
+            r = self.radius
+            pad_width = [(0, 0)]*(self.cells.ndim-2) + [(r, r), (r, r)]
+            self._padded = np.pad(self.cells, pad_width, mode='wrap' if self.toroidal else 'constant')
+        return self._padded
+
+    def _integral(self, values, bound):
+        """
+        Summed-area table with a leading row and column of zeros
+            table[..., y, x] = values[..., :y, :x].sum()
+        """
+        if values.dtype.kind == 'f':
+            dtype = np.float64
+        else:
+            dtype = np.int32 if bound*values.shape[-2]*values.shape[-1] < 2**31 else np.int64
+        table = np.zeros(values.shape[:-2]+(values.shape[-2]+1, values.shape[-1]+1), dtype=dtype)
+        inner = table[..., 1:, 1:]
+        np.cumsum(values, axis=-2, out=inner)
+        np.cumsum(inner, axis=-1, out=inner)
+        return table
+
+    def _rotated(self):
+        """
+        Index arrays of the 45 degree rotation of the padded lattice,
+            rotated[y+x, y-x+W-1] = padded[y, x]
+        and of the corners of the squares around the cells
+        """
+        height, width = self.cells.shape[-2:]
+        if self._rotation is None or self._rotation[0] != (height, width):
+            r = self.radius
+            hp, wp = height+2*r, width+2*r
+            y, x = np.mgrid[0:hp, 0:wp]
+            cy, cx = np.mgrid[r:height+r, r:width+r]
+            u, v = cy+cx, cy-cx+wp-1
+            self._rotation = ((height, width), (hp+wp-1, hp+wp-1), y+x, y-x+wp-1, u-r, u+r+1, v-r, v+r+1)
+        return self._rotation[1:]
+
+    def _window(self, values, bound):
+        #sum of values over the window around every cell, the center included
+        height, width = self.cells.shape[-2:]
+        if self.shape == 'moore':
+            w = 2*self.radius+1
+            table = self._integral(values, bound)
+            total = table[..., w:w+height, w:w+width] - table[..., :height, w:w+width]
+            total -= table[..., w:w+height, :width]
+            total += table[..., :height, :width]
+            return total
+
+        size, u, v, top, bottom, left, right = self._rotated()
+        rotated = np.zeros(values.shape[:-2]+size, dtype=values.dtype)
+        rotated[..., u, v] = values
+        table = self._integral(rotated, bound)
+        total = table[..., bottom, right] - table[..., top, right]
+        total -= table[..., bottom, left]
+        total += table[..., top, left]
+        return total
+
+    def sum(self, out=None):
+        """
+        Returns:
+            total = sum of the neighbor values of every cell
+        """
+        padded = self.padded
+        bound = int(np.abs(padded).max()) if padded.size and padded.dtype.kind != 'f' else 1
+        total = self._window(padded.view(np.uint8) if padded.dtype == bool else padded, bound)
+        return np.subtract(total, self.cells, out=out, casting='unsafe')
+
+    def count(self, state, out=None):
+        """
+        Returns:
+            total = number of neighbors of every cell that are in the given state
+        """
+        equal = np.equal(self.padded, state).view(np.uint8)
+        total = self._window(equal, 1)
+        return np.subtract(total, self.cells == state, out=out, casting='unsafe')
+
+
+class KernelNeighborhood:
+    """
+    Weighted neighborhood of a 2D cell array on a toroidal lattice, given by any kernel:
+        neighbors.sum()     = sum of kernel[i, j]*cells[y+i-cy, x+j-cx] over the kernel,
+                              where (cy, cx) = (kh//2, kw//2) is the center of the kernel
+        neighbors.count(s)  = the same weighted sum of the cells in state s
+        neighbors.weight    = sum of the kernel (len(neighbors) = its nonzero entries)
+    The center weight is used as given, so kernels that exclude the cell put a zero there.
+
+    Kernels with at most direct_limit nonzero entries are applied directly, one
+    shifted view of the padded lattice per entry. Larger kernels are applied by
+    real FFTs, O(N log N) per step whatever the kernel size: the spectrum of the
+    kernel is computed once per lattice shape and the spectra and results are
+    written into reused buffers.
+
+    The lattice is the last two axes of the cells; leading axes are never mixed.
+    """
+    direct_limit = 16
+
+    def __init__(self, cells, kernel, method='auto'):
+        assert(method in ('auto', 'direct', 'fft')), "method is 'auto', 'direct' or 'fft'"
+        self.kernel = np.asarray(kernel)
+        assert(self.kernel.ndim == 2), "The kernel must be a 2D array"
+        self.center = (self.kernel.shape[0]//2, self.kernel.shape[1]//2)
+        self.entries = [(i, j, self.kernel[i, j]) for i, j in zip(*np.nonzero(self.kernel))]
+        self.weight = self.kernel.sum()
+        self.integer = self.kernel.dtype.kind in 'biu'
+        self.method = method if method != 'auto' else 'direct' if len(self.entries) <= self.direct_limit else 'fft'
+        self.buffers = BufferPool()
+        self._spectra = {}
+        self.update(cells)
+
+    def update(self, cells):
+        self.cells = cells
+
+    def __len__(self):
+        return len(self.entries)
+
+    def spectrum(self, shape):
+        """
+        Returns:
+            spectrum = real FFT of the kernel wrapped on a lattice of the given shape, cached
+        """
+        spectrum = self._spectra.get(shape)
+        if spectrum is None:
+            #correlation with the kernel is convolution with the kernel flipped around its center
+            i, j = np.indices(self.kernel.shape)
+            wrapped = np.zeros(shape)
+            np.add.at(wrapped, ((self.center[0]-i) % shape[0], (self.center[1]-j) % shape[1]), self.kernel)
+            spectrum = self._spectra[shape] = np.fft.rfft2(wrapped)
+        return spectrum
+
+    def _direct(self, values, total):
+        kh, kw = self.kernel.shape
+        cy, cx = self.center
+        height, width = values.shape[-2:]
+        pad_width = [(0, 0)]*(values.ndim-2) + [(cy, kh-1-cy), (cx, kw-1-cx)]
+        padded = np.pad(values, pad_width, mode='wrap')
+        scratch = self.buffers.get('scratch', values.shape, np.float64)
+        total[...] = 0
+        for i, j, w in self.entries:
+            window = padded[..., i:i+height, j:j+width]
+            if w == 1:
+                total += window
+            else:
+                np.multiply(window, w, out=scratch)
+                total += scratch
+        return total
+
+    def _fft(self, values, total):
+        shape = values.shape[-2:]
+        if not _FFT_OUT:
+            spectrum = np.fft.rfft2(values)
+            spectrum *= self.spectrum(shape)
+            total[...] = np.fft.irfft2(spectrum, s=shape)
+            return total
+
+        spectrum = self.buffers.get('spectrum', values.shape[:-1]+(shape[1]//2+1,), np.complex128)
+        np.fft.rfft2(values, out=spectrum)
+        spectrum *= self.spectrum(shape)
+        return np.fft.irfft2(spectrum, s=shape, out=total)
+
+    def _convolve(self, values, exact):
+        #float64 weighted sums in a reused buffer; exact sums are rounded off the FFT noise
+        real = self.buffers.get('values', values.shape, np.float64)
+        np.copyto(real, values, casting='unsafe')
+        total = self.buffers.get('total', values.shape, np.float64)
+        if self.method == 'direct':
+            return self._direct(real, total)
+        total = self._fft(real, total)
+        return np.rint(total, out=total) if exact else total
+
+    def _result(self, total, out, integer):
+        if out is None:
+            out = np.empty(total.shape, dtype=np.int64 if integer else np.float64)
+        np.copyto(out, total, casting='unsafe')
+        return out
+
+    def sum(self, out=None):
+        """
+        Returns:
+            total = weighted sum of the cells around every cell
+        """
+        integer = self.integer and self.cells.dtype.kind in 'biu'
+        return self._result(self._convolve(self.cells, integer), out, integer)
+
+    def count(self, state, out=None):
+        """
+        Returns:
+            total = weighted number of cells in the given state around every cell
+        """
+        return self._result(self._convolve(self.cells == state, self.integer), out, self.integer)
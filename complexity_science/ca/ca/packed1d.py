@@ -0,0 +1,267 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from .rule_manager import RuleManager
+from .data_collector import DataCollector
+from .profiler import Profiled
+from .cycle import run_until_cycle
+
+WORD_BITS = 64
+_ONE = np.uint64(1)
+_TOP = np.uint64(WORD_BITS-1)
+
+class _UnpackingCollector:
+    #DataCollector that unpacks the packed words it is given before collecting them
+    def __init__(self, dc, unpack):
+        self.dc = dc
+        self.unpack = unpack
+
+    def collect(self, words):
+        self.dc.collect(self.unpack(words))
+
+    def __getattr__(self, name):
+        return getattr(self.dc, name)
+
+class PackedCA1D(Profiled):
+    def __init__(self, N, toroidal=True):
+        """
+        Creates a binary 1D cellular automata of length N stored 64 cells per uint64 word
+            cell i = bit (i % 64) of words[i // 64]
+
+        Only rules with an 8-entry transition table (e.g. Wolfram) can be applied.
+        -------------
+        Parameters:
+            N = number of cells
+            toroidal = periodic boundaries if True, fixed zero boundaries otherwise
+        -------------
+        Returns:
+            None
+        """
+        self.num_cells = N
+        self.toroidal = toroidal
+        self.num_words = -(-N//WORD_BITS)
+        self.words = np.zeros(self.num_words, dtype=np.uint64)
+        self.rm = RuleManager()
+
+        tail = N % WORD_BITS
+        self._tail_mask = np.uint64((1 << tail) - 1) if tail else ~np.uint64(0)
+        self._last_bit = np.uint64((N-1) % WORD_BITS)
+        if toroidal:
+            self.neighborhood = "Two neighbors (left and right) are automatically considered"
+        else:
+            self.neighborhood = "Two neighbors (left and right) are automatically considered with non toroidal boundaries"
+
+    @property
+    def cells(self):
+        """
+        Unpacked copy of the lattice as a uint8 array of length N
+        """
+        return self.unpack(self.words)
+
+    def pack(self, cells):
+        """
+        Packs a binary array of length N into uint64 words
+        """
+        bits = np.packbits(np.asarray(cells) != 0, bitorder='little')
+        padded = np.zeros(self.num_words*8, dtype=np.uint8)
+        padded[:len(bits)] = bits
+        return padded.view('<u8').astype(np.uint64)
+
+    def unpack(self, words):
+        """
+        Unpacks uint64 words into a uint8 array of length N
+        """
+        bits = np.unpackbits(words.astype('<u8').view(np.uint8), bitorder='little')
+        return bits[:self.num_cells]
+
+    def neighbor_words(self, words):
+        """
+        Builds the packed left and right neighbor words with shift-and-carry
+        -------------
+        Returns:
+            left, right = packed neighbor states
+        """
+        left = words << _ONE
+        left[1:] |= words[:-1] >> _TOP
+        right = words >> _ONE
+        right[:-1] |= words[1:] << _TOP
+
+        if self.toroidal:
+            left[0] |= (words[-1] >> self._last_bit) & _ONE
+            right[-1] |= (words[0] & _ONE) << self._last_bit
+        return left, right
+
+    def _apply_table(self, table, left, center, right):
+        #(state == 0, state == 1) word masks of each neighbor
+        l = (~left, left)
+        c = (~center, center)
+        r = (~right, right)
+
+        result = np.zeros_like(center)
+        for index in np.flatnonzero(table):
+            result |= l[index >> 2] & c[(index >> 1) & 1] & r[index & 1]
+        return result
+
+    def set_rule(self, rule_object):
+        """
+        Sets the CA rule; see CA1D.set_rule
+        """
+        assert(len(getattr(rule_object, 'table', [])) == 8), "Packed CA only supports rules with an 8-entry transition table"
+        self.rm.set_rule(rule_object)
+
+    def add_rule(self, rule_object):
+        """
+        Add the rule object to the rule manager.
+        This rule will apply for every evolve() function call.
+        """
+        assert(len(getattr(rule_object, 'table', [])) == 8), "Packed CA only supports rules with an 8-entry transition table"
+        self.rm.add_rule(rule_object)
+
+    def reset_rule(self):
+        """
+        Resets the rule list from RuleManager
+        """
+        self.rm.reset_rule()
+
+    def evolve(self):
+        """
+        Evolves the CA according to the rules applied, word by word.
+        Chained rules see the same left and right neighbors, as in RuleManager.apply
+        -------------
+        Returns:
+            words = packed new state after applying the rule
+        """
+        left, right = self.neighbor_words(self.words)
+        new_state = self.words
+        for rule in self.rm.rules:
+            new_state = self._apply_table(rule.table, left, new_state, right)
+
+        new_state[-1] &= self._tail_mask
+        self.words = new_state
+        return new_state
+
+    def initialize_index(self, index_list):
+        """
+        Initializes the ca from the list of index
+            cells[index] = 1
+        -------------
+        Parameters:
+            index_list = list of index to be initialized with value 1
+        """
+        assert(type(index_list)==type([])), "index_list must be a list"
+        cells = np.zeros(self.num_cells, dtype=np.uint8)
+        cells[index_list] = 1
+        self.words = self.pack(cells)
+
+    def initialize_binary(self, ratio):
+        """
+        Initializes the CA with a ratio of 1 and 0 values
+        -------------
+        Parameters:
+            ratio = ratio of "1" state over the "0" state
+        """
+        self.words = self.pack(np.random.random(self.num_cells) > ratio)
+
+    def initialize_random(self):
+        """
+        Initializes every cell with a random bit
+        """
+        words = np.frombuffer(np.random.bytes(8*self.num_words), dtype='<u8').astype(np.uint64)
+        words[-1] &= self._tail_mask
+        self.words = words
+
+    def initialize_random_int(self, min_value, max_value):
+        """
+        Initializes the ca randomly with integers from min_value to max_value (exclusive),
+        draws as CA1D.initialize_random_int; any nonzero integer is stored as 1
+        -------------
+        Parameters:
+            min_value: lowest possible integer state
+            max_value: highest possible integer state
+        """
+        self.words = self.pack(np.random.randint(min_value, max_value, size=self.num_cells))
+
+    def reset(self):
+        """
+        Initializes the cells with zero values
+        """
+        self.words = np.zeros(self.num_words, dtype=np.uint64)
+
+    def run(self, iterations, show_figure=True, unpack=False, out=None, path=None):
+        """
+        Run cellular automata according to the rules assigned.
+        The evolution is written row by row into one preallocated array (see CA1D.run).
+        -------------
+        Parameters:
+            iterations = number of times for the rule to be applied
+            show_figure = Default is True, outputs the figure at run time (matplotlib is only imported if True)
+            unpack = if True, stores unpacked uint8 states instead of packed uint64 words
+            out = array of shape (iterations+1, num_words) or (iterations+1, N) if unpack
+            path = if given (and out is not), the evolution is written to a np.memmap at this file
+        -------------
+        Returns:
+            result = array of the (packed) states of the CA evolution
+        """
+        shape = (iterations+1, self.num_cells if unpack else self.num_words)
+        dtype = np.uint8 if unpack else np.uint64
+        if out is not None:
+            assert(out.shape == shape), "out must have shape %s" % (shape,)
+            result = out
+        elif path is not None:
+            result = np.memmap(path, dtype=dtype, mode='w+', shape=shape)
+        else:
+            result = np.empty(shape, dtype=dtype)
+
+        convert = self.unpack if unpack else (lambda words: words)
+        result[0] = convert(self.words)
+        for i in range(iterations):
+            result[i+1] = convert(self.evolve())
+
+        if isinstance(result, np.memmap):
+            result.flush()
+
+        if show_figure:
+            import matplotlib.pyplot as plt
+            plt.imshow(result if unpack else [self.unpack(words) for words in result], cmap='Greens')
+            plt.show()
+            plt.clf()
+
+        return result
+
+    def run_collect(self, iteration, steady_state=False, collector = {'mean':np.average}, memory_budget=None, spill_dir=None,
+                    detect_cycles=False, extrapolate=False, cycle_window=1024):
+        """
+        Run evolution according to the number of iteration, see CA1D.run_collect.
+        The evolution stays packed; states are only unpacked to uint8 cells when collected,
+        so the collector functions see the same arrays as with CA1D
+        -------------
+        Parameters:
+            iteration = number of iteration
+            collector = data reduction (sum, mean, max, min, std, etc)
+            memory_budget = bytes of collected data kept in memory before spilling to disk (see DataCollector)
+            spill_dir = directory of the spilled data
+            detect_cycles = stop as soon as a state repeats (see run_until_cycle, packed words are hashed);
+                            the transient length and period are stored in self.cycle
+            extrapolate = with detect_cycles, fill the remaining rows from the detected cycle
+            cycle_window = number of past state hashes compared against
+        """
+        dc = self._collector(DataCollector(collector, 1 if steady_state else iteration, memory_budget, spill_dir))
+        self.cycle = None
+
+        if detect_cycles:
+            #run_until_cycle hashes model.cells and collects what evolve() returns, both kept packed here
+            model = SimpleNamespace(cells=self.words, rm=self.rm, evolve=self.evolve)
+            self.cycle = run_until_cycle(model, _UnpackingCollector(dc, self.unpack), iteration, steady_state, extrapolate, cycle_window)
+            if not steady_state:
+                dc.data_to_pd()
+        elif steady_state:
+            for i in range(iteration):
+                result = self.evolve()
+            dc.collect(self.unpack(result))
+        else:
+            for i in range(iteration):
+                dc.collect(self.unpack(self.evolve()))
+            dc.data_to_pd()
+
+        return dc.data
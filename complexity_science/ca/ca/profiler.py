@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+import tracemalloc
+
+
+class SectionStats:
+    __slots__ = ('calls', 'seconds', 'bytes', 'max_bytes')
+
+    def __init__(self):
+        """
+        Totals of one profiled section: number of calls, wall time in seconds and,
+        when memory is profiled, bytes allocated (sum and maximum of the per call peaks)
+        """
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.max_bytes = 0
+
+    def to_dict(self):
+        return {'calls' : self.calls, 'seconds' : self.seconds, 'bytes' : self.bytes, 'max_bytes' : self.max_bytes}
+
+
+class Profiler:
+    def __init__(self, memory=False, trace=False):
+        """
+        Records wall time, call counts and allocated bytes of nested sections, e.g.
+            evolve
+            evolve/rules
+            evolve/rules/copy
+            evolve/rules/0 GameOfLife
+            evolve/update_neighbors
+            collect
+        Models only call into the profiler when one is attached (see CA2D.profile).
+
+        Allocated bytes are the peak of the memory traced by tracemalloc above the
+        memory at the start of the section, so they include temporaries that are freed
+        before the section ends. They are only exact for sections run on one thread.
+        -------------
+        Parameters:
+            memory = trace allocations (tracemalloc is started if it is not tracing)
+            trace = keep one event per call for export_trace
+        """
+        self.memory = memory
+        self.trace = trace
+        self.stats = {}
+        self.events = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._started_tracing = memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def begin(self, name):
+        """
+        Opens a section nested in the open section of the calling thread
+        """
+        stack = self._stack()
+        path = stack[-1][0] + '/' + name if stack else name
+        base = 0
+        if self.memory:
+            base, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1][3] = max(stack[-1][3], peak)
+            tracemalloc.reset_peak()
+        stack.append([path, time.perf_counter(), base, base])
+
+    def end(self):
+        """
+        Closes the innermost open section of the calling thread
+        """
+        stop = time.perf_counter()
+        stack = self._stack()
+        path, start, base, peak = stack.pop()
+        allocated = 0
+        if self.memory:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            allocated = peak - base
+            if stack:
+                stack[-1][3] = max(stack[-1][3], peak)
+
+        with self._lock:
+            section = self.stats.get(path)
+            if section is None:
+                section = self.stats[path] = SectionStats()
+            section.calls += 1
+            section.seconds += stop - start
+            section.bytes += allocated
+            section.max_bytes = max(section.max_bytes, allocated)
+            if self.trace:
+                self.events.append({'name' : path.rsplit('/', 1)[-1], 'cat' : path, 'ph' : 'X',
+                                    'ts' : (start-self._origin)*1e6, 'dur' : (stop-start)*1e6,
+                                    'pid' : 0, 'tid' : threading.get_ident(), 'args' : {'bytes' : allocated}})
+
+    def call(self, name, function, *args):
+        """
+        Returns:
+            function(*args), timed as the section name
+        """
+        self.begin(name)
+        try:
+            return function(*args)
+        finally:
+            self.end()
+
+    def reset(self):
+        with self._lock:
+            self.stats = {}
+            self.events = []
+
+    def to_dict(self):
+        """
+        Returns:
+            stats = dictionary of section path : {calls, seconds, bytes, max_bytes}
+        """
+        with self._lock:
+            return {path : section.to_dict() for path, section in self.stats.items()}
+
+    def report(self, sort='seconds'):
+        """
+        Returns:
+            text = one line per section, sorted by the given SectionStats field
+        """
+        lines = ["%-40s %10s %12s %12s %14s" % ('section', 'calls', 'seconds', 'ms/call', 'bytes/call')]
+        stats = self.to_dict()
+        for path in sorted(stats, key=lambda path: -stats[path][sort]):
+            section = stats[path]
+            lines.append("%-40s %10d %12.6f %12.4f %14d" % (path, section['calls'], section['seconds'],
+                                                              section['seconds']*1000/section['calls'],
+                                                              section['bytes']//section['calls']))
+        return '\n'.join(lines)
+
+    def export_trace(self, path):
+        """
+        Writes the recorded events (trace=True) in the Chrome trace event format,
+        which chrome://tracing and Perfetto open
+        """
+        with self._lock:
+            events = list(self.events)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents' : events, 'displayTimeUnit' : 'ms'}, f)
+
+    def close(self):
+        """
+        Stops tracemalloc if this profiler started it
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+class Profiled:
+    """
+    Mixin of the models (CA1D, CA2D, CA_Network) that attaches a Profiler to the model,
+    its RuleManager (self.rm) and the DataCollector of run_collect
+    """
+    profiler = None
+
+    def profile(self, enable=True, memory=False, trace=False):
+        """
+        Attaches a Profiler that records wall time, calls and allocated bytes of evolve(),
+        its phases, every rule and the data collection of run_collect. Without a profiler
+        the only cost is one attribute check per call.
+        -------------
+        Parameters:
+            enable = True to attach a new profiler, False to detach it
+            memory, trace = see Profiler
+        -------------
+        Returns:
+            profiler = the attached Profiler (None when disabled); see Profiler.report and Profiler.export_trace
+        """
+        if self.profiler is not None:
+            self.profiler.close()
+        self.profiler = Profiler(memory, trace) if enable else None
+        self.rm.profiler = self.profiler
+        return self.profiler
+
+    def _profiled(self, name, function, *args):
+        #function(*args), timed as the section name when a profiler is attached
+        if self.profiler is None:
+            return function(*args)
+        return self.profiler.call(name, function, *args)
+
+    def _collector(self, dc):
+        #the DataCollector of run_collect, profiled with the model
+        dc.profiler = self.profiler
+        return dc
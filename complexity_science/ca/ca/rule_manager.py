@@ -1,9 +1,15 @@
 import numpy as np
 
+from .fusion import TableRule, compile_rules
+
 class RuleManager:
     def __init__(self):
         self.rules = []
         self.default = 0
+        self.scratch = None
+        self.profiler = None
+        self.fuse = True
+        self._compiled = None
 
     def add_rule(self, rule_object):
         self.rules.append(rule_object)
@@ -19,11 +25,85 @@ class RuleManager:
     def modify_rule(self, **kwargs):
         for rule in self.rules:
             rule.update_parameters(**kwargs)
-        
+        self._compiled = None
+
+    def compile(self):
+        """
+        Fuses every run of consecutive rules that declare a transition table over the
+        same context (e.g. Wolfram, GameOfLife, BriansBrain) into one TableRule, so a
+        chain costs one table lookup per cell (see ca.fusion). Other rules are applied
+        one after another as before. Done automatically whenever the rule list changes;
+        call it again after changing a rule object directly.
+        -------------
+        Returns:
+            stages = list of rules applied by apply() and apply_into()
+        """
+        stages = compile_rules(self.rules) if self.fuse else list(self.rules)
+        self._compiled = (tuple(self.rules), stages)
+        return stages
+
+    @property
+    def stages(self):
+        if self._compiled is None or self._compiled[0] != tuple(self.rules):
+            return self.compile()
+        return self._compiled[1]
+
     def apply(self, current, neighbors_dict):
-        result = current.copy() 
-        for rule in self.rules:
+        if self.profiler is not None:
+            return self.profiler.call('rules', self._apply_profiled, current, neighbors_dict)
+
+        stages = self.stages
+        #table rules never write their input, the copy only guards rules that do
+        result = current if stages and isinstance(stages[0], TableRule) else current.copy()
+        for rule in stages:
             new_state = rule.apply(result, neighbors_dict) 
             result = new_state
 
         return new_state 
+
+    def supports_apply_into(self):
+        """
+        Returns:
+            True if every rule implements apply_into(out, current, neighbors)
+        """
+        return len(self.rules) > 0 and all(hasattr(rule, 'apply_into') for rule in self.stages)
+
+    def apply_into(self, out, current, neighbors_dict):
+        """
+        Applies the rules without allocating a new state.
+        Chained rules alternate between out and a scratch array so that the last rule writes into out;
+        current is never written.
+        -------------
+        Parameters:
+            out = array that receives the new state (same shape and dtype as current)
+            current = current state
+            neighbors_dict = neighborhood of the current state
+        -------------
+        Returns:
+            out
+        """
+        stages = self.stages
+        if len(stages) > 1:
+            if self.scratch is None or self.scratch.shape != out.shape or self.scratch.dtype != out.dtype:
+                self.scratch = np.empty_like(out)
+
+        source = current
+        for i, rule in enumerate(stages):
+            target = out if (len(stages)-1-i) % 2 == 0 else self.scratch
+            if self.profiler is None:
+                rule.apply_into(target, source, neighbors_dict)
+            else:
+                self.profiler.call(self._section(i, rule), rule.apply_into, target, source, neighbors_dict)
+            source = target
+
+        return out
+
+    def _section(self, i, rule):
+        return '%d %s' % (i, getattr(rule, 'name', type(rule).__name__))
+
+    def _apply_profiled(self, current, neighbors_dict):
+        stages = self.stages
+        result = current if stages and isinstance(stages[0], TableRule) else self.profiler.call('copy', current.copy)
+        for i, rule in enumerate(stages):
+            result = self.profiler.call(self._section(i, rule), rule.apply, result, neighbors_dict)
+        return result
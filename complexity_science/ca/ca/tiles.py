@@ -0,0 +1,86 @@
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def cache_size(level=2, default=2**20):
+    """
+    Size in bytes of the given CPU cache level, read from sysfs when available
+    """
+    path = '/sys/devices/system/cpu/cpu0/cache/index%d/size' % level
+    try:
+        with open(path) as f:
+            text = f.read().strip()
+    except OSError:
+        return default
+
+    units = {'K' : 2**10, 'M' : 2**20, 'G' : 2**30}
+    if text[-1] in units:
+        return int(text[:-1])*units[text[-1]]
+    return int(text)
+
+
+def auto_tile_rows(shape, itemsize, threads, temporaries=16):
+    """
+    Number of lattice rows per tile so that a tile and the temporaries of a rule
+    (about `temporaries` arrays of the tile size) fit in the L2 cache,
+    with at least one tile per thread.
+    """
+    height, width = shape[-2], shape[-1]
+    planes = int(np.prod(shape[:-2]))
+    rows = cache_size()//max(1, planes*(width+2)*itemsize*temporaries)
+    return int(max(1, min(rows, -(-height//threads))))
+
+
+class ThreadedTiles:
+    def __init__(self, threads=None, tile_rows=None):
+        """
+        Applies the rules of a 2D CA to row tiles of the lattice on a thread pool.
+        Each tile reads its rows and one halo row above and below from the padded
+        lattice of the neighborhood. NumPy releases the GIL inside ufuncs, so the
+        tiles are evolved concurrently, and small tiles stay in cache.
+        Rules must be local and deterministic (see CA2D.use_threads): tiles run in no
+        fixed order, so random draws would not be reproducible.
+        -------------
+        Parameters:
+            threads = number of threads, default is every core
+            tile_rows = rows per tile, default is chosen from the L2 cache size (see auto_tile_rows)
+        """
+        self.threads = threads or os.cpu_count()
+        self.tile_rows = tile_rows
+        self.pool = ThreadPoolExecutor(max_workers=self.threads)
+        #idle worker threads are released even if close() is never called
+        self._finalizer = weakref.finalize(self, self.pool.shutdown, False)
+
+    def apply(self, rm, cells, neighbors, out=None):
+        """
+        Parameters:
+            out = array of the shape and dtype of cells written with the new state,
+                  default is a new array (must not be cells itself)
+        -------------
+        Returns:
+            new_state = rm.apply(cells, neighbors) computed tile by tile
+        """
+        height = cells.shape[-2]
+        rows = self.tile_rows or auto_tile_rows(cells.shape, cells.dtype.itemsize, self.threads)
+        padded = neighbors.padded
+        new_state = np.empty_like(cells) if out is None else out
+        neighborhood_class = type(neighbors)
+
+        def evolve_tile(r0):
+            r1 = min(r0+rows, height)
+            tile = neighborhood_class.from_padded(padded[..., r0:r1+2, :], neighbors.toroidal)
+            new_state[..., r0:r1, :] = rm.apply(tile.cells, tile)
+
+        for future in [self.pool.submit(evolve_tile, r0) for r0 in range(0, height, rows)]:
+            future.result()
+        return new_state
+
+    def close(self):
+        """
+        Shuts the thread pool down
+        """
+        self._finalizer.detach()
+        self.pool.shutdown()
@@ -1,11 +1,16 @@
+import numpy as np
 from .ca.ca1d import *
-from .rules1d.wolfram import Wolfram 
+from .ca.packed1d import PackedCA1D
+from .rules1d.wolfram import Wolfram
+from .rules1d.general import LookupRule, Totalistic
 
-def wolfram(N, rule_numbers, toroidal=True):
-    if toroidal:
-        model = CA_t(N)
+def wolfram(N, rule_numbers, toroidal=True, packed=False, dtype=np.uint8):
+    if packed:
+        model = PackedCA1D(N, toroidal)
+    elif toroidal:
+        model = CA_t(N, dtype)
     else:
-        model = CA_nt(N)
+        model = CA_nt(N, dtype)
 
     if (type(rule_numbers) == type(int())):
         model.set_rule(Wolfram(rule_numbers))
@@ -17,3 +22,18 @@ def wolfram(N, rule_numbers, toroidal=True):
         print("Please input a valid rule number or a list of rule number")
 
     return model
+
+
+def general1d(N, rule, states=2, radius=1, totalistic=False, toroidal=True, dtype=np.uint8):
+    """
+    k-state, radius-r 1D CA (see LookupRule and Totalistic), e.g.
+        general1d(N, 30)                                  elementary rule 30
+        general1d(N, 1635, states=3, totalistic=True)     3-color totalistic code 1635
+        general1d(N, table, states=2, radius=3)           table of 2**7 entries
+    """
+    model = CA_r(N, radius, toroidal, dtype)
+    if totalistic:
+        model.set_rule(Totalistic(rule, states, radius))
+    else:
+        model.set_rule(LookupRule(rule, states, radius))
+    return model
@@ -1,16 +1,22 @@
 import numpy as np
 from .ca.ca2d import *
+from .ca.ensemble import Ensemble2D
+from .ca.hashlife import HashLife
 from .rules2d.brians import *
 from .rules2d.game_of_life import *
 from .rules2d.applause import *
 from .rules2d.mpa import *
 from .rules2d.forest_fire import *
-
-def brians_brain(dim, toroidal=True, default=True):
-    if toroidal:
-        model = MooreCA_t(dim)
+from .rules2d.life_like import *
+from .rules2d.lenia import *
+
+def brians_brain(dim, toroidal=True, default=True, replicas=None, seed=None, dtype=np.uint8):
+    if replicas:
+        model = Ensemble2D(dim, replicas, MooreNeighborhood, toroidal, seed, dtype)
+    elif toroidal:
+        model = MooreCA_t(dim, dtype)
     else:
-        model = MooreCA(dim)
+        model = MooreCA(dim, dtype)
 
     if default:
         model.set_rule(BriansBrain())
@@ -19,11 +25,13 @@ def brians_brain(dim, toroidal=True, default=True):
     return model
 
 
-def game(dim, toroidal=True, default=True):
-    if toroidal:
-        model = MooreCA_t(dim)
+def game(dim, toroidal=True, default=True, replicas=None, seed=None, dtype=np.uint8):
+    if replicas:
+        model = Ensemble2D(dim, replicas, MooreNeighborhood, toroidal, seed, dtype)
+    elif toroidal:
+        model = MooreCA_t(dim, dtype)
     else:
-        model = MooreCA(dim)
+        model = MooreCA(dim, dtype)
 
     if default:
         model.set_rule(GameOfLife())
@@ -32,9 +40,11 @@ def game(dim, toroidal=True, default=True):
     return model
 
 
-def applause(dim, rule_object='default', simple=True, **kwargs):
-    if simple:
-        model = MooreCA_t(dim)
+def applause(dim, rule_object='default', simple=True, replicas=None, seed=None, dtype=np.uint8, **kwargs):
+    if replicas:
+        model = Ensemble2D(dim, replicas, MooreNeighborhood, True, seed, dtype)
+    elif simple:
+        model = MooreCA_t(dim, dtype)
 
     if (rule_object=='default'):
         model.set_rule(Applause(**kwargs))
@@ -45,11 +55,17 @@ def applause(dim, rule_object='default', simple=True, **kwargs):
     return model
 
 
-def mpa(dim, rule_object='default', percent_mpa=0, toroidal=True, **kwargs):
-    if toroidal:
-        model = VonCA_t(dim)
+def mpa(dim, rule_object='default', percent_mpa=0, toroidal=True, replicas=None, seed=None, dtype=np.float64, kernel=None, **kwargs):
+    if kernel is not None:
+        #dispersal over a wide kernel, e.g. lenia_kernel; the diffusion is scaled by its sum
+        assert(toroidal and not replicas), "Kernel neighborhoods (KernelCA) are toroidal single lattices"
+        model = KernelCA(dim, kernel, dtype=dtype)
+    elif replicas:
+        model = Ensemble2D(dim, replicas, VonNeumannNeighborhood, toroidal, seed, dtype)
+    elif toroidal:
+        model = VonCA_t(dim, dtype)
     else:
-        model = VonCA(dim)
+        model = VonCA(dim, dtype)
 
     if rule_object=='default':
         model.set_rule(MPA(dim, percent_mpa, **kwargs))
@@ -59,13 +75,71 @@ def mpa(dim, rule_object='default', percent_mpa=0, toroidal=True, **kwargs):
     model.initialize_random()
     return model
 
-def forest_fire(dim, toroidal=True, **kwargs):
-	if toroidal:
-		model = VonCA_t(dim)
+def forest_fire(dim, toroidal=True, replicas=None, seed=None, dtype=np.uint8, **kwargs):
+	if replicas:
+		model = Ensemble2D(dim, replicas, VonNeumannNeighborhood, toroidal, seed, dtype)
+	elif toroidal:
+		model = VonCA_t(dim, dtype)
 	else:
-		model = VonCA_t(dim)
+		model = VonCA(dim, dtype)
 	
 	model.set_rule(ForestFire(**kwargs))
 
 	model.initialize_random_bin(0.5)
 	return model
+
+
+def life_like(dim, rule='B3/S23', neighborhood='moore', toroidal=True, replicas=None, seed=None, dtype=np.uint8):
+    """
+    Life-like or Generations CA of any rulestring (see LifeLike), e.g.
+        life_like([128, 128], 'B36/S23')   HighLife
+        life_like([128, 128], 'B2/S/C3')   Brian's brain
+    Half of the cells start alive.
+    """
+    neighborhood_class = {'moore' : MooreNeighborhood, 'von_neumann' : VonNeumannNeighborhood}[neighborhood]
+    if replicas:
+        model = Ensemble2D(dim, replicas, neighborhood_class, toroidal, seed, dtype)
+    elif neighborhood == 'moore':
+        model = MooreCA_t(dim, dtype) if toroidal else MooreCA(dim, dtype)
+    else:
+        model = VonCA_t(dim, dtype) if toroidal else VonCA(dim, dtype)
+
+    model.set_rule(LifeLike(rule))
+    model.initialize_random_bin(0.5)
+    return model
+
+
+def larger_than_life(dim, rule='R5,C0,M1,S34..58,B34..45,NM', toroidal=True, dtype=np.uint8):
+    """
+    Larger than Life CA of a Golly rulestring (see LargerThanLife) on a RadiusCA,
+    whose neighbor counts cost the same for every radius. Half of the cells start alive.
+    """
+    ltl = LargerThanLife(rule)
+    model = RadiusCA(dim, ltl.radius, ltl.shape, toroidal, dtype)
+    model.set_rule(ltl)
+    model.initialize_random_bin(0.5)
+    return model
+
+
+def lenia(dim, radius=13, peaks=(1,), method='auto', dtype=np.float64, **kwargs):
+    """
+    Lenia CA (see Lenia) on a KernelCA with a smooth ring kernel (see lenia_kernel);
+    wide kernels are applied by FFT. States start uniformly random from 0 to 1.
+    """
+    model = KernelCA(dim, lenia_kernel(radius, peaks), method, dtype)
+    model.set_rule(Lenia(**kwargs))
+    model.initialize_random()
+    return model
+
+
+def hashlife(dim, rule='B3/S23'):
+    """
+    HashLife engine of a Life-like rule (see HashLife) on an unbounded plane, seeded
+    with a random dim-shaped patch of which half of the cells are alive. It is not a
+    CA2D: it is advanced with step(generations) and read with cells or to_array.
+    """
+    birth, survive, states = parse_rulestring(rule)
+    assert(states == 2), "HashLife only runs two state Life-like rules"
+    model = HashLife(birth=birth, survive=survive)
+    model.load(np.random.random(dim) < 0.5)
+    return model
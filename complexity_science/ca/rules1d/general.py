@@ -0,0 +1,97 @@
+import numpy as np
+
+
+def rule_digits(number, base, length):
+    """
+    Digits of a rule number in a base, least significant first
+        digits[i] = new state of neighborhood code (or sum) i
+    """
+    assert(0 <= number < base**length), "Rule number out of range"
+    digits = np.zeros(length, dtype=np.int64)
+    for i in range(length):
+        number, digits[i] = divmod(number, base)
+    return digits
+
+
+class _WindowRule:
+    #next state of a cell only depends on its neighborhood, without random draws
+    local = True
+    deterministic = True
+
+    def __init__(self, rule, states=2, radius=1):
+        self.states = states
+        self.radius = radius
+        self.set_rule(rule)
+
+    def set_rule(self, rule):
+        """
+        Parameters:
+            rule = rule number (digits in base states, least significant first) or table
+        """
+        length = self.table_length()
+        if isinstance(rule, (int, np.integer)):
+            self.rule_number = int(rule)
+            self.table = rule_digits(int(rule), self.states, length).astype(np.uint8 if self.states <= 256 else np.int64)
+        else:
+            self.rule_number = None
+            self.table = np.asarray(rule)
+            assert(self.table.shape == (length,)), "The table of this rule needs %d entries" % length
+        assert(self.table.min() >= 0 and self.table.max() < self.states), "Table entries must be states"
+        self._typed_tables = {}
+
+    def update_parameters(self, **kwargs):
+        if 'rule' in kwargs:
+            self.set_rule(kwargs['rule'])
+
+    def _typed(self, dtype):
+        table = self._typed_tables.get(dtype)
+        if table is None:
+            table = self._typed_tables[dtype] = self.table.astype(dtype)
+        return table
+
+
+class LookupRule(_WindowRule):
+    def __init__(self, rule, states=2, radius=1):
+        """
+        General k-state, radius-r 1D rule given by a lookup table of k**(2r+1) entries,
+            new state = table[base-k code of the cells i-r .. i+r]
+        with the leftmost cell as the most significant digit, so LookupRule(n) is Wolfram(n).
+        Needs a Neighborhood1D (CA_r).
+        -------------
+        Parameters:
+            rule = rule number or table of k**(2r+1) states
+            states = number of states k
+            radius = radius r
+        """
+        _WindowRule.__init__(self, rule, states, radius)
+
+    def table_length(self):
+        length = self.states**(2*self.radius+1)
+        assert(length <= 2**26), "The lookup table of %d states and radius %d is too large" % (self.states, self.radius)
+        return length
+
+    def apply(self, current, neighbors):
+        return self._typed(current.dtype).take(neighbors.codes(self.states))
+
+
+class Totalistic(_WindowRule):
+    def __init__(self, rule, states=2, radius=1):
+        """
+        Totalistic k-state, radius-r 1D rule: the new state only depends on the sum of
+        the cells i-r .. i+r (center included),
+            new state = table[sum]
+        with (2r+1)(k-1)+1 entries. Sums come from prefix sums, so a step is O(N)
+        whatever the radius. Needs a Neighborhood1D (CA_r).
+        -------------
+        Parameters:
+            rule = rule code (digits in base states, least significant first) or table
+            states = number of states k
+            radius = radius r
+        """
+        _WindowRule.__init__(self, rule, states, radius)
+
+    def table_length(self):
+        return (2*self.radius+1)*(self.states-1)+1
+
+    def apply(self, current, neighbors):
+        return self._typed(current.dtype).take(neighbors.sums())
@@ -1,155 +1,79 @@
 import numpy as np
 
+from ..ca.buffers import BufferPool
+
 class Wolfram:
+    #next state of a cell only depends on its neighborhood, without random draws
+    local = True
+    deterministic = True
+    #transition table indexed by (center, 2*left + right), see ca.fusion
+    table_context = 'left_right'
+
     def __init__(self, rule_number = None):
-        self.rules = []
+        """
+        Elementary (2-state, radius 1) cellular automata rule
+        -------------
+        Parameters:
+            rule_number = values from (0-255). Refer to wolfram's rule numbers
+        """
+        self.buffers = BufferPool()
         self.set_rule(rule_number)
 
     def set_rule(self, number):
-        wolfram_options = [Bit128(), Bit64(), Bit32(), Bit16(),
-                           Bit8(), Bit4(), Bit2(), Bit1()]
-
+        """
+        Builds the 8-entry transition table of the rule number.
+            table[4*left + 2*center + right] = new state
+        -------------
+        Parameters:
+            number = values from (0-255)
+        """
         rule_in_binary = self._bin_convert(number)
+        self.rule_number = number
+        self.table = np.array([int(x) for x in reversed(rule_in_binary)], dtype=np.uint8)
+        self._typed_tables = {}
 
-        rule = np.array([int(x) for x in list(rule_in_binary)]) 
-        
-        for i, j in enumerate(rule):
-            if j==1:
-                self.rules.append(wolfram_options[i])
+    def state_table(self):
+        """
+        Returns:
+            table = (2, 4) array, table[center, 2*left + right] = new state
+        """
+        return self.table.reshape(2, 2, 2).transpose(1, 0, 2).reshape(2, 4)
 
     def _bin_convert(self, rule_num):
         return format(rule_num, '08b')
 
-    def apply(self, current, neighbors_dict):
-        result = np.zeros_like(current)
-        for rule in self.rules:
-            result += rule.apply(current, neighbors_dict) 
-        return result
-
-class Bit1:
-    def __init__(self):
-        self.case_num = 0
-    
-    def apply(self, current, neighbors):
-        left = neighbors['left']
-        right = neighbors['right']
-
-        n1_state = (left==0)
-        n2_state = (right==0)
-        current_state = (current==0)
-    
-        result = np.logical_and(n1_state, n2_state)
-        result = np.logical_and(result, current_state).astype(int)
-        return result
-
-class Bit2:
-    def __init__(self):
-        self.case_num = 1
-        
-    def apply(self, current, neighbors):
-        left = neighbors['left']
-        right = neighbors['right']
-
-        n1_state = (left==0)
-        n2_state = (right==1)
-        current_state = (current==0)
-
-        result = np.logical_and(n1_state, n2_state)
-        result = np.logical_and(result, current_state).astype(int)
-        return result
-
-class Bit4:
-    def __init__(self):
-        self.case_num = 2
-
-    def apply(self, current, neighbors):
-        left = neighbors['left']
-        right = neighbors['right']
-
-        n1_state = (left==0)
-        n2_state = (right==0)
-        current_state = (current==1)
-
-        result = np.logical_and(n1_state, n2_state)
-        result = np.logical_and(result, current_state).astype(int)
-        return result
-
-class Bit8:
-    def __init__(self):
-        self.case_num = 3
-
-    def apply(self, current, neighbors):
-        left = neighbors['left']
-        right = neighbors['right']
-
-        n1_state = (left==0)
-        n2_state = (right==1)
-        current_state = (current==1)
-
-        result = np.logical_and(n1_state, n2_state)
-        result = np.logical_and(result, current_state).astype(int)
-        return result
+    def neighborhood_index(self, current, neighbors_dict):
+        """
+        Encodes the (left, center, right) triple of every cell as a 3-bit index
+        -------------
+        Returns:
+            index = uint8 array with values from 0 to 7
+        """
+        index = (neighbors_dict['left'] != 0).astype(np.uint8)
+        index <<= 1
+        index |= (current != 0)
+        index <<= 1
+        index |= (neighbors_dict['right'] != 0)
+        return index
 
-class Bit16:
-    def __init__(self):
-        self.case_num = 4
-
-    def apply(self, current, neighbors):
-        left = neighbors['left']
-        right = neighbors['right']
-
-        n1_state = (left==1)
-        n2_state = (right==0)
-        current_state = (current==0)
-
-        result = np.logical_and(n1_state, n2_state)
-        result = np.logical_and(result, current_state).astype(int)
-        return result
-
-class Bit32:
-    def __init__(self):
-        self.case_num = 5
-
-    def apply(self, current, neighbors):
-        left = neighbors['left']
-        right = neighbors['right']
-
-        n1_state = (left==1)
-        n2_state = (right==1)
-        current_state = (current==0)
-
-        result = np.logical_and(n1_state, n2_state)
-        result = np.logical_and(result, current_state).astype(int)
-        return result
-
-class Bit64:
-    def __init__(self):
-        self.case_num = 6
-
-    def apply(self, current, neighbors):
-        left = neighbors['left']
-        right = neighbors['right']
-
-        n1_state = (left==1)
-        n2_state = (right==0)
-        current_state = (current==1)
-
-        result = np.logical_and(n1_state, n2_state)
-        result = np.logical_and(result, current_state).astype(int)
-        return result
-
-class Bit128:
-    def __init__(self):
-        self.case_num = 7
-
-    def apply(self, current, neighbors):
-        left = neighbors['left']
-        right = neighbors['right']
-
-        n1_state = (left==1)
-        n2_state = (right==1)
-        current_state = (current==1)
-
-        result = np.logical_and(n1_state, n2_state)
-        result = np.logical_and(result, current_state).astype(int)
-        return result
+    def apply(self, current, neighbors_dict):
+        index = self.neighborhood_index(current, neighbors_dict)
+        return self.table.astype(current.dtype).take(index)
+
+    def apply_into(self, out, current, neighbors_dict):
+        index = self.buffers.get('index', current.shape, np.intp)
+        bit = self.buffers.get('bit', current.shape, bool)
+
+        np.not_equal(neighbors_dict['left'], 0, out=bit)
+        np.copyto(index, bit)
+        index <<= 1
+        np.not_equal(current, 0, out=bit)
+        index |= bit
+        index <<= 1
+        np.not_equal(neighbors_dict['right'], 0, out=bit)
+        index |= bit
+
+        table = self._typed_tables.get(out.dtype)
+        if table is None:
+            table = self._typed_tables[out.dtype] = self.table.astype(out.dtype)
+        return np.take(table, index, out=out, mode='clip')
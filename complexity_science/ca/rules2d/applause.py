@@ -1,5 +1,7 @@
 import numpy as np
 
+from ..ca.buffers import BufferPool, default_generator
+
 class Applause:
     def __init__(self, **kwargs):
         """
@@ -12,6 +14,8 @@ class Applause:
             beta = ;
         """
         self.default = {'a':0.5, 'b':0.3, 'alpha':1, 'beta':5}
+        self.buffers = BufferPool()
+        self.rng = None
         self.update_parameters(**kwargs)
 
     def update_parameters(self, **kwargs):
@@ -23,25 +27,66 @@ class Applause:
         self.alpha = self.default['alpha'] 
         self.beta = self.default['beta'] 
 
+    def _fraction_clapping(self, state1, neighbors):
+        """
+        Number of clapping cells over N = number of cells - 1.
+        Computed per lattice when the neighborhood has leading (replica) axes.
+        """
+        axes = getattr(neighbors, 'spatial_axes', None)
+        if axes is None:
+            return np.count_nonzero(state1)/(state1.size-1)
+
+        N = state1.shape[-2]*state1.shape[-1]-1
+        return np.count_nonzero(state1, axis=axes, keepdims=True)/N
+
     def apply(self, current, neighbors):
+        #same generator and draw order as apply_into, so buffering does not change a run
+        rng = default_generator(self)
         state0 = (current==0)
         state1 = (current==1)
-        total1 = np.sum(state1.astype(int))
-        total0 = np.sum(state0.astype(int))
-        N = current.size-1
+        clapping = self._fraction_clapping(state1, neighbors)
         
-        p01 = np.ones_like(current)*self.a*self.alpha*total1/N
-        p10 = np.ones_like(current)*self.b/(1+(self.beta*(total1/N)))
+        p01 = np.ones_like(current)*self.a*self.alpha*clapping
+        p10 = np.ones_like(current)*self.b/(1+(self.beta*clapping))
 
-        mc_die1 = np.random.random(current.shape)
-        mc_die2 = np.random.random(current.shape)
+        mc_die1 = rng.random(current.shape)
+        mc_die2 = rng.random(current.shape)
         
         p01_result = (p01 > mc_die1)
         p10_result = (p10 > mc_die2)
         
-        result1 = np.logical_and(state0, p01_result).astype(int)
-        result0 = np.logical_and(state1, p10_result).astype(int)
+        result1 = np.logical_and(state0, p01_result).astype(current.dtype)
+        result0 = np.logical_and(state1, p10_result).astype(current.dtype)
 
-        result = current-result0
+        result = current+result1-result0
 
         return result
+
+    def apply_into(self, out, current, neighbors):
+        shape = current.shape
+        rng = default_generator(self)
+        die = self.buffers.get('die', shape, float)
+        state = self.buffers.get('state', shape, bool)
+        event = self.buffers.get('event', shape, bool)
+
+        np.equal(current, 1, out=state)
+        clapping = self._fraction_clapping(state, neighbors)
+        p01 = self.a*self.alpha*clapping
+        p10 = self.b/(1+(self.beta*clapping))
+
+        np.copyto(out, current)
+
+        #Silent cells start clapping (drawn first, as in apply)
+        rng.random(out=die)
+        np.less(die, p01, out=event)
+        silent = self.buffers.get('silent', shape, bool)
+        np.equal(current, 0, out=silent)
+        event &= silent
+
+        #Clapping cells stop
+        rng.random(out=die)
+        np.less(die, p10, out=silent)
+        silent &= state
+        out += event
+        out -= silent
+        return out
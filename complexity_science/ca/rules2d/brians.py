@@ -1,11 +1,28 @@
 import numpy as np
 
+from ..ca.buffers import BufferPool
+from .life_like import generations_table
+
 class BriansBrain:
+    #next state of a cell only depends on its neighborhood, without random draws
+    local = True
+    deterministic = True
+    #transition table indexed by (state, firing neighbors), see ca.fusion
+    table_context = 'count_1'
+
+    def __init__(self):
+        self.buffers = BufferPool()
+
+    def state_table(self):
+        """
+        Returns:
+            table = (3, 9) array, table[state, firing neighbors] = new state
+        """
+        return generations_table(birth=(2,), survive=(), states=3)
+
     def apply(self, current, neighbors):
         result = np.zeros_like(current)
-        sum_one = np.zeros_like(current)
-        for key in neighbors:
-            sum_one += (neighbors[key]==1).astype(int)
+        sum_one = neighbors.count(1)
 
         current_state = current.copy()
         zero = (current_state ==0)
@@ -14,5 +31,22 @@ class BriansBrain:
         current_state[current_state==1] = 2
 
         result += current_state
-        result += np.logical_and(zero, two_1).astype(int)
+        result += np.logical_and(zero, two_1).astype(current.dtype)
         return result
+
+    def apply_into(self, out, current, neighbors):
+        shape = current.shape
+        sum_one = neighbors.count(1, out=self.buffers.get('sum_one', shape, np.uint8))
+        born = self.buffers.get('born', shape, bool)
+        state = self.buffers.get('state', shape, bool)
+
+        #ready (0) with two firing neighbors fires, firing (1) becomes refractory (2), refractory rests
+        np.equal(sum_one, 2, out=born)
+        np.equal(current, 0, out=state)
+        born &= state
+        np.equal(current, 1, out=state)
+
+        np.copyto(out, state)
+        out *= 2
+        out += born
+        return out
@@ -1,6 +1,11 @@
 import numpy as np
 
+from ..ca.buffers import BufferPool, default_generator
+
 class ForestFire:
+	#next state of a cell only depends on its neighborhood and its own random draws
+	local = True
+
 	def __init__(self, **kwargs):
 		"""
 		Initialize a forest fire rule with default parameters
@@ -11,6 +16,8 @@ class ForestFire:
 		2 = burning
 		"""
 		self.default = {'grow':0.01, 'ignite': 0.01}
+		self.buffers = BufferPool()
+		self.rng = None
 		self.update_parameters(**kwargs)
 
 	def update_parameters(self, **kwargs):
@@ -21,31 +28,62 @@ class ForestFire:
 		self.ignite = self.default['ignite']
 
 	def apply(self, current, neighbors):
+		#same generator and draw order as apply_into, so buffering does not change a run
+		rng = default_generator(self)
 		basis = current.copy()
 		result = np.zeros_like(current)	
 		
 		#Grow tree
 		empty = (basis==0).astype(int)
-		grow_tree = (np.random.random(current.shape) < self.grow).astype(int)
+		grow_tree = (rng.random(current.shape) < self.grow).astype(int)
 		new_trees = np.logical_and(empty, grow_tree)
 
 		#Ignite tree
 		trees = (basis==1).astype(int)
-		ignite_tree = (np.random.random(current.shape) < self.ignite).astype(int)
+		ignite_tree = (rng.random(current.shape) < self.ignite).astype(int)
 		new_ignite = np.logical_and(trees, ignite_tree)
 
 		#Burn by neighbor
-		for key in neighbors:
-			sum_burning = (neighbors[key]==2).astype(int)
+		sum_burning = neighbors.count(2)
 
 		#Sum burn by neighbor and new ignited
 		burn_by_neighbor = np.logical_and(trees, sum_burning)
 
 		new_fire = np.logical_or(burn_by_neighbor, new_ignite)
 		
-		burning = (basis==2).astype(int)*-2
+		burning = (basis==2).astype(current.dtype)*2
 
-		result = basis+new_trees+new_fire+burning
+		result = basis+new_trees+new_fire-burning
 
 		return result
 
+	def apply_into(self, out, current, neighbors):
+		shape = current.shape
+		rng = default_generator(self)
+		die = self.buffers.get('die', shape, float)
+		trees = self.buffers.get('trees', shape, bool)
+		fire = self.buffers.get('fire', shape, bool)
+		event = self.buffers.get('event', shape, bool)
+
+		#Grow tree
+		rng.random(out=die)
+		np.less(die, self.grow, out=event)
+		np.equal(current, 0, out=trees)
+		event &= trees
+
+		#Ignite tree, by neighbor or at random
+		sum_burning = neighbors.count(2, out=self.buffers.get('sum_burning', shape, np.uint8))
+		np.greater(sum_burning, 0, out=fire)
+		rng.random(out=die)
+		np.less(die, self.ignite, out=trees)
+		fire |= trees
+		np.equal(current, 1, out=trees)
+		fire &= trees
+
+		#Burning cells become empty
+		np.equal(current, 1, out=trees)
+		np.copyto(out, trees)
+		out += fire
+		out += event
+		return out
+
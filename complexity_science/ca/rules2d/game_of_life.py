@@ -1,11 +1,27 @@
 import numpy as np
 
+from ..ca.buffers import BufferPool
+from .life_like import generations_table
+
 class GameOfLife:
-    def apply(self, current, neighbors):
-        total_neighbors = np.zeros_like(current)
+    #next state of a cell only depends on its neighborhood, without random draws
+    local = True
+    deterministic = True
+    #transition table indexed by (state, live neighbors), see ca.fusion
+    table_context = 'count_1'
+
+    def __init__(self):
+        self.buffers = BufferPool()
+
+    def state_table(self):
+        """
+        Returns:
+            table = (2, 9) array, table[state, live neighbors] = new state
+        """
+        return generations_table(birth=(3,), survive=(2, 3))
 
-        for key in neighbors:
-            total_neighbors += neighbors[key]
+    def apply(self, current, neighbors):
+        total_neighbors = neighbors.sum()
 
         result = np.zeros_like(current)
         state = current.copy()
@@ -19,12 +35,28 @@ class GameOfLife:
         more_three = (total_neighbors >3)
         two_or_three = np.logical_or(two,three)
 
-        result += np.logical_and(live, two_or_three).astype(int)
-        result += np.logical_and(dead, three).astype(int)
+        result += np.logical_and(live, two_or_three).astype(current.dtype)
+        result += np.logical_and(dead, three).astype(current.dtype)
 
-        state -= np.logical_and(live, less_two).astype(int)
-        state -= np.logical_and(live, more_three).astype(int)
+        state -= np.logical_and(live, less_two).astype(current.dtype)
+        state -= np.logical_and(live, more_three).astype(current.dtype)
 
-        result = np.logical_or(result, state).astype(int)
+        result = np.logical_or(result, state).astype(current.dtype)
 
         return result
+
+    def apply_into(self, out, current, neighbors):
+        shape = current.shape
+        total_neighbors = neighbors.count(1, out=self.buffers.get('total', shape, np.uint8))
+        survive = self.buffers.get('survive', shape, bool)
+        birth = self.buffers.get('birth', shape, bool)
+
+        #live cell with two neighbors survives, any cell with three neighbors lives
+        np.equal(current, 1, out=survive)
+        np.equal(total_neighbors, 2, out=birth)
+        survive &= birth
+        np.equal(total_neighbors, 3, out=birth)
+        survive |= birth
+
+        np.copyto(out, survive)
+        return out
@@ -0,0 +1,76 @@
+import numpy as np
+
+from ..ca.buffers import BufferPool
+
+
+def lenia_kernel(radius=13, peaks=(1,)):
+    """
+    Smooth ring kernel of Lenia, normalized to sum 1. The distance d/radius from the
+    center is split into len(peaks) concentric shells, each a bump
+        peak*exp(4 - 1/(r*(1-r)))
+    of the position r in the shell, zero at its edges
+    -------------
+    Parameters:
+        radius = radius of the kernel in cells
+        peaks = heights of the shells, from the center outwards
+    -------------
+    Returns:
+        kernel = (2*radius+1, 2*radius+1) float64 array
+    """
+    y, x = np.mgrid[-radius:radius+1, -radius:radius+1]
+    distance = np.sqrt(x**2 + y**2)/radius*len(peaks)
+    shell = np.minimum(distance.astype(int), len(peaks)-1)
+    r = distance - shell
+    inside = (distance < len(peaks)) & (r > 0) & (r < 1)
+
+    kernel = np.zeros(distance.shape)
+    kernel[inside] = np.asarray(peaks, dtype=float)[shell[inside]]*np.exp(4 - 1/(r[inside]*(1-r[inside])))
+    return kernel/kernel.sum()
+
+
+class Lenia:
+    #no random draws; the state of a cell only depends on its kernel neighborhood
+    local = True
+    deterministic = True
+
+    def __init__(self, **kwargs):
+        """
+        Continuous Lenia rule on states from 0 to 1, for a KernelCA whose kernel sums to 1
+        (see lenia_kernel):
+            next state = clip(state + dt*(2*exp(-(u-mu)**2/(2*sigma**2)) - 1), 0, 1)
+        where u = neighbors.sum() is the kernel weighted mean of the neighborhood
+        ---------------
+        Parameters
+            mu = 0.15: potential u of maximal growth
+            sigma = 0.015: width of the growth bump
+            dt = 0.1: time step
+        """
+        self.default = {'mu' : 0.15,
+                        'sigma' : 0.015,
+                        'dt' : 0.1}
+        self.buffers = BufferPool()
+        self.update_parameters(**kwargs)
+
+    def update_parameters(self, **kwargs):
+        for key, value in kwargs.items():
+            self.default[key] = value
+
+        self.mu = self.default['mu']
+        self.sigma = self.default['sigma']
+        self.dt = self.default['dt']
+
+    def apply(self, current, neighbors):
+        potential = neighbors.sum()
+        growth = 2*np.exp(-(potential-self.mu)**2/(2*self.sigma**2)) - 1
+        return np.clip(current + self.dt*growth, 0, 1).astype(current.dtype, copy=False)
+
+    def apply_into(self, out, current, neighbors):
+        growth = neighbors.sum(out=self.buffers.get('growth', current.shape, np.float64))
+        growth -= self.mu
+        np.square(growth, out=growth)
+        growth *= -1/(2*self.sigma**2)
+        np.exp(growth, out=growth)
+        growth *= 2*self.dt
+        growth += current
+        growth -= self.dt
+        return np.clip(growth, 0, 1, out=out, casting='unsafe')
@@ -0,0 +1,155 @@
+import re
+
+import numpy as np
+
+from ..ca.fusion import TableRule
+
+#named rulestrings
+RULESTRINGS = {'life' : 'B3/S23',
+               'highlife' : 'B36/S23',
+               'day_and_night' : 'B3678/S34678',
+               'seeds' : 'B2/S',
+               'life_without_death' : 'B3/S012345678',
+               'diamoeba' : 'B35678/S5678',
+               'brians_brain' : 'B2/S/C3',
+               'star_wars' : 'B2/S345/C4'}
+
+
+def _digits(text, rulestring):
+    assert(text.isdigit() or text == ''), "Invalid rulestring %r" % rulestring
+    return tuple(sorted(set(int(d) for d in text)))
+
+
+def parse_rulestring(rulestring):
+    """
+    Parses a Life-like or Generations rulestring, e.g.
+        'B3/S23', 'S23/B3', '23/3' (survive/birth)
+        'B2/S/C3', '/2/3' (survive/birth/states)
+    or a name of RULESTRINGS
+    -------------
+    Returns:
+        birth = neighbor counts that turn a dead cell alive
+        survive = neighbor counts that keep a live cell alive
+        states = number of states (2 for Life-like rules)
+    """
+    text = RULESTRINGS.get(rulestring, rulestring).replace(' ', '').upper()
+    #'B3S23' is 'B3/S23'
+    text = re.sub(r'(?<=[0-9])(?=[BSCG])', '/', text)
+    parts = text.split('/')
+    if all(part[:1].isdigit() or part == '' for part in parts):
+        assert(len(parts) in (2, 3)), "Invalid rulestring %r" % rulestring
+        survive, birth = _digits(parts[0], rulestring), _digits(parts[1], rulestring)
+        states = int(parts[2]) if len(parts) == 3 else 2
+    else:
+        fields = {}
+        for part in parts:
+            assert(part[:1] in ('B', 'S', 'C', 'G') and part[:1] not in fields), "Invalid rulestring %r" % rulestring
+            fields[part[:1]] = part[1:]
+        birth = _digits(fields.get('B', ''), rulestring)
+        survive = _digits(fields.get('S', ''), rulestring)
+        states = int(fields.get('C', fields.get('G', '2')) or 2)
+
+    assert(all(n <= 8 for n in birth+survive)), "Neighbor counts go from 0 to 8"
+    assert(2 <= states <= 256), "Generations rules have 2 to 256 states"
+    return birth, survive, states
+
+
+def generations_table(birth, survive, states=2, max_neighbors=8):
+    """
+    Transition table of a Generations rule, indexed by (state, live neighbors).
+    State 0 is dead, 1 is alive and 2 to states-1 are dying: a live cell that does
+    not survive starts dying (or dies when states == 2) and dying cells age by one
+    step until they are dead. Only live neighbors (state 1) are counted.
+    -------------
+    Returns:
+        table = (states, max_neighbors+1) uint8 array
+    """
+    table = np.zeros([states, max_neighbors+1], dtype=np.uint8)
+    table[0, list(birth)] = 1
+    table[1, :] = 2 if states > 2 else 0
+    table[1, list(survive)] = 1
+    for state in range(2, states):
+        table[state, :] = state+1 if state+1 < states else 0
+    return table
+
+
+class LifeLike(TableRule):
+    def __init__(self, rule='B3/S23'):
+        """
+        Life-like (birth/survive) or Generations rule evaluated as one table lookup
+        per cell, next state = table[state, live neighbors] (see generations_table).
+        Works with Moore and Von Neumann neighborhoods and with ensembles; states must
+        be integers from 0 to states-1, ideally stored as uint8.
+        -------------
+        Parameters:
+            rule = rulestring, e.g. 'B36/S23' or 'B2/S/C3', or a name of RULESTRINGS
+        """
+        self.set_rule(rule)
+
+    def set_rule(self, rule):
+        self.rule = rule
+        self.birth, self.survive, self.states = parse_rulestring(rule)
+        TableRule.__init__(self, generations_table(self.birth, self.survive, self.states), 'count_1', rule)
+
+    def update_parameters(self, **kwargs):
+        if 'rule' in kwargs:
+            self.set_rule(kwargs['rule'])
+
+
+def parse_larger_than_life(rulestring):
+    """
+    Parses a Larger than Life rulestring in Golly's notation, e.g. Bosco's rule
+        'R5,C0,M1,S34..58,B34..45,NM'
+    R = radius, C = states (0 and 2 mean 2), M = 1 if the cell counts itself,
+    S and B = survive and birth ranges of live counts, N = M (Moore) or N (Von Neumann)
+    -------------
+    Returns:
+        dictionary of radius, states, middle, survive, birth and shape
+    """
+    fields = {}
+    for part in rulestring.replace(' ', '').upper().split(','):
+        assert(part[:1] in 'RCMSBN' and part[:1] not in fields and len(part) > 1), "Invalid rulestring %r" % rulestring
+        fields[part[:1]] = part[1:]
+
+    def bounds(text):
+        low, high = text.split('..') if '..' in text else (text, text)
+        return int(low), int(high)
+
+    assert('R' in fields), "Larger than Life rules need a radius"
+    return {'radius' : int(fields['R']),
+            'states' : max(2, int(fields.get('C', '0'))),
+            'middle' : int(fields.get('M', '0')),
+            'survive' : bounds(fields.get('S', '1..0')),
+            'birth' : bounds(fields.get('B', '1..0')),
+            'shape' : {'M' : 'moore', 'N' : 'von_neumann'}[fields.get('N', 'M')]}
+
+
+class LargerThanLife(TableRule):
+    def __init__(self, rule='R5,C0,M1,S34..58,B34..45,NM'):
+        """
+        Larger than Life rule: a dead cell is born when its live neighbor count is in
+        the birth range and a live cell survives when its count (itself included with M1)
+        is in the survive range, with Generations states as in LifeLike. Counts come from
+        a RadiusNeighborhood of the radius and shape of the rule (see RadiusCA), so a
+        step costs the same for every radius.
+        -------------
+        Parameters:
+            rule = rulestring (see parse_larger_than_life)
+        """
+        self.set_rule(rule)
+
+    def set_rule(self, rule):
+        self.rule = rule
+        fields = parse_larger_than_life(rule)
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+        r = self.radius
+        neighbors = (2*r+1)**2-1 if self.shape == 'moore' else 2*r*(r+1)
+        birth = range(max(0, self.birth[0]), min(neighbors, self.birth[1])+1)
+        survive = range(max(0, self.survive[0]-self.middle), min(neighbors, self.survive[1]-self.middle)+1)
+        TableRule.__init__(self, generations_table(birth, survive, self.states, neighbors), 'count_1', rule)
+
+    def update_parameters(self, **kwargs):
+        if 'rule' in kwargs:
+            self.set_rule(kwargs['rule'])
@@ -1,6 +1,17 @@
 import numpy as np
 
+from ..ca.buffers import BufferPool
+
+
+def _weight(neighbors):
+    #total weight of the neighbors: the sum of a kernel (KernelNeighborhood) or their number
+    weight = getattr(neighbors, 'weight', None)
+    return len(neighbors) if weight is None else weight
+
 class MPA:
+    #no random draws; not local because the harvest field covers the whole lattice
+    deterministic = True
+
     def __init__(self, dim, percent_mpa, **kwargs):
         """
         Initializes an logistic growth, harvest and diffusion rule to an marine area;
@@ -13,7 +24,9 @@ class MPA:
                        beta < 1 means sustainable harvest method)
             D = 25: diffusion rate
             dt = 0.001: time step
-            alpha = D*dt : 
+            alpha = D*dt : diffusion weight of every neighbor; alpha*len(neighbors) must stay below 1,
+                           so wide neighborhoods (RadiusCA) need a small D; kernel
+                           neighborhoods (KernelCA) use the sum of the kernel
         """
         self.default = {'dt' : 0.01,
                         'beta' : 1,
@@ -21,6 +34,7 @@ class MPA:
                         'gamma' : 1
                         }
         self.dim = dim
+        self.buffers = BufferPool()
         self.default['percent_mpa'] = percent_mpa
         self.update_parameters(**kwargs)
 
@@ -48,17 +62,43 @@ class MPA:
 
     def apply(self, current, neighbors):
         #DIFFUSION
-        total_neighbors = np.zeros_like(current)
-        for key in neighbors:
-            total_neighbors += neighbors[key]
+        total_neighbors = neighbors.sum()
 
-        current = current*(1-(4*self.alpha))+self.alpha*total_neighbors
+        current = current*(1-(_weight(neighbors)*self.alpha))+self.alpha*total_neighbors
 
         #GROWTH
-        result = current/(current +(1-current)*np.exp(-self.dt))
+        result = current/(current +(1-current)*float(np.exp(-self.dt)))
 
         #HARVEST
-        harvest = self.gammafield*self.dt*np.exp(self.beta*np.log(current))
+        harvest = np.exp(self.beta*np.log(current))
+        harvest *= self.gammafield
+        harvest *= self.dt
         result -= harvest
 
         return result
+
+    def apply_into(self, out, current, neighbors):
+        shape = current.shape
+        total_neighbors = neighbors.sum(out=self.buffers.get('total', shape, current.dtype))
+        diffused = self.buffers.get('diffused', shape, current.dtype)
+
+        #DIFFUSION
+        np.multiply(current, 1-(_weight(neighbors)*self.alpha), out=diffused)
+        total_neighbors *= self.alpha
+        diffused += total_neighbors
+
+        #GROWTH
+        growth = np.exp(-self.dt)
+        denominator = np.multiply(diffused, 1-growth, out=total_neighbors)
+        denominator += growth
+        np.divide(diffused, denominator, out=out)
+
+        #HARVEST
+        harvest = np.log(diffused, out=total_neighbors)
+        harvest *= self.beta
+        np.exp(harvest, out=harvest)
+        harvest *= self.gammafield
+        harvest *= self.dt
+        out -= harvest
+
+        return out
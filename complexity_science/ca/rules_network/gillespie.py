@@ -10,7 +10,11 @@ class SIRC_Gillespie:
 		R - Recovered
         ---------------
         Parameters
-
+            tau = None: exact Gillespie step (one event per node per step);
+                  a positive value switches to tau-leaping with step size tau
+            coupling = 0: fraction of the infection pressure of a node that comes from the
+                       mean infectious fraction of its neighbors (Adjacency.neighbor_mean);
+                       0 keeps the nodes independent
 		---------------
 		Returns : None
         """
@@ -27,7 +31,9 @@ class SIRC_Gillespie:
                         'gamma_c' : 0.87,
                         'gamma_i' : 0.03,
                         'q' : 0.1,
-                        'update_matrix' : self.update_matrix
+                        'update_matrix' : self.update_matrix,
+                        'tau' : None,
+                        'coupling' : 0
                         }
 
         self.update_parameters(**kwargs)
@@ -43,10 +49,29 @@ class SIRC_Gillespie:
         self.gamma_i = self.default['gamma_i']
         self.q = self.default['q']
         self.update_matrix = self.default['update_matrix']
+        self.tau = self.default['tau']
+        self.coupling = self.default['coupling']
 
-    def compute_prob(self, population):
+    def compute_prob(self, population, adj=None):
+        """
+        Propensities of the four reactions
+        -------------
+        Parameters:
+            population = populations of one node (4,) or of every node (4, N)
+            adj = Adjacency of the nodes, used when coupling > 0
+        -------------
+        Returns:
+            p = propensities with the same trailing shape as population
+        """
         #simple normalization
-        s_i = self.beta*(population[1]/population.sum() + ((1-self.q)*population[2]/population.sum()))*population[0] 
+        total = population.sum(axis=0)
+        safe_total = np.where(total > 0, total, 1)
+        infectious = (population[1] + (1-self.q)*population[2])/safe_total
+        if self.coupling and adj is not None:
+            #nodes without neighbors only feel their own infectious fraction
+            neighbors = np.where(adj.degree() > 0, adj.neighbor_mean(infectious), infectious)
+            infectious = (1-self.coupling)*infectious + self.coupling*neighbors
+        s_i = self.beta*infectious*population[0]
         i_c = self.alpha*population[1]
         i_r = self.gamma_i*population[1]*(1-self.alpha)
         c_r = self.gamma_c*population[2]
@@ -55,16 +80,57 @@ class SIRC_Gillespie:
         return p
 
     def apply(self, current, adj):
-        for i in range(len(current[0])):
-            prob = self.compute_prob(current[:,i])
-            if prob.sum()==0:
-                dt = 100
-                pass
-            else:
-                r = prob/prob.sum()
-                choice = np.random.choice([0,1,2,3], p=r)
-                current[:,i] = current[:,i]+self.update_matrix[choice]
-                dt = (1/prob.sum()) * np.log(1/np.random.random())
+        if self.tau:
+            return self.tau_leap(current, self.tau, adj)
+
+        prob = self.compute_prob(current, adj)
+        total = prob.sum(axis=0)
+        active = total > 0
+
+        #one event per node, chosen with probability prob/total
+        u = np.random.random(total.shape)*total
+        choice = (np.cumsum(prob, axis=0) <= u).sum(axis=0)
+        choice = np.minimum(choice, len(prob)-1)
+        current[...] = current + self.update_matrix[choice].T*active
+
+        #time step of the last node, as in the node by node implementation
+        if active[-1]:
+            dt = (1/total[-1]) * np.log(1/np.random.random())
+        else:
+            dt = 100
         self.t += dt
 
         return current
+
+    def tau_leap(self, current, tau, adj=None):
+        """
+        Approximate step: every reaction of every node fires a Poisson(propensity*tau) number of times.
+        Reaction counts are scaled down where they would consume more individuals than a node has,
+        so populations never become negative.
+        -------------
+        Parameters:
+            current = populations of every node (4, N)
+            tau = step size
+            adj = Adjacency of the nodes (see coupling)
+        -------------
+        Returns:
+            current = updated populations
+        """
+        prob = self.compute_prob(current, adj)
+        events = np.random.poisson(prob*tau).astype(float)
+
+        consumed = np.maximum(-self.update_matrix, 0)
+        for species in range(consumed.shape[1]):
+            consumers = consumed[:, species] > 0
+            if not consumers.any():
+                continue
+            used = (consumed[consumers, species][:, None]*events[consumers]).sum(axis=0)
+            over = used > current[species]
+            if over.any():
+                scale = np.where(over, current[species]/np.maximum(used, 1), 1)
+                events[consumers] = np.floor(events[consumers]*scale)
+
+        current[...] = current + self.update_matrix.T @ events
+        self.t += tau
+
+        return current
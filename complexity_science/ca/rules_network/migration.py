@@ -0,0 +1,38 @@
+import numpy as np
+
+class Migration:
+    def __init__(self, **kwargs):
+        """
+        Migration between neighboring nodes
+        Every step each node sends a fraction of every compartment, split equally
+        over its neighbors. Nodes without neighbors keep their population.
+        ---------------
+        Parameters
+            rate = fraction of the population of a node that migrates per step
+            dt = time added per step
+        ---------------
+        Returns : None
+        """
+        self.default = {'rate' : 0.1,
+                        'dt' : 1
+                        }
+
+        self.update_parameters(**kwargs)
+        self.t = 0
+
+    def update_parameters(self, **kwargs):
+        for key, value in kwargs.items():
+            self.default[key] = value
+
+        self.rate = self.default['rate']
+        self.dt = self.default['dt']
+
+    def apply(self, current, adj):
+        assert(current.dtype.kind == 'f'), "Migration moves fractions of a population and needs floating point states"
+        degree = adj.degree()
+        outflow = current*self.rate*(degree > 0)
+        share = np.divide(outflow, degree, out=np.zeros(outflow.shape), where=degree > 0)
+        inflow = adj.neighbor_sum(share, transpose=True)
+        self.t += self.dt
+
+        return (current - outflow + inflow).astype(current.dtype, copy=False)
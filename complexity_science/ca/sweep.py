@@ -0,0 +1,171 @@
+import inspect
+import itertools
+import os
+import warnings
+
+import numpy as np
+
+
+def parameter_grid(param_grid):
+    """
+    Cartesian product of a parameter grid
+    -------------
+    Parameters:
+        param_grid = dictionary of parameter name : list of values
+    -------------
+    Returns:
+        list of dictionaries, one per parameter combination
+    """
+    keys = list(param_grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*[param_grid[key] for key in keys])]
+
+
+def _run_task(task):
+    """
+    Runs one (parameters, replica) task in a worker and writes its collected data
+    into row task['index'] of the shared result table.
+    """
+    np.random.seed(task['seed'])
+    model = task['factory'](task['dim'], **task['factory_kwargs'])
+    if task['rule_kwargs']:
+        model.modify_rule(**task['rule_kwargs'])
+
+    data = model.run_collect(task['iteration'], task['steady_state'], task['collector'])
+
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name=task['shm_name'])
+    try:
+        table = np.ndarray(task['shape'], dtype=np.float64, buffer=shm.buf)
+        table[task['index']] = np.asarray(data, dtype=np.float64)
+    finally:
+        shm.close()
+    return task['index']
+
+
+def sweep(factory, dim, param_grid, replicas=1, iteration=100, steady_state=False,
+          collector={'mean':np.average}, model_kwargs=None, processes=None, seed=None, retries=1):
+    """
+    Runs factory(dim) for every parameter combination and replica on a process pool.
+
+    Parameters that are arguments of the factory are passed to it, every other
+    parameter is set with model.modify_rule. Each task is seeded from its own
+    SeedSequence child of seed, so results do not depend on scheduling.
+    Workers write their collected data straight into a shared memory table.
+
+    If a worker process dies, finished results are kept and the unfinished tasks
+    are resubmitted to a new pool up to `retries` times; tasks that still fail
+    are left as NaN and reported with a single RuntimeWarning. Their indices are
+    also kept in data.attrs['failed'].
+    -------------
+    Parameters:
+        factory = model factory, e.g. models2d.applause or models1d.wolfram (must be picklable)
+        dim = first argument of the factory (dimension or number of cells)
+        param_grid = dictionary of parameter name : list of values
+        replicas = number of independent runs per parameter combination
+        iteration = number of iterations of run_collect
+        steady_state = collect only the final state if True
+        collector = data reduction (sum, mean, max, min, std, etc); must return scalars
+        model_kwargs = fixed keyword arguments of the factory
+        processes = number of worker processes, default is every core
+        seed = seed of the sweep
+        retries = number of times unfinished tasks are resubmitted after a worker crash
+    -------------
+    Returns:
+        data = DataFrame indexed by (parameters..., replica, step) with one column per collector
+    """
+    assert('all' not in collector), "sweep only supports collectors that return scalars"
+    model_kwargs = model_kwargs or {}
+    factory_arguments = inspect.signature(factory).parameters
+
+    combinations = parameter_grid(param_grid)
+    num_tasks = len(combinations)*replicas
+    num_steps = 1 if steady_state else iteration
+    shape = (num_tasks, num_steps, len(collector))
+    seeds = np.random.SeedSequence(seed).spawn(num_tasks)
+
+    tasks = []
+    for i, (params, replica) in enumerate(itertools.product(combinations, range(replicas))):
+        factory_kwargs = dict(model_kwargs)
+        rule_kwargs = {}
+        for key, value in params.items():
+            if key in factory_arguments:
+                factory_kwargs[key] = value
+            else:
+                rule_kwargs[key] = value
+
+        tasks.append({'index' : i,
+                      'factory' : factory,
+                      'dim' : dim,
+                      'factory_kwargs' : factory_kwargs,
+                      'rule_kwargs' : rule_kwargs,
+                      'seed' : int(seeds[i].generate_state(1)[0]),
+                      'iteration' : iteration,
+                      'steady_state' : steady_state,
+                      'collector' : collector,
+                      'shape' : shape})
+
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape))*8, 1))
+    try:
+        table = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        table[:] = np.nan
+        for task in tasks:
+            task['shm_name'] = shm.name
+
+        pending = list(range(num_tasks))
+        errors = {}
+        for attempt in range(retries+1):
+            pending, raised = _run_pool(tasks, pending, processes or os.cpu_count())
+            errors.update(raised)
+            if not pending:
+                break
+
+        failed = sorted(list(errors) + pending)
+        for i in failed:
+            table[i] = np.nan
+        if failed:
+            reasons = ["task %d: %r" % (i, errors[i]) for i in sorted(errors)]
+            if pending:
+                reasons.append("tasks %s: worker died" % pending)
+            warnings.warn("%d of %d sweep tasks failed (%s)" % (len(failed), num_tasks, "; ".join(reasons)),
+                          RuntimeWarning, stacklevel=2)
+
+        data = table.reshape(num_tasks*num_steps, len(collector)).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+    import pandas as pd
+    names = list(param_grid) + ['replica', 'step']
+    rows = [tuple(params.values()) + (replica, step)
+            for params, replica in itertools.product(combinations, range(replicas))
+            for step in range(num_steps)]
+    index = pd.MultiIndex.from_tuples(rows, names=names)
+    data = pd.DataFrame(data, index=index, columns=list(collector))
+    data.attrs['failed'] = failed
+    return data
+
+
+def _run_pool(tasks, pending, processes):
+    """
+    Runs the pending tasks on a new process pool.
+    -------------
+    Returns:
+        lost = task indices that did not finish because a worker died
+        errors = dictionary of task index : exception raised by the task
+    """
+    lost = []
+    errors = {}
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    with ProcessPoolExecutor(max_workers=min(processes, len(pending))) as pool:
+        futures = [(i, pool.submit(_run_task, tasks[i])) for i in pending]
+        for i, future in futures:
+            try:
+                future.result()
+            except BrokenProcessPool:
+                lost.append(i)
+            except Exception as error:
+                errors[i] = error
+
+    return lost, errors
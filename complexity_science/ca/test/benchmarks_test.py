@@ -0,0 +1,27 @@
+from complexity_science.ca.benchmarks import startup_time, main
+
+
+def test_import_does_not_load_plotting_or_pandas():
+    result = startup_time('complexity_science.ca', repeat=1)
+    assert result['loaded'] == []
+    assert len(result['runs']) == 1 and result['seconds'] > 0
+
+def test_startup_command_checks_the_budget():
+    assert main(['startup', '--repeat', '1', '--budget', '1e-9']) == 1
+
+def test_suite_results_round_trip_and_compare(tmp_path):
+    from complexity_science.ca.benchmarks import run_suite, save_results, load_results, compare
+    suite = run_suite(['wolfram', 'game', 'gillespie'], sizes=[64], iterations=[3])
+    assert [result['model'] for result in suite['results']] == ['wolfram', 'game', 'gillespie']
+    result = suite['results'][1]
+    assert result['cells'] == 64*64 and result['updates_per_second'] > 0 and result['peak_bytes'] > 0
+    assert result['latency']['p50'] <= result['latency']['p99'] <= result['latency']['max']
+
+    save_results(suite, str(tmp_path / 'baseline.json'))
+    baseline = load_results(str(tmp_path / 'baseline.json'))
+    assert not any(row['regression'] for row in compare(baseline, suite))
+
+    slower = load_results(str(tmp_path / 'baseline.json'))
+    slower['results'][0]['updates_per_second'] /= 2
+    flagged = [row for row in compare(baseline, slower) if row['regression']]
+    assert [(row['key'], row['metric']) for row in flagged] == [(('wolfram', 64, 3), 'updates_per_second')]
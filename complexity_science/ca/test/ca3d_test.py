@@ -0,0 +1,26 @@
+import numpy as np
+
+from complexity_science.ca.ca.ca3d import CA_3D
+
+
+class CountLive:
+    #next state = 1 when a cell and at least one of its 26 neighbors are alive
+    def apply(self, current, neighbors):
+        total = sum(neighbor.astype(int) for neighbor in neighbors.values())
+        return ((current == 1) & (total > 0)).astype(current.dtype)
+
+
+def test_ca3d_honors_dtype_and_evolves():
+    model = CA_3D([4, 5, 6], dtype=np.uint8)
+    assert model.cells.dtype == np.uint8 and not model.cells.any()
+    model.initialize_random_int(0, 2)
+    assert model.cells.dtype == np.uint8
+    assert len(model.neighbors) == 26
+
+    model.add_rule(CountLive())
+    before = model.cells.copy()
+    after = model.evolve()
+    assert after.dtype == np.uint8 and after.shape == (4, 5, 6)
+    assert np.all(after <= before)
+
+    assert CA_3D([3, 3, 3]).cells.dtype == np.float64
@@ -0,0 +1,64 @@
+import numpy as np
+
+from complexity_science.ca.ca.data_collector import DataCollector
+
+
+def test_collector_grows_and_builds_dataframe():
+    dc = DataCollector({'sum': np.sum}, capacity=2)
+    for i in range(10):
+        dc.collect(np.arange(i))
+    assert len(dc) == 10
+    assert list(dc.data_to_pd()['sum']) == [i*(i-1)//2 for i in range(10)]
+
+def test_collector_spills_to_disk(tmp_path):
+    states = [np.random.random(8) for i in range(30)]
+    row_bytes = 8*8 + 8
+    dc = DataCollector({'mean': np.average, 'all': 0}, capacity=30, memory_budget=4*row_bytes, spill_dir=str(tmp_path))
+    for state in states:
+        dc.collect(state)
+    assert dc.spilled > 0
+    assert np.allclose(dc.column('all'), np.stack(states))
+    assert np.allclose(dc.data_to_pd()['mean'], [state.mean() for state in states])
+
+def test_collector_keeps_mixed_int_and_float_rows(tmp_path):
+    values = [1, 1.5, np.int8(3), 2**40, -0.25]
+    dc = DataCollector({'value': 0})
+    for value in values:
+        dc.collect_values([value])
+    assert list(dc.column('value')) == values
+
+    #widened after the int rows were spilled
+    values = [1, 2, 3, 4, 1.5, -0.25]
+    dc = DataCollector({'value': 0}, capacity=2, memory_budget=16, spill_dir=str(tmp_path))
+    for value in values:
+        dc.collect_values([value])
+    assert dc.spilled > 0
+    assert list(dc.column('value')) == values
+
+def test_collector_removes_its_temporary_spill_dir(tmp_path):
+    import gc
+    import os
+
+    dc = DataCollector({'all': 0}, capacity=10, memory_budget=2*8*4)
+    for i in range(10):
+        dc.collect(np.full(4, float(i)))
+    spill_dir = dc.spill_dir
+    assert os.path.isdir(spill_dir)
+    assert np.array_equal(dc.column('all')[:, 0], np.arange(10))
+    dc.close()
+    assert not os.path.exists(spill_dir)
+
+    dc = DataCollector({'all': 0}, capacity=10, memory_budget=2*8*4)
+    for i in range(10):
+        dc.collect(np.zeros(4))
+    spill_dir = dc.spill_dir
+    del dc
+    gc.collect()
+    assert not os.path.exists(spill_dir)
+
+    #a given directory is left alone
+    dc = DataCollector({'all': 0}, capacity=10, memory_budget=2*8*4, spill_dir=str(tmp_path))
+    for i in range(10):
+        dc.collect(np.zeros(4))
+    dc.close()
+    assert os.listdir(str(tmp_path))
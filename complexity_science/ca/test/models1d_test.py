@@ -1,4 +1,132 @@
-#import ca.models1d
+import numpy as np
+
+from complexity_science.ca.models1d import general1d, wolfram
+from complexity_science.ca.rules1d.wolfram import Wolfram
+
 
 def test_sample():
     pass
+
+def test_wolfram_table_matches_rule_number():
+    left, center, right = np.meshgrid([0, 1], [0, 1], [0, 1], indexing='ij')
+    neighbors = {'left': left.ravel(), 'right': right.ravel()}
+    for number in [0, 30, 90, 110, 255]:
+        result = Wolfram(number).apply(center.ravel(), neighbors)
+        expected = [(number >> (4*l + 2*c + r)) & 1 for l, c, r in zip(left.ravel(), center.ravel(), right.ravel())]
+        assert list(result) == expected
+
+def test_wolfram_rule90_single_seed():
+    model = wolfram(9, 90)
+    model.initialize_index([4])
+    result = model.run(2, show_figure=False)
+    assert list(result[1]) == [0, 0, 0, 1, 0, 1, 0, 0, 0]
+    assert list(result[2]) == [0, 0, 1, 0, 0, 0, 1, 0, 0]
+
+def test_packed_matches_unpacked():
+    for toroidal in [True, False]:
+        model = wolfram(130, [30, 110], toroidal=toroidal)
+        packed = wolfram(130, [30, 110], toroidal=toroidal, packed=True)
+        model.initialize_index([0, 64, 129])
+        packed.initialize_index([0, 64, 129])
+        expected = model.run(50, show_figure=False)
+        result = packed.run(50, show_figure=False, unpack=True)
+        assert np.array_equal(np.array(expected), np.array(result))
+
+def test_packed_run_collect_matches_unpacked():
+    model = wolfram(100, 110)
+    packed = wolfram(100, 110, packed=True)
+    collector = {'mean': np.average, 'sum': np.sum}
+    for kwargs in [{}, {'steady_state': True}, {'detect_cycles': True, 'extrapolate': True}]:
+        np.random.seed(3)
+        model.initialize_random_int(0, 2)
+        np.random.seed(3)
+        packed.initialize_random_int(0, 2)
+        assert np.array_equal(model.cells, packed.cells)
+        expected = model.run_collect(60, collector=collector, **kwargs)
+        result = packed.run_collect(60, collector=collector, **kwargs)
+        assert np.allclose(np.array(expected, dtype=float), np.array(result, dtype=float))
+        assert model.cycle == packed.cycle
+
+    #a cycle found on the packed words is the same as on the cells
+    model = wolfram(20, 90)
+    packed = wolfram(20, 90, packed=True)
+    model.initialize_index([3])
+    packed.initialize_index([3])
+    expected = model.run_collect(60, detect_cycles=True, extrapolate=True)
+    result = packed.run_collect(60, detect_cycles=True, extrapolate=True)
+    assert packed.cycle == model.cycle == {'transient': 2, 'period': 12, 'step': 14}
+    assert np.allclose(np.array(expected, dtype=float), np.array(result, dtype=float))
+
+def test_buffered_matches_unbuffered():
+    model = wolfram(100, [30, 90, 110])
+    buffered = wolfram(100, [30, 90, 110])
+    model.initialize_binary(0.5)
+    buffered.initialize_index([0])
+    buffered.cells = model.cells.copy()
+    buffered.update_neighbors()
+    buffered.use_buffers()
+    expected = model.run(20, show_figure=False)
+    result = buffered.run(20, show_figure=False)
+    assert np.array_equal(np.array(expected), np.array(result))
+
+def test_run_streams_to_memmap(tmp_path):
+    model = wolfram(70, 30)
+    model.initialize_index([35])
+    expected = model.run(40, show_figure=False)
+    model.initialize_index([35])
+    result = model.run(40, show_figure=False, path=str(tmp_path / 'run.bin'))
+    assert isinstance(result, np.memmap) and result.dtype == np.uint8
+    assert np.array_equal(result, expected)
+
+    packed = wolfram(70, 30, packed=True)
+    packed.initialize_index([35])
+    words = packed.run(40, show_figure=False, path=str(tmp_path / 'packed.bin'))
+    assert words.shape == (41, 2)
+    assert np.array_equal([packed.unpack(row) for row in words], expected)
+
+    #float states keep their dtype on disk
+    from complexity_science.ca.ca.ca1d import CA_t
+    class Halve:
+        def apply(self, current, neighbors):
+            return current/2
+
+    model = CA_t(20)
+    model.add_rule(Halve())
+    model.initialize_random()
+    result = model.run(3, show_figure=False, path=str(tmp_path / 'float.bin'))
+    assert result.dtype == np.float64
+    assert np.array_equal(result[-1], model.cells) and not np.all(np.mod(result[-1], 1) == 0)
+
+def test_fused_wolfram_chain_matches_sequential_rules():
+    for toroidal in [True, False]:
+        fused = wolfram(101, [30, 90, 110], toroidal=toroidal)
+        sequential = wolfram(101, [30, 90, 110], toroidal=toroidal)
+        sequential.rm.fuse = False
+        fused.initialize_index([50])
+        sequential.initialize_index([50])
+        assert len(fused.rm.stages) == 1 and len(sequential.rm.stages) == 3
+        assert np.array_equal(fused.run(30, show_figure=False), sequential.run(30, show_figure=False))
+
+def test_general_rule_of_radius_one_is_wolfram():
+    for toroidal in [True, False]:
+        model = wolfram(60, 110, toroidal=toroidal)
+        general = general1d(60, 110, toroidal=toroidal)
+        model.initialize_binary(0.5)
+        general.cells = model.cells.copy()
+        general.update_neighbors()
+        assert np.array_equal(model.run(20, show_figure=False), general.run(20, show_figure=False))
+
+def test_general_and_totalistic_rules_match_brute_force():
+    for totalistic, states, radius in [(False, 3, 2), (True, 3, 4), (True, 2, 7)]:
+        length = (2*radius+1)*(states-1)+1 if totalistic else states**(2*radius+1)
+        table = np.random.randint(0, states, length)
+        model = general1d(40, table, states, radius, totalistic=totalistic)
+        model.initialize_random_int(0, states)
+        cells = model.cells.copy()
+        result = model.evolve()
+
+        window = np.pad(cells, radius, mode='wrap')
+        for i in range(40):
+            digits = window[i:i+2*radius+1]
+            index = digits.sum() if totalistic else int(''.join(map(str, digits)), states)
+            assert result[i] == table[index]
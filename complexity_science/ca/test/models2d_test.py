@@ -0,0 +1,468 @@
+import json
+
+import numpy as np
+
+from complexity_science.ca.models2d import (BriansBrain, ForestFire, GameOfLife, HashLife, KernelCA, KernelNeighborhood,
+                                          Lenia, LifeLike, RadiusCA, RadiusNeighborhood, applause, brians_brain, forest_fire,
+                                          game, hashlife, larger_than_life, lenia, lenia_kernel, life_like, mpa,
+                                          parse_larger_than_life, parse_rulestring)
+
+
+def test_buffered_matches_unbuffered():
+    for factory in [game, brians_brain, mpa]:
+        model = factory([16, 24])
+        buffered = factory([16, 24])
+        buffered.cells = model.cells.copy()
+        buffered.update_neighbors()
+        buffered.use_buffers()
+        for i in range(10):
+            model.evolve()
+            buffered.evolve()
+        assert np.allclose(model.cells, buffered.cells)
+
+    #stochastic rules draw the same numbers in the same order on both paths
+    for factory in [applause, forest_fire]:
+        runs = []
+        for buffers in [False, True]:
+            np.random.seed(5)
+            model = factory([16, 24])
+            model.use_buffers(buffers)
+            for i in range(10):
+                model.evolve()
+            runs.append(model.cells.copy())
+        assert np.array_equal(runs[0], runs[1])
+
+def test_applause_silent_cells_start_clapping():
+    from complexity_science.ca.rules2d.applause import Applause
+
+    #everybody claps but one cell: p01 = a*alpha*clapping ~ 1 and p10 = 0
+    rule = Applause(a=1, alpha=1, b=0)
+    current = np.ones([10, 10], dtype=np.uint8)
+    current[4, 4] = 0
+    model = applause([10, 10], rule_object=rule)
+    for buffers in [False, True]:
+        model.use_buffers(buffers)
+        model.cells = current.copy()
+        model.update_neighbors()
+        np.random.seed(0)
+        rule.rng = None
+        assert np.array_equal(model.evolve(), np.ones([10, 10], dtype=np.uint8))
+
+    #and nobody starts when nobody claps
+    model.cells = np.zeros([10, 10], dtype=np.uint8)
+    model.update_neighbors()
+    assert not model.evolve().any()
+
+def test_ensemble_replicas_match_single_models():
+    ensemble = game([12, 10], replicas=3, seed=0)
+    singles = []
+    for replica in ensemble.cells:
+        model = game([12, 10])
+        model.cells = replica.copy()
+        model.update_neighbors()
+        singles.append(model)
+
+    for i in range(10):
+        ensemble.evolve()
+        for model in singles:
+            model.evolve()
+
+    for replica, model in zip(ensemble.cells, singles):
+        assert np.array_equal(replica, model.cells)
+
+def test_ensemble_seed_is_reproducible():
+    first = forest_fire([16, 16], replicas=4, seed=3).run_collect(10)
+    second = forest_fire([16, 16], replicas=4, seed=3).run_collect(10)
+    assert len(first) == 4
+    for a, b in zip(first, second):
+        assert a.equals(b)
+
+def test_hashlife_matches_game_of_life():
+    dense = game([40, 40], toroidal=False)
+    dense.cells = np.zeros([40, 40], dtype=int)
+    dense.cells[15:25, 15:25] = np.random.random([10, 10]) < 0.5
+    dense.update_neighbors()
+    life = HashLife(dense.cells)
+    for i in range(8):
+        dense.evolve()
+        life.step(1)
+        assert np.array_equal(life.cells, dense.cells)
+
+def test_hashlife_jumps_move_glider():
+    glider = np.array([[0, 1, 0], [0, 0, 1], [1, 1, 1]])
+    life = hashlife([3, 3])
+    life.load(glider)
+    life.step(2**20)
+    shift = 2**18
+    assert life.generation == 2**20
+    assert life.population == 5
+    assert np.array_equal(life.to_array(shift, shift, 3, 3), glider)
+
+def test_active_set_matches_dense():
+    for factory, toroidal in [(game, True), (game, False), (brians_brain, True)]:
+        model = factory([90, 140], toroidal=toroidal)
+        model.cells = np.zeros([90, 140], dtype=int)
+        model.cells[:8, :8] = np.random.randint(0, 3 if factory is brians_brain else 2, size=[8, 8])
+        model.cells[60:64, 130:] = np.random.randint(0, 2, size=[4, 10])
+        model.update_neighbors()
+        active = factory([90, 140], toroidal=toroidal)
+        active.cells = model.cells.copy()
+        active.update_neighbors()
+        active.use_active_set(tile=8, threshold=0.3)
+        for i in range(30):
+            model.evolve()
+            active.evolve()
+            assert np.array_equal(model.cells, active.cells)
+        assert active._active.sparse_steps > 0
+
+def test_compact_dtypes_are_kept():
+    for factory, dtype in [(game, np.uint8), (brians_brain, np.uint8), (forest_fire, np.uint8), (applause, np.uint8), (mpa, np.float32)]:
+        for buffered in [False, True]:
+            model = factory([12, 14], dtype=dtype)
+            if buffered:
+                model.use_buffers()
+            assert model.cells.dtype == dtype
+            for i in range(5):
+                model.evolve()
+            assert model.cells.dtype == dtype
+
+def test_cycle_detection_stops_early_and_extrapolates():
+    model = game([10, 10], toroidal=False)
+    model.cells = np.zeros([10, 10], dtype=np.uint8)
+    model.cells[1:4, 5] = 1
+    model.cells[6, 6:8] = 1
+    model.update_neighbors()
+    start = model.cells.copy()
+
+    data = model.run_collect(100, collector={'sum': np.sum, 'all': 0}, detect_cycles=True, extrapolate=True)
+    assert model.cycle == {'transient': 1, 'period': 2, 'step': 3}
+    assert len(data) == 100
+
+    model.cells = start
+    model.update_neighbors()
+    expected = model.run_collect(100, collector={'sum': np.sum, 'all': 0})
+    assert np.array_equal(data['sum'], expected['sum'])
+    assert all(np.array_equal(a, b) for a, b in zip(data['all'], expected['all']))
+
+    model.cells = start
+    model.update_neighbors()
+    final = model.run_collect(101, steady_state=True, collector={'all': 0}, detect_cycles=True)
+    assert np.array_equal(final[0][0], expected['all'].iloc[0])
+
+def test_decomposed_matches_single_process():
+    for factory, toroidal in [(game, True), (game, False), (brians_brain, True)]:
+        model = factory([37, 23], toroidal=toroidal)
+        decomposed = factory([37, 23], toroidal=toroidal)
+        decomposed.cells = model.cells.copy()
+        decomposed.update_neighbors()
+        for i in range(9):
+            model.evolve()
+        decomposed.run_decomposed(9, processes=3)
+        assert np.array_equal(model.cells, decomposed.cells)
+
+    #rules that may read the whole lattice are evolved on one process
+    import warnings
+    model = mpa([20, 20])
+    serial = mpa([20, 20])
+    serial.cells = model.cells.copy()
+    serial.update_neighbors()
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        model.run_decomposed(3, processes=2)
+    assert len(caught) == 1
+    for i in range(3):
+        serial.evolve()
+    assert np.allclose(model.cells, serial.cells)
+
+def test_decomposed_stops_when_a_worker_dies():
+    import os
+    from complexity_science.ca.ca.decomposed import DecomposedCA2D
+
+    class DieOnMarker(GameOfLife):
+        def apply(self, current, neighbors):
+            if (current == 2).any():
+                os._exit(9)
+            return GameOfLife.apply(self, current, neighbors)
+
+    model = game([20, 20])
+    model.cells[0, 0] = 2
+    model.set_rule(DieOnMarker())
+    model.update_neighbors()
+    with DecomposedCA2D(model, processes=2, timeout=30) as runner:
+        try:
+            runner.run(5)
+            failed = None
+        except RuntimeError as error:
+            failed = str(error)
+    assert failed is not None and '9' in failed
+
+def test_threaded_tiles_match_serial():
+    for factory, toroidal in [(game, True), (game, False), (brians_brain, True)]:
+        model = factory([29, 31], toroidal=toroidal)
+        threaded = factory([29, 31], toroidal=toroidal)
+        threaded.cells = model.cells.copy()
+        threaded.update_neighbors()
+        threaded.use_threads(threads=3, tile_rows=4)
+        for i in range(10):
+            model.evolve()
+            threaded.evolve()
+        assert np.array_equal(model.cells, threaded.cells)
+        threaded.use_threads(False)
+
+    ensemble = game([20, 20], replicas=2, seed=1)
+    single = game([20, 20])
+    single.cells = ensemble.cells[1].copy()
+    single.update_neighbors()
+    ensemble.use_threads(threads=2)
+    for i in range(5):
+        ensemble.evolve()
+        single.evolve()
+    assert np.array_equal(ensemble.cells[1], single.cells)
+
+    #threads write into the back buffer when buffers are used
+    model = game([29, 31])
+    threaded = game([29, 31])
+    threaded.cells = model.cells.copy()
+    threaded.update_neighbors()
+    threaded.use_buffers(True)
+    threaded.use_threads(threads=2, tile_rows=5)
+    first = threaded.evolve()
+    second = threaded.evolve()
+    assert threaded.evolve() is first and threaded.evolve() is second
+    for i in range(4):
+        model.evolve()
+    assert np.array_equal(model.cells, threaded.cells)
+
+    #dropped models release their pool
+    import gc
+    pool = threaded.threaded.pool
+    del threaded
+    gc.collect()
+    assert pool._shutdown
+
+    #stochastic rules stay on the calling thread, so seeded runs are reproducible
+    runs = []
+    for i in range(3):
+        np.random.seed(3)
+        model = forest_fire([64, 64])
+        model.use_threads(threads=4, tile_rows=8)
+        for j in range(5):
+            model.evolve()
+        model.use_threads(False)
+        runs.append(model.cells.copy())
+    assert all(np.array_equal(runs[0], run) for run in runs)
+
+def test_export_frames_to_raw_png_and_pipe(tmp_path):
+    import sys
+    from complexity_science.ca.ca.frames import ColorMap, FrameProducer, PipeSink
+
+    model = game([20, 30])
+    reference = game([20, 30])
+    reference.cells = model.cells.copy()
+    reference.update_neighbors()
+    producer = FrameProducer(reference, frames=3, skip=2, downsample=2)
+    frames = list(producer)
+    producer.stop()
+    assert len(frames) == 3 and frames[0].shape == (10, 15)
+
+    start = model.cells.copy()
+    assert model.export_frames(str(tmp_path / 'run.raw'), 3, skip=2, downsample=2, cmap='gray') == 3
+    raw = np.fromfile(tmp_path / 'run.raw', dtype=np.uint8).reshape(3, 10, 15, 3)
+    colors = ColorMap('gray', 0, 1)
+    assert all(np.array_equal(raw[i], colors(frame)) for i, frame in enumerate(frames))
+    viridis = ColorMap('viridis', 0, 1, levels=16)
+    assert viridis.lut.shape == (16, 3) and viridis(frames[0]).shape == frames[0].shape+(3,)
+
+    model.export_frames(str(tmp_path / 'png' / 'frame_%03d.png'), 2, cmap='gray')
+    assert open(tmp_path / 'png' / 'frame_001.png', 'rb').read(8) == b'\x89PNG\r\n\x1a\n'
+
+    model.cells = start
+    model.update_neighbors()
+    copy = [sys.executable, '-c', 'import sys; open(sys.argv[1], "wb").write(sys.stdin.buffer.read())', '{output}']
+    model.export_frames(PipeSink(str(tmp_path / 'piped.raw'), command=copy), 3, skip=2, downsample=2, cmap='gray')
+    assert np.array_equal(np.fromfile(tmp_path / 'piped.raw', dtype=np.uint8).reshape(raw.shape), raw)
+
+def test_profiler_records_phases_rules_and_collection(tmp_path):
+    model = game([40, 40])
+    model.add_rule(GameOfLife())
+    model.rm.fuse = False
+    profiler = model.profile(memory=True, trace=True)
+    model.run_collect(5, collector={'mean': np.mean})
+    stats = profiler.to_dict()
+    assert stats['evolve']['calls'] == 5 and stats['collect']['calls'] == 5
+    for path in ['evolve/rules', 'evolve/rules/copy', 'evolve/rules/0 GameOfLife', 'evolve/rules/1 GameOfLife', 'evolve/update_neighbors']:
+        assert stats[path]['calls'] == 5
+    assert stats['evolve']['seconds'] >= stats['evolve/rules']['seconds']
+    assert stats['evolve/rules/copy']['max_bytes'] >= 40*40
+    assert 'evolve/rules/copy' in profiler.report()
+
+    profiler.export_trace(str(tmp_path / 'trace.json'))
+    with open(str(tmp_path / 'trace.json')) as f:
+        events = json.load(f)['traceEvents']
+    assert len(events) == sum(section['calls'] for section in stats.values())
+
+    model.profile(False)
+    assert model.profiler is None and model.rm.profiler is None
+    model.evolve()
+    assert profiler.to_dict()['evolve']['calls'] == 5
+
+def test_fused_rule_chains_match_sequential_rules():
+    for factory, rules in [(game, [GameOfLife(), GameOfLife()]), (brians_brain, [BriansBrain(), BriansBrain(), BriansBrain()])]:
+        fused = factory([30, 40], default=False)
+        sequential = factory([30, 40], default=False)
+        sequential.cells = fused.cells.copy()
+        sequential.update_neighbors()
+        sequential.rm.fuse = False
+        for rule in rules:
+            fused.add_rule(rule)
+            sequential.add_rule(rule)
+        assert len(fused.rm.stages) == 1 and len(sequential.rm.stages) == len(rules)
+        for i in range(10):
+            assert np.array_equal(fused.evolve(), sequential.evolve())
+
+    model = game([20, 20], replicas=2, seed=0)
+    model.add_rule(ForestFire())
+    assert [type(stage) for stage in model.rm.stages] == [GameOfLife, ForestFire]
+
+def test_parse_rulestrings():
+    assert parse_rulestring('B36/S23') == ((3, 6), (2, 3), 2)
+    assert parse_rulestring('b36s23') == ((3, 6), (2, 3), 2)
+    assert parse_rulestring('23/36') == ((3, 6), (2, 3), 2)
+    assert parse_rulestring('B2/S/C3') == ((2,), (), 3)
+    assert parse_rulestring('/2/3') == ((2,), (), 3)
+    assert parse_rulestring('seeds') == ((2,), (), 2)
+
+def test_life_like_matches_hand_written_rules():
+    for rule, factory in [('B3/S23', game), ('B2/S/C3', brians_brain)]:
+        model = factory([30, 40])
+        engine = life_like([30, 40], rule)
+        engine.cells = model.cells.copy()
+        engine.update_neighbors()
+        for i in range(10):
+            assert np.array_equal(engine.evolve(), model.evolve())
+
+def test_generations_cells_age_and_die():
+    model = life_like([5, 5], 'B/S/C4', toroidal=False)
+    model.initialize_zero()
+    model.cells[2, 2] = 1
+    model.update_neighbors()
+    assert [model.evolve()[2, 2] for i in range(4)] == [2, 3, 0, 0]
+
+    model = life_like([40, 40], 'B2/S', neighborhood='von_neumann', replicas=2, seed=0)
+    assert model.cells.dtype == np.uint8
+    model.evolve()
+    assert set(np.unique(model.cells)) <= {0, 1}
+
+def test_radius_neighborhood_matches_brute_force():
+    cells = np.random.RandomState(0).randint(0, 3, size=[17, 23]).astype(np.uint8)
+    for radius, shape, toroidal in [(1, 'moore', True), (3, 'moore', False), (2, 'von_neumann', True), (4, 'von_neumann', False)]:
+        neighbors = RadiusNeighborhood(cells, radius, shape, toroidal)
+        padded = np.pad(cells.astype(np.int64), radius, mode='wrap' if toroidal else 'constant')
+        total, ones = np.zeros(cells.shape, dtype=np.int64), np.zeros(cells.shape, dtype=np.int64)
+        for dx in range(-radius, radius+1):
+            for dy in range(-radius, radius+1):
+                if (dx, dy) == (0, 0) or (shape == 'von_neumann' and abs(dx)+abs(dy) > radius):
+                    continue
+                window = padded[radius+dx:radius+dx+cells.shape[0], radius+dy:radius+dy+cells.shape[1]]
+                total += window
+                ones += window == 1
+        assert np.array_equal(neighbors.sum(), total)
+        assert np.array_equal(neighbors.count(1), ones)
+
+def test_radius_one_matches_moore_and_von_neumann():
+    for shape, neighborhood in [('moore', 'moore'), ('von_neumann', 'von_neumann')]:
+        model = life_like([30, 40], 'B3/S23', neighborhood=neighborhood)
+        engine = RadiusCA([30, 40], 1, shape, dtype=np.uint8)
+        engine.set_rule(LifeLike('B3/S23'))
+        engine.cells = model.cells.copy()
+        engine.update_neighbors()
+        for i in range(5):
+            assert np.array_equal(engine.evolve(), model.evolve())
+
+    reference = mpa([20, 20])
+    engine = RadiusCA([20, 20], 1, 'von_neumann', dtype=np.float64)
+    engine.set_rule(reference.rm.rules[0])
+    engine.cells = reference.cells.copy()
+    engine.update_neighbors()
+    assert len(engine.neighbors) == 4
+    np.random.seed(1)
+    expected = reference.evolve().copy()
+    np.random.seed(1)
+    assert np.allclose(engine.evolve(), expected)
+
+def test_larger_than_life():
+    assert parse_larger_than_life('R5,C0,M1,S34..58,B34..45,NM') == {'radius' : 5, 'states' : 2, 'middle' : 1,
+                                                                   'survive' : (34, 58), 'birth' : (34, 45), 'shape' : 'moore'}
+    #Life is Larger than Life of radius 1 with the middle cell excluded
+    model = game([30, 30])
+    engine = larger_than_life([30, 30], 'R1,C0,M0,S2..3,B3..3,NM')
+    engine.cells = model.cells.copy()
+    engine.update_neighbors()
+    for i in range(5):
+        assert np.array_equal(engine.evolve(), model.evolve())
+
+    model = larger_than_life([64, 64])
+    assert len(model.neighbors) == 120
+    model.evolve()
+    assert set(np.unique(model.cells)) <= {0, 1}
+
+def test_kernel_neighborhood_direct_and_fft_match_brute_force():
+    rs = np.random.RandomState(0)
+    cells = rs.randint(0, 3, size=[2, 17, 23]).astype(np.uint8)
+    for kernel in [rs.randint(0, 3, size=[5, 4]), rs.random_sample([7, 9]), rs.random_sample([41, 45])]:
+        cy, cx = kernel.shape[0]//2, kernel.shape[1]//2
+        total, ones = np.zeros(cells.shape), np.zeros(cells.shape)
+        for i in range(kernel.shape[0]):
+            for j in range(kernel.shape[1]):
+                shifted = np.roll(cells, (cy-i, cx-j), axis=(-2, -1))
+                total += kernel[i, j]*shifted
+                ones += kernel[i, j]*(shifted == 1)
+        for method in ['direct', 'fft']:
+            neighbors = KernelNeighborhood(cells, kernel, method)
+            assert np.allclose(neighbors.sum(), total)
+            assert np.allclose(neighbors.count(1), ones)
+
+    assert KernelNeighborhood(cells, np.ones([3, 3])).method == 'direct'
+    assert KernelNeighborhood(cells, lenia_kernel(5)).method == 'fft'
+
+def test_kernel_ca_runs_table_and_continuous_rules():
+    #Life on a 3x3 kernel without its center, applied by FFT
+    kernel = np.ones([3, 3], dtype=int)
+    kernel[1, 1] = 0
+    model = game([30, 40])
+    engine = KernelCA([30, 40], kernel, method='fft', dtype=np.uint8)
+    engine.set_rule(LifeLike('B3/S23'))
+    engine.cells = model.cells.copy()
+    engine.update_neighbors()
+    for i in range(5):
+        assert np.array_equal(engine.evolve(), model.evolve())
+
+    np.random.seed(0)
+    model = lenia([64, 64], radius=8)
+    expected = Lenia().apply(model.cells, model.neighbors)
+    assert np.allclose(model.evolve(), expected)
+    assert 0 <= model.cells.min() and model.cells.max() <= 1
+
+    model = mpa([32, 32], kernel=lenia_kernel(4), D=25)
+    assert np.isclose(model.neighbors.weight, 1)
+    model.evolve()
+    assert np.isfinite(model.cells).all()
+
+    #a kernel summing to zero does not diffuse
+    kernel = np.zeros([3, 3])
+    kernel[1, 0], kernel[1, 2] = 1, -1
+    model = mpa([16, 16], kernel=kernel, D=25)
+    assert model.neighbors.weight == 0 and len(model.neighbors) == 2
+    still = mpa([16, 16], D=0)
+    for m in [model, still]:
+        m.cells = np.full([16, 16], 0.5)
+        m.update_neighbors()
+    assert np.allclose(model.evolve(), still.evolve())
+
+    for options in [{'toroidal' : False}, {'replicas' : 2}]:
+        try:
+            mpa([16, 16], kernel=kernel, **options)
+            rejected = False
+        except AssertionError:
+            rejected = True
+        assert rejected
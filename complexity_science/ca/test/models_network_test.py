@@ -0,0 +1,72 @@
+import numpy as np
+
+from complexity_science.ca.models_network import Adjacency, gillespie, migration
+
+
+def test_exact_step_fires_one_event_per_active_node():
+    model = gillespie(np.zeros([50, 50]))
+    model.initialize_random_int(0, 10)
+    model.cells[:, 0] = 0
+    before = model.cells.copy()
+    model.evolve()
+    changed = np.abs(model.cells - before).sum(axis=0)
+    assert changed[0] == 0
+    assert np.all(changed[1:] <= 2)
+    assert np.array_equal(model.cells.sum(axis=0), before.sum(axis=0))
+
+def test_tau_leaping_keeps_populations_non_negative():
+    model = gillespie(np.zeros([200, 200]))
+    model.modify_rule(tau=5)
+    model.initialize_random_int(0, 3)
+    total = model.cells.sum()
+    data, dt = model.run_collect(50, collector={'min': np.min, 'sum': np.sum})
+    assert min(row[0] for row in data) >= 0
+    assert data[-1][1] == total
+
+def test_sparse_adjacency_matches_dense():
+    edges = np.array([[0, 1], [1, 2], [2, 3], [3, 0], [0, 2]])
+    adj = Adjacency.from_edges(edges, num_nodes=5)
+    dense = adj.to_dense()
+    assert np.array_equal(dense, dense.T)
+    assert np.array_equal(Adjacency.convert(dense).indices, adj.indices)
+
+    x = np.random.random([3, 5])
+    assert np.allclose(adj.neighbor_sum(x), x @ dense.T)
+    assert np.allclose(adj.neighbor_sum(x, transpose=True), x @ dense)
+    degree = dense.sum(axis=1)
+    assert np.allclose(adj.neighbor_mean(x)[:, :4], (x @ dense.T)[:, :4]/degree[:4])
+    assert np.all(adj.neighbor_mean(x)[:, 4] == 0)
+
+def test_migration_conserves_population():
+    adj = Adjacency.from_edges([[0, 1], [1, 2]], num_nodes=4)
+    model = migration((adj.indptr, adj.indices))
+    model.initialize_random_int(0, 10)
+    total = model.cells.sum(axis=1)
+    isolated = model.cells[:, 3].copy()
+    for i in range(5):
+        model.evolve()
+    assert np.allclose(model.cells.sum(axis=1), total)
+    assert np.array_equal(model.cells[:, 3], isolated)
+
+def test_gillespie_initializes_random_states():
+    model = gillespie(np.zeros([20, 20]))
+    model.initialize_random()
+    assert model.cells.dtype == np.float64
+    assert np.all((0 <= model.cells) & (model.cells < 1))
+
+def test_gillespie_coupling_spreads_infection_to_neighbors():
+    from complexity_science.ca.models_network import SIRC_Gillespie
+
+    adj = Adjacency.from_edges([[0, 1]], num_nodes=3)
+    population = np.array([[10., 10., 10.], [10., 0., 0.], [0., 0., 0.], [0., 0., 0.]])
+    assert SIRC_Gillespie().compute_prob(population, adj)[0, 1] == 0
+
+    coupled = SIRC_Gillespie(coupling=0.5).compute_prob(population, adj)
+    assert coupled[0, 1] > 0 and coupled[0, 2] == 0
+    assert np.isclose(coupled[0, 0], SIRC_Gillespie().compute_prob(population)[0, 0]/2)
+
+    model = gillespie(adj)
+    model.modify_rule(coupling=0.5, tau=1)
+    model.cells = population.copy()
+    model.evolve()
+    assert np.array_equal(model.cells.sum(axis=0), population.sum(axis=0))
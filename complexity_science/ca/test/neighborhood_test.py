@@ -0,0 +1,22 @@
+import numpy as np
+
+from complexity_science.ca.ca.neighborhood import MooreNeighborhood, VonNeumannNeighborhood
+
+
+def rolled_neighbors(cells, offsets):
+    return {key: np.roll(cells, (-dy, -dx), axis=(0, 1)) for key, (dy, dx) in offsets.items()}
+
+def test_moore_matches_rolled_grids():
+    cells = np.random.randint(0, 3, size=(12, 17))
+    neighbors = MooreNeighborhood(cells)
+    rolled = rolled_neighbors(cells, MooreNeighborhood.offsets)
+    for key in rolled:
+        assert np.array_equal(neighbors[key], rolled[key])
+    assert np.array_equal(neighbors.sum(), sum(rolled.values()))
+    assert np.array_equal(neighbors.count(2), sum((v == 2).astype(int) for v in rolled.values()))
+
+def test_von_neumann_fixed_boundary():
+    cells = np.ones([3, 3], dtype=int)
+    neighbors = VonNeumannNeighborhood(cells, toroidal=False)
+    assert np.array_equal(neighbors.sum(), [[2, 3, 2], [3, 4, 3], [2, 3, 2]])
+    assert neighbors['top'][0].sum() == 0
@@ -0,0 +1,27 @@
+from complexity_science.ca.models2d import applause
+from complexity_science.ca.sweep import parameter_grid, sweep
+
+
+def test_parameter_grid():
+    grid = parameter_grid({'a': [1, 2], 'b': [3]})
+    assert grid == [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}]
+
+def test_sweep_is_deterministic():
+    grid = {'a': [0.2, 0.5], 'beta': [1]}
+    first = sweep(applause, [8, 8], grid, replicas=2, iteration=5, seed=0, processes=2)
+    second = sweep(applause, [8, 8], grid, replicas=2, iteration=5, seed=0, processes=1)
+    assert first.shape == (20, 1)
+    assert list(first.index.names) == ['a', 'beta', 'replica', 'step']
+    assert first.equals(second)
+
+def test_sweep_warns_about_failed_tasks(capsys):
+    import warnings
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        data = sweep(applause, [6, 6], {'a': [0.2, 'bad']}, iteration=3, seed=0, processes=2)
+
+    messages = [str(warning.message) for warning in caught if issubclass(warning.category, RuntimeWarning)]
+    assert len(messages) == 1 and messages[0].startswith("1 of 2 sweep tasks failed (task 1: TypeError")
+    assert 'failed' not in capsys.readouterr().out
+    assert data.attrs['failed'] == [1]
+    assert data.loc['bad'].isna().all().all() and not data.loc[0.2].isna().any().any()